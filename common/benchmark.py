@@ -0,0 +1,234 @@
+import json
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from common.throttling import throttle_store
+from dashboard.stats import rebuild_task_statistics
+from dashboard.worked_hours import rebuild_worked_hours
+from tasks.models import Task
+from users.hierarchy import rebuild_hierarchy
+from users.models import User
+
+BENCHMARK_PASSWORD = "Bench@12345"
+
+
+def seed(users, tasks, admins=None):
+    """
+    Create a superadmin, admins, users (spread over the admins) and tasks
+    (spread over the users) with bulk inserts. Returns the seeded objects
+    the routes need.
+    """
+    password = make_password(BENCHMARK_PASSWORD)
+    admins = admins or max(1, users // 50)
+
+    def make_user(name, role, **extra):
+        return User(username=name, email=f"{name}@bench.local", mobile=name[-15:], name=name, role=role,
+                    password=password, is_staff=role != "user", **extra)
+
+    superadmin = make_user("bench_superadmin", "superadmin", is_superuser=True)
+    superadmin.save()
+    User.objects.bulk_create([make_user(f"bench_admin{i}", "admin") for i in range(admins)])
+    admin_users = list(User.objects.filter(role="admin").order_by("pkid"))
+    User.objects.bulk_create(
+        [make_user(f"bench_user{i}", "user", assigned_admin=admin_users[i % admins]) for i in range(users)],
+        batch_size=500,
+    )
+    rebuild_hierarchy()
+    user_ids = list(User.objects.filter(role="user").order_by("pkid").values_list("pkid", flat=True))
+
+    statuses = [value for value, label in Task.STATUS_CHOICES]
+    today = date.today()
+    now = timezone.now()
+    Task.objects.bulk_create(
+        [
+            Task(
+                title=f"Task {i}",
+                description=f"Benchmark task {i} description",
+                assigned_to_id=user_ids[i % len(user_ids)],
+                due_date=today + timedelta(days=i % 60 - 30),
+                status=statuses[i % len(statuses)],
+                completion_report=f"Report {i}" if statuses[i % len(statuses)] == "completed" else None,
+                worked_hours=2 if statuses[i % len(statuses)] == "completed" else None,
+                # bulk_create skips Task.save(), so set completed_at here, spread over the last 90 days
+                completed_at=now - timedelta(days=i % 90) if statuses[i % len(statuses)] == "completed" else None,
+            )
+            for i in range(tasks)
+        ],
+        batch_size=1000,
+    )
+    rebuild_task_statistics()
+    rebuild_worked_hours()
+
+    user = User.objects.get(pkid=user_ids[0])
+    # each update route gets a pending task of its own, so none of them finds the status already set by another
+    update_tasks = list(Task.objects.filter(assigned_to=user, status="pending").order_by("id")[:3])
+    return {
+        "superadmin": superadmin,
+        "admin": admin_users[0],
+        "user": user,
+        "other_user": User.objects.get(pkid=user_ids[-1]),
+        "task": Task.objects.filter(assigned_to=user).order_by("id").first(),
+        "update_task": update_tasks[0],
+        "async_update_task": update_tasks[1],
+        "batch_update_task": update_tasks[2],
+        # within the admin's scope, so the admin report routes can open it
+        "completed_task": Task.objects.filter(status="completed", assigned_to__assigned_admin=admin_users[0]).order_by("id").first(),
+    }
+
+
+def make_client(user=None):
+    """
+    Test client logged in through the session and carrying a JWT access token,
+    so it works for both the template views and the API views.
+    """
+    if user is None:
+        return Client()
+    client = Client(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+    client.force_login(user)
+    return client
+
+
+def update_status(iteration):
+    # alternate, so every request of an update route changes the task's status
+    return "in_progress" if iteration % 2 == 0 else "pending"
+
+
+# (name, client, method, url, data) where url and data are callables taking (objects, iteration)
+ROUTES = [
+    # tasks.urls
+    ("task-list", "user", "get", lambda o, i: reverse("task-list"), None),
+    ("task-list:deep-page", "user", "get", lambda o, i: reverse("task-list") + "?page=5&count=false", None),
+    ("task-list:cursor", "user", "get", lambda o, i: reverse("task-list") + "?pagination=cursor", None),
+    ("task-search", "user", "get", lambda o, i: reverse("task-search") + "?q=task", None),
+    ("task-overdue", "admin", "get", lambda o, i: reverse("task-overdue"), None),
+    ("task-worked-hours", "admin", "get", lambda o, i: reverse("task-worked-hours"), None),
+    ("task-worked-hours:user", "admin", "get", lambda o, i: reverse("task-worked-hours") + "?period=month&group=user", None),
+    ("task-update", "user", "put", lambda o, i: reverse("task-update", args=[o["update_task"].id]),
+     lambda o, i: {"status": update_status(i), "completion_report": "", "worked_hours": "1"}),
+    ("task-history", "user", "get", lambda o, i: reverse("task-history", args=[o["task"].id]), None),
+    ("task-batch-update", "user", "post", lambda o, i: reverse("task-batch-update"),
+     lambda o, i: {"updates": [{"id": o["batch_update_task"].id, "status": update_status(i)}]}),
+    ("create_task", "admin", "post", lambda o, i: reverse("create_task"),
+     lambda o, i: {"title": f"New {i}", "description": "d", "assigned_to": o["user"].pkid, "due_date": "2030-01-01"}),
+    ("task-bulk-create", "admin", "post", lambda o, i: reverse("task-bulk-create"),
+     lambda o, i: {"tasks": [{"title": f"Bulk {i}-{n}", "description": "d", "assigned_to": o["user"].username,
+                              "due_date": "2030-01-01"} for n in range(50)]}),
+    ("bulk_upload_tasks", "admin", "get", lambda o, i: reverse("bulk_upload_tasks"), None),
+    ("task-export", "admin", "get", lambda o, i: reverse("task-export") + f"?assigned_to={o['user'].pkid}", None),
+    ("task_list", "admin", "get", lambda o, i: reverse("task_list"), None),
+    ("task_list:filtered", "admin", "get", lambda o, i: reverse("task_list") + "?status=completed&sort=due_date&page=3", None),
+    ("task_list_superuser", "superadmin", "get", lambda o, i: reverse("task_list_superuser"), None),
+    ("edit_task", "admin", "get", lambda o, i: reverse("edit_task", args=[o["task"].id]), None),
+    ("task_report", "admin", "get", lambda o, i: reverse("task_report", args=[o["completed_task"].id]), None),
+    ("task-report-api", "superadmin", "get", lambda o, i: reverse("task-report-api", args=[o["completed_task"].id]), None),
+    ("task-list-async", "user", "get", lambda o, i: reverse("task-list-async"), None),
+    ("task-update-async", "user", "put", lambda o, i: reverse("task-update-async", args=[o["async_update_task"].id]),
+     lambda o, i: {"status": update_status(i), "completion_report": "", "worked_hours": "1"}),
+    ("task-report-api-async", "superadmin", "get",
+     lambda o, i: reverse("task-report-api-async", args=[o["completed_task"].id]), None),
+    # dashboard.urls
+    ("superuser_dashboard", "superadmin", "get", lambda o, i: reverse("superuser_dashboard"), None),
+    ("admin_dashboard", "admin", "get", lambda o, i: reverse("admin_dashboard"), None),
+    ("admin_login", "anon", "get", lambda o, i: reverse("admin_login"), None),
+    ("register_user", "superadmin", "post", lambda o, i: reverse("register_user"),
+     lambda o, i: {"username": f"new{i}", "name": f"new{i}", "email": f"new{i}@bench.local", "role": "user",
+                   "mobile": f"9{i:09d}", "password": BENCHMARK_PASSWORD, "re_password": BENCHMARK_PASSWORD}),
+    ("admin_details", "superadmin", "get", lambda o, i: reverse("admin_details"), None),
+    ("user_details", "superadmin", "get", lambda o, i: reverse("user_details"), None),
+    ("block_user", "superadmin", "get", lambda o, i: reverse("block_user", args=[o["other_user"].id]), None),
+    ("update_user_role", "superadmin", "post", lambda o, i: reverse("update_user_role", args=[o["other_user"].id]),
+     lambda o, i: {"role": "user"}),
+    ("user_details_admin", "admin", "get", lambda o, i: reverse("user_details_admin"), None),
+    ("user_rows", "superadmin", "get", lambda o, i: reverse("user_rows") + f"?table=user&after={o['user'].pkid + 50}", None),
+    # users.urls
+    ("login", "anon", "post", lambda o, i: "/api/v1/auth/login/",
+     lambda o, i: {"username": o["user"].username, "password": BENCHMARK_PASSWORD}),
+    ("logout", "user", "post", lambda o, i: "/api/v1/auth/logout/", None),
+]
+
+JSON_ROUTES = {"task-update", "task-update-async", "task-batch-update", "task-bulk-create", "login", "logout"}
+
+
+def request_route(client, route, objects, iteration):
+    name, client_name, method, url, data = route
+    kwargs = {}
+    if data is not None:
+        payload = data(objects, iteration)
+        if name in JSON_ROUTES:
+            kwargs = {"data": json.dumps(payload), "content_type": "application/json"}
+        else:
+            kwargs = {"data": payload}
+    response = getattr(client, method)(url(objects, iteration), **kwargs)
+    if hasattr(response, "streaming_content"):
+        for chunk in response.streaming_content:
+            pass
+    return response
+
+
+def measure_route(route, objects, clients, iterations):
+    """
+    Time one route. Returns latency percentiles in milliseconds, the most
+    queries any single request ran, peak traced memory in KiB and the last
+    response status.
+    """
+    client = clients[route[1]]
+    timings, queries = [], []
+    status_code = None
+    for iteration in range(iterations):
+        cache.clear()
+        throttle_store.clear()  # keep throttle state from the previous requests out of the way
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = request_route(client, route, objects, iteration)
+            timings.append((time.perf_counter() - started) * 1000)
+        queries.append(len(captured.captured_queries))
+        status_code = response.status_code
+
+    cache.clear()
+    throttle_store.clear()
+    tracemalloc.start()
+    request_route(client, route, objects, iterations)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    timings.sort()
+    return {
+        "status": status_code,
+        "p50_ms": statistics.median(timings),
+        "p95_ms": timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+        "queries": max(queries),
+        "peak_kib": peak / 1024,
+    }
+
+
+def run_benchmark(users, tasks, iterations, route_names=None):
+    objects = seed(users, tasks)
+    clients = {
+        "anon": make_client(),
+        "user": make_client(objects["user"]),
+        "admin": make_client(objects["admin"]),
+        "superadmin": make_client(objects["superadmin"]),
+    }
+    results = {}
+    with tempfile.TemporaryDirectory() as directory, override_settings(
+        THROTTLE_STORE={**settings.THROTTLE_STORE, "PATH": os.path.join(directory, "throttle.sqlite3")},
+    ):
+        for route in ROUTES:
+            if route_names and route[0] not in route_names:
+                continue
+            results[route[0]] = measure_route(route, objects, clients, iterations)
+    return results
@@ -1,10 +1,13 @@
 import logging
 from typing import Optional, Tuple
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from rest_framework.request import Request
 from rest_framework_simplejwt.authentication import JWTAuthentication, AuthUser
-from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.tokens import Token
+from common.user_cache import user_cache
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -44,3 +47,68 @@ class CookieAuthentication(JWTAuthentication):
                 logger.error(f"Token validation error: {str(e)}")  # Log any token validation errors
         
         return None  # Return None if authentication fails
+
+    def get_user(self, validated_token: Token) -> AuthUser:
+        """
+        Resolve the user for a validated token, serving repeat lookups from the
+        authenticated-user cache instead of querying the database.
+
+        :param validated_token: The validated JWT token.
+        :return: The user the token was issued for.
+        """
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+
+        user = user_cache.get(user_id)
+        if user is None:
+            user = super().get_user(validated_token)  # Database lookup, also checks is_active
+            user_cache.set(user_id, user)
+        elif not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+
+        return user
+
+
+class AsyncCookieAuthentication(CookieAuthentication):
+    """
+    Async counterpart of CookieAuthentication for plain Django async views.
+    Token parsing and validation are CPU only; the user comes from the
+    authenticated-user cache and only a cache miss runs the database lookup
+    in a worker thread.
+    """
+
+    async def authenticate(self, request) -> Optional[Tuple[AuthUser, Token]]:
+        """
+        Authenticate a Django HttpRequest the same way CookieAuthentication does.
+
+        :param request: The incoming HTTP request.
+        :return: A tuple containing the authenticated user and token if authentication is successful, else None.
+        :raises AuthenticationFailed: If the token's user is missing or inactive.
+        """
+        header = self.get_header(request)
+        raw_token = None
+
+        if header is not None:
+            raw_token = self.get_raw_token(header)
+        elif settings.COOKIE_NAME in request.COOKIES:
+            raw_token = request.COOKIES.get(settings.COOKIE_NAME)
+
+        if raw_token is not None:
+            try:
+                validated_token = self.get_validated_token(raw_token)
+                return await self.aget_user(validated_token), validated_token
+
+            except TokenError as e:
+                logger.error(f"Token validation error: {str(e)}")
+
+        return None
+
+    async def aget_user(self, validated_token: Token) -> AuthUser:
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        user = user_cache.get(user_id) if user_id is not None else None
+        if user is None:
+            return await sync_to_async(self.get_user)(validated_token)
+        if not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        return user
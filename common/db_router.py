@@ -0,0 +1,138 @@
+import contextvars
+import hashlib
+import random
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_state = contextvars.ContextVar("replica_state", default=None)
+
+DEFAULTS = {
+    "PIN_SECONDS": 5,
+    "PIN_COOKIE": "replica_pin",
+    "APPS": ["tasks", "dashboard", "users"],
+}
+
+
+def replica_settings():
+    return {**DEFAULTS, **getattr(settings, "DATABASE_REPLICA", {})}
+
+
+class ReplicaState:
+    """
+    Routing state of the current request: whether reads may go to a replica
+    and whether the request has written to the primary.
+    """
+
+    def __init__(self):
+        self.use_replica = False
+        self.wrote = False
+
+
+def start_request():
+    return _state.set(ReplicaState())
+
+
+def end_request(token):
+    _state.reset(token)
+
+
+def current_state():
+    return _state.get()
+
+
+def pin_keys(request):
+    """
+    Cache keys identifying the client behind request: one per credential it
+    sent (JWT header, JWT cookie, session), so the pin follows the client to
+    whichever worker serves its next request.
+    """
+    credentials = [
+        request.META.get("HTTP_AUTHORIZATION"),
+        request.COOKIES.get(settings.COOKIE_NAME),
+    ]
+    session = getattr(request, "session", None)
+    credentials.append(session.session_key if session is not None else request.COOKIES.get(settings.SESSION_COOKIE_NAME))
+    return [
+        "replica_pin:" + hashlib.sha1(credential.encode()).hexdigest()
+        for credential in credentials if credential
+    ]
+
+
+def is_pinned(request):
+    if request.COOKIES.get(replica_settings()["PIN_COOKIE"]):
+        return True
+    keys = pin_keys(request)
+    return bool(keys) and bool(cache.get_many(keys))
+
+
+def pin_to_primary(request, response):
+    """
+    Send the client's reads to the primary for PIN_SECONDS after it wrote,
+    so it reads its own writes while the replicas catch up.
+    """
+    options = replica_settings()
+    cache.set_many({key: True for key in pin_keys(request)}, options["PIN_SECONDS"])
+    response.set_cookie(options["PIN_COOKIE"], "1", max_age=options["PIN_SECONDS"], httponly=True, samesite="Lax")
+
+
+def replica_reads(view):
+    """
+    Let the ORM reads of a read-only view go to a replica, unless the request
+    is not a GET/HEAD or the client wrote within the last PIN_SECONDS.
+    """
+    def enable(request):
+        state = _state.get()
+        if state is not None and request.method in ("GET", "HEAD") and not is_pinned(request):
+            state.use_replica = True
+
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            enable(request)
+            return await view(request, *args, **kwargs)
+    else:
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            enable(request)
+            return view(request, *args, **kwargs)
+
+    return wrapper
+
+
+class ReplicaRouter:
+    """
+    Route reads of views wrapped in replica_reads to one of
+    settings.DATABASE_REPLICAS; everything else uses the primary. Reads go back
+    to the primary once the request has written or inside a transaction.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        replicas = getattr(settings, "DATABASE_REPLICAS", [])
+        if (
+            not replicas
+            or state is None
+            or not state.use_replica
+            or state.wrote
+            or model._meta.app_label not in replica_settings()["APPS"]
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # replicas get their schema from the primary
+        return db not in getattr(settings, "DATABASE_REPLICAS", [])
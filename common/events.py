@@ -0,0 +1,266 @@
+import asyncio
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+DEFAULTS = {
+    "BACKEND": "common.events.SQLiteEventBackend",
+    "PATH": None,  # SQLite backend file, defaults to BASE_DIR / "events.sqlite3"
+    "BUSY_TIMEOUT": 1.0,
+    "POLL_INTERVAL": 0.5,  # how often each process looks for events published by the others
+    "RETENTION": 300,  # seconds an event stays available for Last-Event-ID replay
+    "QUEUE_SIZE": 1000,  # events buffered per subscriber before it is cut off
+}
+
+
+def event_settings():
+    options = {**DEFAULTS, **getattr(settings, "EVENT_BUS", {})}
+    if options["PATH"] is None:
+        options["PATH"] = settings.BASE_DIR / "events.sqlite3"
+    return options
+
+
+class LocalEventBackend:
+    """
+    Keeps events in process memory. Only subscribers in the publishing
+    process see them, which is enough for a single worker or for tests.
+    """
+
+    shared = False
+
+    def __init__(self, options):
+        self._events = deque()
+        self._last_id = 0
+        self._lock = threading.Lock()
+        self.retention = options["RETENTION"]
+
+    def publish(self, events):
+        now = time.time()
+        with self._lock:
+            while self._events and self._events[0][1] < now - self.retention:
+                self._events.popleft()
+            published = []
+            for event in events:
+                self._last_id += 1
+                self._events.append((self._last_id, now, event))
+                published.append((self._last_id, event))
+        return published
+
+    def read_since(self, last_id, limit=1000):
+        with self._lock:
+            return [(event_id, event) for event_id, _, event in self._events if event_id > last_id][:limit]
+
+    def latest_id(self):
+        return self._last_id
+
+
+class SQLiteEventBackend:
+    """
+    Appends events to a small SQLite file shared by every worker process on
+    the host. Each process polls it once per POLL_INTERVAL for rows published
+    by the others, however many streams it serves. Rows older than RETENTION
+    seconds are deleted as new ones come in.
+    """
+
+    shared = True
+
+    def __init__(self, options):
+        self._local = threading.local()
+        self._pruned_at = 0.0
+        self.path = str(options["PATH"])
+        self.busy_timeout = options["BUSY_TIMEOUT"]
+        self.retention = options["RETENTION"]
+
+    def connection(self):
+        # one connection per thread, reopened after a fork
+        db = getattr(self._local, "db", None)
+        if db is None or self._local.pid != os.getpid():
+            db = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS events "
+                "(id INTEGER PRIMARY KEY AUTOINCREMENT, created REAL NOT NULL, data TEXT NOT NULL)"
+            )
+            self._local.db, self._local.pid = db, os.getpid()
+        return db
+
+    def publish(self, events):
+        now = time.time()
+        db = self.connection()
+        published = []
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            for event in events:
+                cursor = db.execute("INSERT INTO events (created, data) VALUES (?, ?)", [now, json.dumps(event)])
+                published.append((cursor.lastrowid, event))
+            if now - self._pruned_at >= self.retention:
+                self._pruned_at = now
+                db.execute("DELETE FROM events WHERE created < ?", [now - self.retention])
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return published
+
+    def read_since(self, last_id, limit=1000):
+        rows = self.connection().execute(
+            "SELECT id, data FROM events WHERE id > ? ORDER BY id LIMIT ?", [last_id, limit]
+        ).fetchall()
+        return [(event_id, json.loads(data)) for event_id, data in rows]
+
+    def latest_id(self):
+        return self.connection().execute("SELECT coalesce(max(id), 0) FROM events").fetchone()[0]
+
+
+class Subscription:
+    """
+    One subscriber's queue of (event id, event) pairs, filled by the poller
+    or publishing thread and read by a thread of its own, as a streaming
+    response under WSGI does. A subscriber that falls QUEUE_SIZE events
+    behind is marked overflowed and stops receiving, so a slow client cannot
+    make the process buffer without bound.
+    """
+
+    def __init__(self, size):
+        self.queue = queue.Queue(maxsize=size)
+        self.overflowed = False
+
+    def _put(self, item):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(item)
+        except (queue.Full, asyncio.QueueFull):
+            self.overflowed = True
+
+    def deliver(self, items):
+        for item in items:
+            self._put(item)
+
+    def get(self, timeout):
+        """
+        The next item, or queue.Empty after timeout seconds.
+        """
+        return self.queue.get(timeout=timeout)
+
+
+class AsyncSubscription(Subscription):
+    """
+    Subscription read by an event loop, as a streaming response under ASGI
+    does; items are handed to the loop rather than blocking a thread.
+    """
+
+    def __init__(self, loop, size):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=size)
+        self.overflowed = False
+
+    def deliver(self, items):
+        try:
+            for item in items:
+                self.loop.call_soon_threadsafe(self._put, item)
+        except RuntimeError:
+            pass  # the subscriber's loop has closed; it unsubscribes on its way out
+
+    async def get(self, timeout):
+        """
+        The next item, or asyncio.TimeoutError after timeout seconds.
+        """
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class EventHub:
+    """
+    In-process fan-out of published events to every subscriber, on top of a
+    pluggable backend (EVENT_BUS["BACKEND"]). With a shared backend one
+    poller thread per process reads new events and hands each to all of the
+    process's subscribers; it runs only while someone is subscribed.
+    """
+
+    def __init__(self):
+        self._backend = None
+        self._backend_key = None
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._poller = None
+
+    @property
+    def backend(self):
+        options = event_settings()
+        key = (options["BACKEND"], str(options["PATH"]), options["RETENTION"])
+        if self._backend is None or self._backend_key != key:
+            self._backend, self._backend_key = import_string(options["BACKEND"])(options), key
+        return self._backend
+
+    def publish(self, events):
+        """
+        Publish a list of JSON-serializable events.
+        """
+        if not events:
+            return
+        backend = self.backend
+        published = backend.publish(events)
+        if not backend.shared:
+            self._deliver(published)
+
+    def replay(self, last_id):
+        """
+        Events published after last_id that the backend still holds.
+        """
+        return self.backend.read_since(last_id)
+
+    def subscribe(self, loop=None):
+        """
+        Register a subscriber: an AsyncSubscription delivering to loop when
+        one is given, a thread-safe Subscription otherwise. Starting the
+        poller reads the backend, so async callers run this through
+        sync_to_async.
+        """
+        size = event_settings()["QUEUE_SIZE"]
+        subscription = Subscription(size) if loop is None else AsyncSubscription(loop, size)
+        backend = self.backend
+        with self._lock:
+            self._subscribers.add(subscription)
+            if backend.shared and self._poller is None:
+                self._poller = threading.Thread(
+                    target=self._poll, args=(backend, backend.latest_id()), name="event-hub-poller", daemon=True,
+                )
+                self._poller.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def _deliver(self, items):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            subscription.deliver(items)
+
+    def _poll(self, backend, last_id, batch_size=1000):
+        while True:
+            time.sleep(event_settings()["POLL_INTERVAL"])
+            with self._lock:
+                if not self._subscribers:
+                    self._poller = None
+                    return
+            try:
+                items = backend.read_since(last_id, batch_size)
+                while items:
+                    last_id = items[-1][0]
+                    self._deliver(items)
+                    items = backend.read_since(last_id, batch_size) if len(items) == batch_size else []
+            except sqlite3.Error:
+                continue  # the file is busy; try again on the next tick
+
+
+event_hub = EventHub()
@@ -0,0 +1,126 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import Argon2PasswordHasher, check_password, make_password
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+DEFAULTS = {
+    "MAX_WORKERS": 2,  # password checks running at the same time, per process
+    "QUEUE_TIMEOUT": 2.0,  # seconds a login waits for a free slot before getting a 503
+}
+
+ARGON2_DEFAULTS = {
+    "TIME_COST": 2,
+    "MEMORY_COST": 19456,  # KiB
+    "PARALLELISM": 1,
+}
+
+
+class HashingPoolBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Too many logins in progress, try again shortly."
+    default_code = "hashing_pool_busy"
+
+
+class HashingPool:
+    """
+    A small thread pool that runs password hashing, with admission bounded by
+    a semaphore. At most MAX_WORKERS checks run at once per process; a login
+    that cannot get a slot within QUEUE_TIMEOUT seconds fails fast with
+    HashingPoolBusy instead of piling up behind the others, so a burst of
+    logins cannot take every CPU away from the rest of the requests.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._slots = None
+        self._max_workers = None
+
+    @property
+    def options(self):
+        return {**DEFAULTS, **getattr(settings, "HASHING_POOL", {})}
+
+    def _pool(self, options):
+        with self._lock:
+            if self._executor is None or self._max_workers != options["MAX_WORKERS"]:
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                self._max_workers = options["MAX_WORKERS"]
+                self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="hashing")
+                self._slots = threading.BoundedSemaphore(self._max_workers)
+            return self._executor, self._slots
+
+    def run(self, func, *args, **kwargs):
+        options = self.options
+        executor, slots = self._pool(options)
+        if not slots.acquire(timeout=options["QUEUE_TIMEOUT"]):
+            raise HashingPoolBusy()
+        try:
+            return executor.submit(func, *args, **kwargs).result()
+        finally:
+            slots.release()
+
+
+hashing_pool = HashingPool()
+
+
+class PooledModelBackend(ModelBackend):
+    """
+    ModelBackend that runs the password check in the hashing pool. Only the
+    hash computation leaves the request thread, which waits for it; the user
+    lookup and the rehash-on-login write stay on it, so the pool threads never
+    touch the database.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # hash anyway so a missing user takes as long as a wrong password
+            hashing_pool.run(make_password, password)
+            return None
+
+        needs_rehash = []
+        if not hashing_pool.run(check_password, password, user.password, setter=needs_rehash.append):
+            return None
+        if needs_rehash:
+            # hasher or cost parameters changed since the hash was stored
+            user.set_password(password)
+            user.save(update_fields=["password"])
+        if self.user_can_authenticate(user):
+            return user
+        return None
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    Argon2id with the cost parameters from settings.ARGON2. Hashes made with
+    other parameters still verify and are upgraded on the next login.
+    """
+
+    @property
+    def options(self):
+        return {**ARGON2_DEFAULTS, **getattr(settings, "ARGON2", {})}
+
+    @property
+    def time_cost(self):
+        return self.options["TIME_COST"]
+
+    @property
+    def memory_cost(self):
+        return self.options["MEMORY_COST"]
+
+    @property
+    def parallelism(self):
+        return self.options["PARALLELISM"]
@@ -0,0 +1,117 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.db import connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework.throttling import SimpleRateThrottle
+
+from common.benchmark import BENCHMARK_PASSWORD, make_client, seed
+from users.models import User
+
+ARGON2_HASHER = "common.hashing.TunedArgon2PasswordHasher"
+PBKDF2_HASHER = "django.contrib.auth.hashers.PBKDF2PasswordHasher"
+
+# name: (password hasher, authentication backend)
+SCENARIOS = {
+    "pbkdf2": (PBKDF2_HASHER, "django.contrib.auth.backends.ModelBackend"),
+    "argon2": (ARGON2_HASHER, "django.contrib.auth.backends.ModelBackend"),
+    "argon2+pool": (ARGON2_HASHER, "common.hashing.PooledModelBackend"),
+}
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] * 1000 if values else 0.0
+
+
+def login_loop(usernames, deadline, results):
+    client = Client()
+    latencies, busy, failed = [], 0, 0
+    try:
+        n = 0
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            response = client.post(
+                "/api/v1/auth/login/",
+                data=json.dumps({"username": usernames[n % len(usernames)], "password": BENCHMARK_PASSWORD}),
+                content_type="application/json",
+            )
+            n += 1
+            if response.status_code == 200:
+                latencies.append(time.perf_counter() - started)
+            elif response.status_code == 503:
+                busy += 1
+            else:
+                failed += 1
+    finally:
+        connections.close_all()
+    results.append((latencies, busy, failed))
+
+
+def probe_loop(client, url, deadline, latencies):
+    # a cheap authenticated read, to see how much the logins slow everything else down
+    try:
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            client.get(url)
+            latencies.append(time.perf_counter() - started)
+            time.sleep(0.01)
+    finally:
+        connections.close_all()
+
+
+def run_scenario(name, objects, usernames, threads, duration):
+    hasher, backend = SCENARIOS[name]
+    with override_settings(PASSWORD_HASHERS=[hasher], AUTHENTICATION_BACKENDS=[backend]):
+        User.objects.filter(username__in=usernames).update(password=make_password(BENCHMARK_PASSWORD))
+        probe_client = make_client(objects["user"])
+        url = reverse("task-list") + "?page_size=1"
+
+        deadline = time.monotonic() + duration
+        login_results, probe_latencies = [], []
+        workers = [
+            threading.Thread(target=login_loop, args=(usernames[n::threads] or usernames, deadline, login_results))
+            for n in range(threads)
+        ]
+        workers.append(threading.Thread(target=probe_loop, args=(probe_client, url, deadline, probe_latencies)))
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    latencies = [latency for result in login_results for latency in result[0]]
+    return {
+        "logins_per_s": len(latencies) / duration,
+        "login_p50_ms": percentile(latencies, 0.5),
+        "login_p95_ms": percentile(latencies, 0.95),
+        "busy": sum(result[1] for result in login_results),
+        "failed": sum(result[2] for result in login_results),
+        "probe_p50_ms": percentile(probe_latencies, 0.5),
+        "probe_p95_ms": percentile(probe_latencies, 0.95),
+    }
+
+
+def run_login_benchmark(threads, duration, scenario_names=None):
+    """
+    Hammer the JWT login endpoint from threads client threads for duration
+    seconds per scenario while one more thread polls the task list, and
+    report login throughput and latency, 503s from the hashing pool and the
+    latency of the other requests.
+    """
+    objects = seed(users=max(threads * 2, 10), tasks=100)
+    usernames = list(User.objects.filter(role="user").values_list("username", flat=True))
+    results = {}
+    with tempfile.TemporaryDirectory() as directory, override_settings(
+        THROTTLE_STORE={**settings.THROTTLE_STORE, "PATH": os.path.join(directory, "throttle.sqlite3")},
+    ), mock.patch.dict(SimpleRateThrottle.THROTTLE_RATES, {"anon": None, "user": None}):
+        for name in scenario_names or SCENARIOS:
+            results[name] = run_scenario(name, objects, usernames, threads, duration)
+    return results
@@ -0,0 +1,76 @@
+import json
+import logging
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+DEFAULT_BUDGET_FILE = Path(settings.BASE_DIR) / "benchmarks" / "query_budgets.json"
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database and time every task, dashboard and auth route. "
+        "Fails when a route runs more queries than its recorded budget."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=200, help="Number of users to seed.")
+        parser.add_argument("--tasks", type=int, default=5000, help="Number of tasks to seed.")
+        parser.add_argument("--iterations", type=int, default=20, help="Timed requests per route.")
+        parser.add_argument("--route", action="append", dest="routes", help="Only run this route (repeatable).")
+        parser.add_argument("--budget-file", default=str(DEFAULT_BUDGET_FILE), help="Query budget JSON file.")
+        parser.add_argument("--record", action="store_true", help="Write the measured query counts as the new budgets.")
+        parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+
+    def handle(self, *args, **options):
+        # imported here so the test environment is set up before any client is created
+        from common.benchmark import run_benchmark
+
+        logging.getLogger("common.timing").setLevel(logging.WARNING)  # one log line per request is just noise here
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        try:
+            results = run_benchmark(options["users"], options["tasks"], options["iterations"], options["routes"])
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+        budget_file = Path(options["budget_file"])
+        budgets = json.loads(budget_file.read_text()) if budget_file.exists() else {}
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+        else:
+            self.print_table(results, budgets)
+
+        if options["record"]:
+            budgets.update({name: result["queries"] for name, result in results.items()})
+            budget_file.parent.mkdir(parents=True, exist_ok=True)
+            budget_file.write_text(json.dumps(dict(sorted(budgets.items())), indent=2) + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Recorded query budgets in {budget_file}"))
+            return
+
+        over_budget = [
+            f"{name} ({result['queries']} > {budgets[name]})"
+            for name, result in results.items()
+            if name in budgets and result["queries"] > budgets[name]
+        ]
+        if over_budget:
+            raise CommandError("Query budget exceeded: " + ", ".join(over_budget))
+
+    def print_table(self, results, budgets):
+        header = f"{'route':<24} {'status':>6} {'p50 ms':>9} {'p95 ms':>9} {'queries':>8} {'budget':>7} {'peak KiB':>9}"
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+        for name, result in results.items():
+            line = (
+                f"{name:<24} {result['status']:>6} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} "
+                f"{result['queries']:>8} {budgets.get(name, '-'):>7} {result['peak_kib']:>9.1f}"
+            )
+            if name in budgets and result["queries"] > budgets[name]:
+                line = self.style.ERROR(line)
+            self.stdout.write(line)
@@ -0,0 +1,51 @@
+import json
+import logging
+
+from django.core.management.base import BaseCommand
+from django.test.runner import DiscoverRunner
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure login throughput on a throwaway test database with PBKDF2, with Argon2 and with "
+        "Argon2 checked in the bounded hashing pool, plus the latency other requests see meanwhile."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8, help="Concurrent login clients.")
+        parser.add_argument("--duration", type=float, default=5.0, help="Seconds per scenario.")
+        parser.add_argument("--scenario", action="append", dest="scenarios", help="Only run this scenario (repeatable).")
+        parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+
+    def handle(self, *args, **options):
+        # imported here so the test environment is set up before any client is created
+        from common.login_benchmark import run_login_benchmark
+
+        logging.getLogger("common.timing").setLevel(logging.WARNING)
+        logging.getLogger("django.request").setLevel(logging.ERROR)  # 503s from a full pool are expected
+        setup_test_environment()
+        runner = DiscoverRunner(verbosity=0, interactive=False)
+        old_config = runner.setup_databases()
+        try:
+            results = run_login_benchmark(options["threads"], options["duration"], options["scenarios"])
+        finally:
+            runner.teardown_databases(old_config)
+            teardown_test_environment()
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        header = (
+            f"{'scenario':<12} {'logins/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'503s':>6} {'failed':>7} "
+            f"{'other p50':>10} {'other p95':>10}"
+        )
+        self.stdout.write(f"{options['threads']} login threads, {options['duration']:g}s per scenario")
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<12} {result['logins_per_s']:>9.1f} {result['login_p50_ms']:>8.1f} {result['login_p95_ms']:>8.1f} "
+                f"{result['busy']:>6} {result['failed']:>7} {result['probe_p50_ms']:>10.1f} {result['probe_p95_ms']:>10.1f}"
+            )
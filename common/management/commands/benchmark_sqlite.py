@@ -0,0 +1,53 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from common.sqlite_benchmark import PROFILES, run_profile
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare SQLite write throughput and 'database is locked' errors between the stock "
+        "settings and the production profile in DATABASES, using several worker processes "
+        "against a throwaway database file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=8, help="Concurrent worker processes.")
+        parser.add_argument("--duration", type=float, default=5.0, help="Seconds each profile runs.")
+        parser.add_argument("--write-ratio", type=float, default=0.5, help="Share of requests that write (0-1).")
+        parser.add_argument("--rows", type=int, default=5000, help="Rows in the benchmark table.")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed, for reproducible request mixes.")
+        parser.add_argument(
+            "--profile", action="append", dest="profiles", choices=sorted(PROFILES),
+            help="Only run this profile (repeatable). Defaults to all of them.",
+        )
+        parser.add_argument("--json", action="store_true", help="Print the results as JSON.")
+
+    def handle(self, *args, **options):
+        if not 0 <= options["write_ratio"] <= 1:
+            raise CommandError("--write-ratio must be between 0 and 1.")
+
+        results = {}
+        for profile in options["profiles"] or ["stock", "production"]:
+            results[profile] = run_profile(
+                profile, options["workers"], options["duration"], options["write_ratio"], options["rows"], options["seed"],
+            )
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+
+        header = f"{'profile':<12} {'req/s':>9} {'writes/s':>9} {'lock errors':>12} {'error rate':>11} {'p50 ms':>8} {'p95 ms':>8}"
+        self.stdout.write(
+            f"{options['workers']} workers, {options['duration']:g}s per profile, "
+            f"{options['write_ratio']:.0%} writes, {options['rows']} rows"
+        )
+        self.stdout.write(header)
+        self.stdout.write("-" * len(header))
+        for profile, result in results.items():
+            self.stdout.write(
+                f"{profile:<12} {result['requests_per_s']:>9.1f} {result['writes_per_s']:>9.1f} "
+                f"{result['lock_errors']:>12} {result['lock_error_rate']:>11.2%} "
+                f"{result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f}"
+            )
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from common.openapi import generate_schema, read_schema, schema_dir, schema_fingerprint, write_schema
+
+
+class Command(BaseCommand):
+    help = "Generate the OpenAPI schema served at /openapi.json and /redoc/ and store it under OPENAPI_SCHEMA_DIR."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check", action="store_true",
+            help="Only check that the stored schema matches the current URLs and views; exit with an error if not.",
+        )
+
+    def handle(self, *args, **options):
+        fingerprint = schema_fingerprint()
+        if options["check"]:
+            if read_schema(fingerprint) is None:
+                raise CommandError("The stored OpenAPI schema is missing or out of date, run generate_openapi_schema.")
+            self.stdout.write(self.style.SUCCESS("The stored OpenAPI schema is up to date."))
+            return
+
+        version = write_schema(generate_schema(), fingerprint)
+        self.stdout.write(self.style.SUCCESS(f"Wrote OpenAPI schema version {version} to {schema_dir()}"))
@@ -0,0 +1,36 @@
+import sqlite3
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = (
+        "Copy the primary SQLite database into the stand-in read replicas listed in "
+        "DATABASE_REPLICAS, using SQLite's online backup so the primary stays writable."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--replica", action="append", dest="replicas", help="Only refresh this replica alias (repeatable).")
+
+    def handle(self, *args, **options):
+        replicas = options["replicas"] or getattr(settings, "DATABASE_REPLICAS", [])
+        if not replicas:
+            raise CommandError("No replicas configured, set DATABASE_REPLICAS (or SQLITE_REPLICA_PATH).")
+
+        primary = connections[DEFAULT_DB_ALIAS].settings_dict
+        for alias in replicas:
+            replica = connections[alias].settings_dict
+            if primary["ENGINE"] != replica["ENGINE"] or replica["ENGINE"] != "django.db.backends.sqlite3":
+                raise CommandError(f"Replica {alias!r} is not a SQLite stand-in; use the database's own replication.")
+
+            connections[alias].close()
+            source = sqlite3.connect(primary["NAME"])
+            target = sqlite3.connect(replica["NAME"])
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+                source.close()
+            self.stdout.write(self.style.SUCCESS(f"Copied {primary['NAME']} to replica {alias!r} ({replica['NAME']})."))
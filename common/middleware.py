@@ -0,0 +1,137 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+
+from common import db_router
+from common.timing import (
+    current_metrics, end_request, instrument_caches, instrument_databases, server_timing, start_request,
+)
+
+logger = logging.getLogger("common.timing")
+
+
+class RequestTimingMiddleware:
+    """
+    Measure each request: total time, database time and query count, template
+    render time (templates of the common.timing.TimedDjangoTemplates backend)
+    and cache hits/misses. The numbers are sent back in a Server-Timing header
+    (when REQUEST_TIMING_HEADER is on) and logged on the common.timing logger
+    together with the resolved URL name.
+
+    Supports both sync and async handling so async views under ASGI are not
+    pushed back onto a worker thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        token = start_request()
+        metrics = current_metrics()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                instrument_databases(stack)
+                instrument_caches(stack)
+                response = self.get_response(request)
+            total = time.perf_counter() - started
+        finally:
+            end_request(token)
+
+        return self.record(request, response, total, metrics)
+
+    async def __acall__(self, request):
+        token = start_request()
+        metrics = current_metrics()
+        started = time.perf_counter()
+        stack = ExitStack()
+        try:
+            # connections are per thread, so hook the ones of the thread the async ORM calls run on
+            await sync_to_async(instrument_databases)(stack)
+            instrument_caches(stack)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(stack.close)()
+            total = time.perf_counter() - started
+        finally:
+            end_request(token)
+
+        return self.record(request, response, total, metrics)
+
+    def record(self, request, response, total, metrics):
+        if getattr(settings, "REQUEST_TIMING_HEADER", True):
+            response["Server-Timing"] = server_timing(total, metrics)
+
+        match = getattr(request, "resolver_match", None)
+        url_name = match.url_name if match and match.url_name else "-"
+        logger.info(
+            "url_name=%s method=%s status=%s total_ms=%.1f db_ms=%.1f queries=%d template_ms=%.1f "
+            "cache_hits=%d cache_misses=%d",
+            url_name, request.method, response.status_code, total * 1000, metrics.db_time * 1000,
+            metrics.queries, metrics.template_time * 1000, metrics.cache_hits, metrics.cache_misses,
+            extra={
+                "url_name": url_name,
+                "method": request.method,
+                "status_code": response.status_code,
+                "total_ms": round(total * 1000, 1),
+                "db_ms": round(metrics.db_time * 1000, 1),
+                "queries": metrics.queries,
+                "template_ms": round(metrics.template_time * 1000, 1),
+                "cache_hits": metrics.cache_hits,
+                "cache_misses": metrics.cache_misses,
+            },
+        )
+        return response
+
+
+class ReplicaPinningMiddleware:
+    """
+    Track, per request, whether reads may go to a read replica (see
+    common.db_router) and pin clients that wrote to the primary for a few
+    seconds so they read their own writes. Must come after SessionMiddleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        token = db_router.start_request()
+        try:
+            response = self.get_response(request)
+            wrote = db_router.current_state().wrote
+        finally:
+            db_router.end_request(token)
+        if wrote:
+            db_router.pin_to_primary(request, response)
+        return response
+
+    async def __acall__(self, request):
+        token = db_router.start_request()
+        try:
+            response = await self.get_response(request)
+            wrote = db_router.current_state().wrote
+        finally:
+            db_router.end_request(token)
+        if wrote:
+            db_router.pin_to_primary(request, response)
+        return response
@@ -0,0 +1,199 @@
+import hashlib
+import inspect
+import json
+import os
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.shortcuts import render
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_safe
+from drf_yasg import openapi
+from drf_yasg.codecs import OpenAPICodecJson
+from drf_yasg.generators import OpenAPISchemaGenerator
+from drf_yasg.renderers import ReDocRenderer
+
+API_VERSION = "v1"
+API_INFO = openapi.Info(
+    title="Task management API",
+    default_version=API_VERSION,
+    description="An Task Management API for Management",
+    contact=openapi.Contact(email="api.imperfect@gmail.com"),
+    license=openapi.License(name="MIT License"),
+)
+
+SCHEMA_MAX_AGE = 300
+SCHEMA_IMMUTABLE_MAX_AGE = 60 * 60 * 24 * 365
+
+_lock = threading.Lock()
+_loaded = None
+
+
+def schema_dir():
+    return Path(getattr(settings, "OPENAPI_SCHEMA_DIR", Path(settings.BASE_DIR) / "openapi"))
+
+
+def project_modules(modules):
+    """
+    modules and every project module they reach through their globals (the
+    serializers, pagination and filter classes a view uses), skipping
+    installed packages.
+    """
+    base_dir = Path(settings.BASE_DIR).resolve()
+    found, pending = {}, list(modules)
+    while pending:
+        module = pending.pop()
+        path = getattr(module, "__file__", None)
+        if module is None or path is None or module.__name__ in found:
+            continue
+        path = Path(path).resolve()
+        if base_dir not in path.parents or "site-packages" in path.parts:
+            continue
+        found[module.__name__] = path
+        for value in vars(module).values():
+            pending.append(value if inspect.ismodule(value) else inspect.getmodule(value))
+    return found
+
+
+def schema_fingerprint():
+    """
+    Hash of every URL pattern and the view it points to, plus the source of
+    the project modules those views are built from, used to tell when the
+    stored schema no longer matches the code it would be generated from.
+    """
+    entries, modules = [], []
+
+    def walk(patterns, prefix):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                walk(pattern.url_patterns, prefix + str(pattern.pattern))
+            elif isinstance(pattern, URLPattern):
+                callback = pattern.callback
+                view = getattr(callback, "view_class", None) or getattr(callback, "cls", None) or callback
+                entries.append(f"{prefix}{pattern.pattern} {view.__module__}.{view.__qualname__}")
+                modules.append(sys.modules.get(view.__module__))
+
+    walk(get_resolver().url_patterns, "")
+    digest = hashlib.sha256("\n".join(sorted(entries)).encode())
+    for name, path in sorted(project_modules(modules).items()):
+        digest.update(name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def generate_schema():
+    """
+    Introspect every API view and return the OpenAPI document as JSON bytes.
+    """
+    generator = OpenAPISchemaGenerator(info=API_INFO)
+    schema = generator.get_schema(request=None, public=True)
+    return OpenAPICodecJson(validators=[]).encode(schema)
+
+
+def replace_file(path, content):
+    """
+    Write content to path through a temporary file in the same directory and
+    os.replace, so readers see the old file or the new one, never a torn one.
+    """
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(content)
+        os.chmod(tmp, 0o644)  # mkstemp creates it private to the owner
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def write_schema(content, fingerprint):
+    """
+    Store the schema with its version (content hash) and the fingerprint of
+    the code it was generated from. The metadata is written last, so a crash
+    in between leaves it describing the old schema, which then reads as
+    stale. Returns the version.
+    """
+    version = hashlib.sha256(content).hexdigest()[:16]
+    directory = schema_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    replace_file(directory / "schema.json", content)
+    meta = {"version": version, "fingerprint": fingerprint}
+    replace_file(directory / "schema.meta.json", json.dumps(meta, indent=2).encode())
+    return version
+
+
+def read_schema(fingerprint):
+    directory = schema_dir()
+    try:
+        meta = json.loads((directory / "schema.meta.json").read_text())
+        if meta.get("fingerprint") != fingerprint:
+            return None
+        content = (directory / "schema.json").read_bytes()
+        # a schema.json replaced after this metadata was written does not belong to it
+        if hashlib.sha256(content).hexdigest()[:16] != meta["version"]:
+            return None
+        return content, meta["version"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def get_schema():
+    """
+    Return (content, version) of the current schema. The stored artifact is
+    loaded once per process; when it is missing or was generated from other
+    URLs or view code, the schema is generated in memory for this process.
+    Only the generate_openapi_schema command writes the artifact.
+    """
+    global _loaded
+    if _loaded is None:
+        with _lock:
+            if _loaded is None:
+                stored = read_schema(schema_fingerprint())
+                if stored is None:
+                    content = generate_schema()
+                    stored = content, hashlib.sha256(content).hexdigest()[:16]
+                _loaded = stored
+    return _loaded
+
+
+def reset_schema():
+    global _loaded
+    _loaded = None
+
+
+@require_safe
+def openapi_schema_view(request):
+    content, version = get_schema()
+    etag = f'"{version}"'
+    if etag in request.headers.get("If-None-Match", ""):
+        response = HttpResponse(status=304)
+    else:
+        response = HttpResponse(content, content_type="application/json")
+    response["ETag"] = etag
+    if request.GET.get("v") == version:
+        patch_cache_control(response, public=True, max_age=SCHEMA_IMMUTABLE_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=SCHEMA_MAX_AGE)
+    return response
+
+
+@require_safe
+def redoc_view(request):
+    if request.GET.get("format") == "openapi":
+        return openapi_schema_view(request)
+
+    content, version = get_schema()
+    redoc_settings = ReDocRenderer().get_redoc_settings()
+    redoc_settings["url"] = f"{reverse('openapi-schema')}?v={version}"
+    response = render(request, "drf-yasg/redoc.html", {
+        "title": API_INFO.title,
+        "version": API_VERSION,
+        "redoc_settings": json.dumps(redoc_settings),
+    })
+    patch_cache_control(response, public=True, max_age=SCHEMA_MAX_AGE)
+    return response
@@ -0,0 +1,21 @@
+from rest_framework.permissions import BasePermission
+
+
+class IsAdminRole(BasePermission):
+    """
+    Allows access only to users with the admin or superadmin role.
+    """
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(user and user.is_authenticated and user.role in ['admin', 'superadmin'])
+
+
+class IsSuperAdminRole(BasePermission):
+    """
+    Allows access only to users with the superadmin role.
+    """
+
+    def has_permission(self, request, view):
+        user = request.user
+        return bool(user and user.is_authenticated and user.role == 'superadmin')
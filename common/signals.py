@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from common.user_cache import user_cache
+
+
+# drop cached users on save (block/unblock, role or password change) and delete
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user(sender, instance, **kwargs):
+    user_cache.invalidate(instance.id)
+    # again once committed, in case a request cached the old row before the write was visible
+    transaction.on_commit(lambda: user_cache.invalidate(instance.id))
@@ -0,0 +1,148 @@
+import multiprocessing
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+import django
+from django.apps import apps
+from django.conf import settings
+from django.db import OperationalError, connections, transaction
+
+BENCH_ALIAS = "sqlite_benchmark"
+
+SCHEMA = [
+    "CREATE TABLE bench_task (id INTEGER PRIMARY KEY, title TEXT NOT NULL, status TEXT NOT NULL, updated_at REAL NOT NULL)",
+    "CREATE TABLE bench_counter (status TEXT PRIMARY KEY, count INTEGER NOT NULL)",
+]
+STATUSES = ["pending", "in_progress", "completed"]
+
+
+def stock_profile(name):
+    """
+    The settings the project shipped with: no pragmas, deferred transactions
+    and a new connection for every request.
+    """
+    return {"ENGINE": "django.db.backends.sqlite3", "NAME": name}
+
+
+def production_profile(name):
+    """
+    settings.DATABASE_PROFILES["production"], whichever profile the site
+    itself runs with.
+    """
+    return {**stock_profile(name), **settings.DATABASE_PROFILES["production"]}
+
+
+PROFILES = {
+    "stock": stock_profile,
+    "production": production_profile,
+}
+
+
+def create_database(path, rows):
+    with sqlite3.connect(path) as db:
+        for statement in SCHEMA:
+            db.execute(statement)
+        db.executemany(
+            "INSERT INTO bench_task (id, title, status, updated_at) VALUES (?, ?, ?, ?)",
+            [(i, f"Task {i}", STATUSES[i % len(STATUSES)], time.time()) for i in range(1, rows + 1)],
+        )
+        db.executemany(
+            "INSERT INTO bench_counter (status, count) VALUES (?, ?)",
+            [(status, sum(1 for i in range(1, rows + 1) if STATUSES[i % len(STATUSES)] == status)) for status in STATUSES],
+        )
+    db.close()
+
+
+def is_lock_error(error):
+    message = str(error).lower()
+    return "locked" in message or "busy" in message
+
+
+def read_request(cursor, rng, rows):
+    offset = rng.randrange(max(rows - 20, 1))
+    cursor.execute("SELECT id, title, status FROM bench_task ORDER BY id LIMIT 20 OFFSET %s", [offset])
+    cursor.fetchall()
+    cursor.execute("SELECT status, count FROM bench_counter")
+    cursor.fetchall()
+
+
+def write_request(cursor, rng, rows):
+    # read-then-write like a status update: load the task, change it and move the counters
+    task_id = rng.randint(1, rows)
+    cursor.execute("SELECT status FROM bench_task WHERE id = %s", [task_id])
+    old_status = cursor.fetchone()[0]
+    new_status = rng.choice(STATUSES)
+    cursor.execute("UPDATE bench_task SET status = %s, updated_at = %s WHERE id = %s", [new_status, time.time(), task_id])
+    cursor.execute("UPDATE bench_counter SET count = count - 1 WHERE status = %s", [old_status])
+    cursor.execute("UPDATE bench_counter SET count = count + 1 WHERE status = %s", [new_status])
+
+
+def run_worker(profile, path, duration, write_ratio, rows, seed, results):
+    """
+    Act like one gunicorn worker: handle requests back to back for duration
+    seconds, closing the connection after each one the way Django's
+    request_finished handler does, and put the counts on the results queue.
+    """
+    if not apps.ready:
+        django.setup()
+    database = PROFILES[profile](path)
+    connections.settings[BENCH_ALIAS] = connections.configure_settings({"default": database})["default"]
+
+    rng = random.Random(seed)
+    counts = {"reads": 0, "writes": 0, "lock_errors": 0, "other_errors": 0, "latencies": []}
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        is_write = rng.random() < write_ratio
+        started = time.perf_counter()
+        try:
+            with transaction.atomic(using=BENCH_ALIAS), connections[BENCH_ALIAS].cursor() as cursor:
+                (write_request if is_write else read_request)(cursor, rng, rows)
+            counts["writes" if is_write else "reads"] += 1
+            counts["latencies"].append(time.perf_counter() - started)
+        except OperationalError as e:
+            counts["lock_errors" if is_lock_error(e) else "other_errors"] += 1
+        finally:
+            connections[BENCH_ALIAS].close_if_unusable_or_obsolete()
+
+    connections[BENCH_ALIAS].close()
+    results.put(counts)
+
+
+def run_profile(profile, workers, duration, write_ratio, rows, seed=0):
+    """
+    Run workers processes against a fresh database file using profile and
+    return the combined throughput, lock error rate and write latency.
+    """
+    context = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "benchmark.sqlite3")
+        create_database(path, rows)
+
+        results = context.Queue()
+        processes = [
+            context.Process(target=run_worker, args=(profile, path, duration, write_ratio, rows, seed + n, results))
+            for n in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        counts = [results.get() for process in processes]
+        for process in processes:
+            process.join()
+
+    latencies = sorted(latency for count in counts for latency in count["latencies"])
+    reads = sum(count["reads"] for count in counts)
+    writes = sum(count["writes"] for count in counts)
+    lock_errors = sum(count["lock_errors"] for count in counts)
+    attempts = reads + writes + lock_errors + sum(count["other_errors"] for count in counts)
+    return {
+        "requests_per_s": (reads + writes) / duration,
+        "writes_per_s": writes / duration,
+        "lock_errors": lock_errors,
+        "lock_error_rate": lock_errors / attempts if attempts else 0.0,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000 if latencies else 0.0,
+    }
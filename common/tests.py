@@ -1,3 +1,343 @@
-from django.test import TestCase
+import copy
+import re
+import sys
+import tempfile
+import time
+from contextlib import ExitStack
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache, caches
+from django.template.base import Template as DjangoTemplate
+from django.template.loader import render_to_string
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import AccessToken
+
+from tasks.tests import TEST_THROTTLE_STORE, make_task, make_user
+from . import db_router, openapi, timing
+from .cookie_auth import CookieAuthentication
+from .hashing import hashing_pool
+from .openapi import get_schema, project_modules, read_schema, reset_schema, write_schema
+from .throttling import ThrottleStore, throttle_store
+from .user_cache import user_cache
+
+make_user_async = sync_to_async(make_user)
+
+
+class ThrottleStoreTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "throttle.sqlite3"
+        settings = override_settings(THROTTLE_STORE={"PATH": self.path})
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.store = ThrottleStore()
+
+    def test_allows_a_full_burst_then_refuses(self):
+        results = [self.store.acquire("key", 3, 60, now=1000.0) for _ in range(4)]
+        self.assertEqual([allowed for allowed, _ in results], [True, True, True, False])
+        # one request is restored every 20 seconds
+        self.assertAlmostEqual(results[-1][1], 20.0, places=2)
+
+    def test_allowance_is_restored_over_time(self):
+        for _ in range(3):
+            self.store.acquire("key", 3, 60, now=1000.0)
+        self.assertFalse(self.store.acquire("key", 3, 60, now=1019.0)[0])
+        self.assertTrue(self.store.acquire("key", 3, 60, now=1020.0)[0])
+
+    def test_keys_are_independent(self):
+        self.store.acquire("a", 1, 60, now=1000.0)
+        self.assertFalse(self.store.acquire("a", 1, 60, now=1000.0)[0])
+        self.assertTrue(self.store.acquire("b", 1, 60, now=1000.0)[0])
+
+    def test_unavailable_store_allows_the_request(self):
+        with override_settings(THROTTLE_STORE={"PATH": self.path / "missing" / "throttle.sqlite3"}):
+            with self.assertLogs("common.throttling", "WARNING"):
+                self.assertEqual(self.store.acquire("key", 1, 60), (True, 0.0))
+
+    def test_throttled_request_gets_retry_after(self):
+        user = make_user("throttled_user")
+        client = APIClient()
+        client.force_authenticate(user)
+        # spend the user's whole daily allowance of 500 requests
+        for _ in range(500):
+            throttle_store.acquire(f"throttle_user_{user.pk}", 500, 86400)
+        response = client.get(reverse("task-list"))
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response["Retry-After"]), 0)
+
+    async def test_async_views_apply_the_throttle(self):
+        user = await make_user_async("async_throttled_user")
+        for _ in range(500):
+            throttle_store.acquire(f"throttle_user_{user.pk}", 500, 86400)
+        headers = {"Authorization": f"Bearer {AccessToken.for_user(user)}"}
+        response = await AsyncClient().get(reverse("task-list-async"), headers=headers)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+
+
+class OpenAPISchemaFingerprintTests(TestCase):
+    def test_covers_the_serializers_behind_the_views(self):
+        modules = project_modules([sys.modules["tasks.views"]])
+        self.assertIn("tasks.serializers", modules)
+        self.assertIn("tasks.pagination", modules)
+        self.assertFalse(any(name.startswith("rest_framework") for name in modules))
+
+    def test_stored_schema_for_other_code_is_stale(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(OPENAPI_SCHEMA_DIR=Path(directory)):
+            version = write_schema(b"{}", "before")
+            self.assertEqual(read_schema("before"), (b"{}", version))
+            self.assertIsNone(read_schema("after"))
+
+    def test_write_leaves_no_temporary_files(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(OPENAPI_SCHEMA_DIR=Path(directory)):
+            write_schema(b"{}", "first")
+            write_schema(b'{"a": 1}', "second")
+            self.assertEqual(sorted(path.name for path in Path(directory).iterdir()), ["schema.json", "schema.meta.json"])
+
+    def test_schema_without_matching_metadata_is_stale(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(OPENAPI_SCHEMA_DIR=Path(directory)):
+            write_schema(b"{}", "fingerprint")
+            # as if a writer died after replacing schema.json but before the metadata
+            (Path(directory) / "schema.json").write_bytes(b'{"new": true}')
+            self.assertIsNone(read_schema("fingerprint"))
+
+    def test_request_path_does_not_write_the_artifact(self):
+        reset_schema()
+        self.addCleanup(reset_schema)
+        with tempfile.TemporaryDirectory() as directory, override_settings(OPENAPI_SCHEMA_DIR=Path(directory)), \
+                mock.patch.object(openapi, "generate_schema", return_value=b"{}"):
+            content, version = get_schema()
+            self.assertEqual(content, b"{}")
+            self.assertEqual(list(Path(directory).iterdir()), [])
+
+
+@override_settings(AUTH_USER_CACHE={"TTL": 30, "USE_SHARED_CACHE": True})
+class AuthUserCacheTests(TestCase):
+    def setUp(self):
+        user_cache.clear()
+        cache.clear()
+        self.addCleanup(user_cache.clear)
+        self.user = make_user("cached_user")
+        self.token = AccessToken.for_user(self.user)
+        self.authentication = CookieAuthentication()
+
+    def authenticate(self):
+        return self.authentication.get_user(self.token)
+
+    def test_repeat_lookups_come_from_the_cache(self):
+        self.authenticate()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate(), self.user)
+
+    def test_other_workers_reuse_the_shared_entry(self):
+        self.authenticate()
+        user_cache.clear()  # a worker with an empty local cache
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate(), self.user)
+
+    def assert_invalidated(self):
+        self.assertIsNone(user_cache.get(self.user.id))
+        self.assertIsNone(cache.get(user_cache._shared_key(self.user.id)))
+
+    def test_block_is_seen_at_once(self):
+        self.authenticate()
+        self.user.is_active = False
+        self.user.save(update_fields=["is_active"])
+        self.assert_invalidated()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_role_change_is_seen_at_once(self):
+        self.authenticate()
+        self.user.role = "admin"
+        self.user.save(update_fields=["role"])
+        self.assert_invalidated()
+        self.assertEqual(self.authenticate().role, "admin")
+
+    def test_delete_is_seen_at_once(self):
+        self.authenticate()
+        self.user.delete()
+        self.assert_invalidated()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_entries_expire_after_ttl(self):
+        now = time.monotonic()
+        with mock.patch("common.user_cache.time.monotonic", return_value=now):
+            self.authenticate()
+        cache.clear()
+        with mock.patch("common.user_cache.time.monotonic", return_value=now + 31):
+            self.assertIsNone(user_cache.get(self.user.id))
+
+    def test_cached_inactive_user_is_rejected(self):
+        inactive = copy.copy(self.user)
+        inactive.is_active = False
+        user_cache.set(self.user.id, inactive)
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    def test_entry_cached_before_commit_is_dropped_on_commit(self):
+        stale = copy.copy(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save(update_fields=["is_active"])
+            # another request read the row before the block was committed
+            user_cache.set(self.user.id, stale)
+        self.assert_invalidated()
+
+
+@override_settings(DATABASE_REPLICAS=["replica"], THROTTLE_STORE=TEST_THROTTLE_STORE)
+class ReplicaRoutingTests(TransactionTestCase):
+    # a TestCase would wrap every request in a transaction, which keeps all reads on the primary
+
+    def setUp(self):
+        cache.clear()
+        self.user = make_user("replica_user")
+        self.task = make_task(self.user)
+        self.client = self.jwt_client(self.user)
+        # stand in for the replica with the test database and record when the router picks it
+        patcher = mock.patch.object(db_router, "random")
+        self.random = patcher.start()
+        self.random.choice.return_value = "default"
+        self.addCleanup(patcher.stop)
+
+    def jwt_client(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+        return client
+
+    def read(self, client):
+        self.random.choice.reset_mock()
+        response = client.get(reverse("task-list"))
+        self.assertEqual(response.status_code, 200)
+        return self.random.choice.called
+
+    def write(self, client):
+        response = client.patch(reverse("task-update", args=[self.task.pk]), {"status": "in_progress"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_replica_reads_view_reads_from_replica(self):
+        self.assertTrue(self.read(self.client))
+        self.random.choice.assert_called_with(["replica"])
+
+    def test_write_pins_client_by_cookie_and_cache(self):
+        response = self.write(self.client)
+        self.assertEqual(response.cookies["replica_pin"]["max-age"], 5)
+        self.assertTrue(cache.get_many(db_router.pin_keys(response.wsgi_request)))
+
+        # the cookie alone keeps this client on the primary...
+        self.assertFalse(self.read(self.client))
+        # ...and so does the cache entry when the next request arrives without it
+        self.client.cookies.clear()
+        self.assertFalse(self.read(self.client))
+
+    def test_pin_expires(self):
+        self.write(self.client)
+        self.client.cookies.clear()
+        cache.delete_many(db_router.pin_keys(self.client.get(reverse("task-list")).wsgi_request))
+        self.assertTrue(self.read(self.client))
+
+    def test_write_state_does_not_leak_between_requests(self):
+        self.write(self.client)
+        self.assertIsNone(db_router.current_state())
+
+        other = self.jwt_client(make_user("replica_other"))
+        self.assertTrue(self.read(other))
+        response = other.get(reverse("task-list"))
+        self.assertNotIn("replica_pin", response.cookies)
+
+    def test_reads_after_a_write_in_the_same_request_use_the_primary(self):
+        router = db_router.ReplicaRouter()
+        token = db_router.start_request()
+        try:
+            db_router.current_state().use_replica = True
+            self.assertEqual(router.db_for_read(type(self.task)), "default")
+            self.random.choice.assert_called_once_with(["replica"])
+            router.db_for_write(type(self.task))
+            self.random.choice.reset_mock()
+            self.assertEqual(router.db_for_read(type(self.task)), "default")
+            self.random.choice.assert_not_called()
+        finally:
+            db_router.end_request(token)
+
+    def test_views_without_replica_reads_use_the_primary(self):
+        self.random.choice.reset_mock()
+        response = self.client.post(reverse("task-batch-update"), [{"id": self.task.pk, "status": "pending"}], format="json")
+        self.assertEqual(response.status_code, 200)
+        self.random.choice.assert_not_called()
+
+
+@override_settings(THROTTLE_STORE=TEST_THROTTLE_STORE, HASHING_POOL={"MAX_WORKERS": 1, "QUEUE_TIMEOUT": 0.05})
+class PooledLoginTests(TestCase):
+    def setUp(self):
+        self.user = make_user("pool_user", password=make_password("secret-pass", hasher="pbkdf2_sha256"))
+
+    def login(self, password="secret-pass"):
+        return APIClient().post("/api/v1/auth/login/", {"username": "pool_user", "password": password}, format="json")
+
+    def test_pbkdf2_hash_is_upgraded_to_argon2_on_login(self):
+        self.assertEqual(self.login("wrong").status_code, 401)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$"))
+
+        self.assertEqual(self.login().status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("argon2$argon2id$"))
+        self.assertTrue(self.user.check_password("secret-pass"))
+        self.assertEqual(self.login().status_code, 200)
+
+    def test_login_gets_503_when_no_slot_frees_up(self):
+        _, slots = hashing_pool._pool(hashing_pool.options)
+        self.assertTrue(slots.acquire(timeout=1))
+        try:
+            response = self.login()
+        finally:
+            slots.release()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()["detail"], "Too many logins in progress, try again shortly.")
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$"))
+        self.assertEqual(self.login().status_code, 200)
+
+
+class RequestTimingTests(TestCase):
+    def test_request_reports_template_and_cache_metrics(self):
+        self.client.force_login(make_user("timing_root", role="superadmin"))
+        response = self.client.get(reverse("admin_dashboard"))
+        header = response["Server-Timing"]
+        self.assertGreater(float(re.search(r"tpl;dur=([\d.]+)", header).group(1)), 0)
+        self.assertRegex(header, r'cache;desc="\d+ hits, [1-9]\d* misses"')
+
+    def test_nothing_stays_patched_outside_requests(self):
+        backend = type(caches["default"])
+        token = timing.start_request()
+        try:
+            with ExitStack() as stack:
+                timing.instrument_caches(stack)
+                cache.set("timing-key", 1)
+                self.assertEqual(cache.get("timing-key"), 1)
+                self.assertIsNone(cache.get("timing-missing"))
+                self.assertEqual(cache.get("timing-missing", "default"), "default")
+                render_to_string("adminside/users/import_users.html")
+            metrics = timing.current_metrics()
+        finally:
+            timing.end_request(token)
+
+        self.assertEqual((metrics.cache_hits, metrics.cache_misses), (1, 2))
+        self.assertGreater(metrics.template_time, 0)
+        self.assertNotIn("get", vars(caches["default"]))
+        self.assertFalse(hasattr(backend.get, "__wrapped__"))
+        self.assertFalse(hasattr(DjangoTemplate.render, "__wrapped__"))
+
+        # outside a request nothing is counted
+        self.assertEqual(cache.get("timing-key"), 1)
+        render_to_string("adminside/users/import_users.html")
+        self.assertEqual((metrics.cache_hits, metrics.cache_misses), (1, 2))
@@ -0,0 +1,133 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from rest_framework.throttling import AnonRateThrottle, ScopedRateThrottle, UserRateThrottle
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "PATH": None,  # defaults to BASE_DIR / "throttle.sqlite3"
+    "BUSY_TIMEOUT": 1.0,
+    "PRUNE_INTERVAL": 300,
+}
+
+# GCRA in one statement: advance the key's theoretical arrival time (tat) by one
+# emission interval unless that would take it more than a period ahead of now.
+# No row comes back when the request is over the limit. The 1 ms slack absorbs
+# float rounding so the last request of a full burst is not refused.
+ACQUIRE_SQL = """
+INSERT INTO throttle (key, tat) VALUES (:key, :now + :interval)
+ON CONFLICT (key) DO UPDATE SET tat = max(tat, :now) + :interval
+WHERE max(tat, :now) + :interval - :now <= :period + 0.001
+RETURNING tat
+"""
+
+
+class ThrottleStore:
+    """
+    Generic cell rate algorithm (GCRA) state shared by every worker process on
+    the host, kept in a small SQLite file. Each key is a single row holding one
+    timestamp, and a check is one primary key upsert, so the cost does not
+    grow with the rate like DRF's cached timestamp history does.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._pruned_at = 0.0
+
+    @property
+    def options(self):
+        options = {**DEFAULTS, **getattr(settings, "THROTTLE_STORE", {})}
+        if options["PATH"] is None:
+            options["PATH"] = settings.BASE_DIR / "throttle.sqlite3"
+        return options
+
+    def connection(self):
+        # one connection per thread, reopened after a fork or when the configured path changes
+        options = self.options
+        path = str(options["PATH"])
+        db = getattr(self._local, "db", None)
+        if db is None or self._local.path != path or self._local.pid != os.getpid():
+            db = sqlite3.connect(path, timeout=options["BUSY_TIMEOUT"], isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=OFF")  # losing the last counts on a crash is fine
+            db.execute("CREATE TABLE IF NOT EXISTS throttle (key TEXT PRIMARY KEY, tat REAL NOT NULL) WITHOUT ROWID")
+            self._local.db, self._local.path, self._local.pid = db, path, os.getpid()
+        return db
+
+    def acquire(self, key, num_requests, duration, now=None):
+        """
+        Take one request from key's allowance of num_requests per duration
+        seconds. Returns (allowed, wait), where wait is the number of seconds
+        until the next request would be allowed (0 when allowed).
+
+        When the file stays locked past BUSY_TIMEOUT, or cannot be opened,
+        the request is allowed: an unavailable throttle should not turn into
+        an outage.
+        """
+        now = time.time() if now is None else now
+        interval = duration / num_requests
+        try:
+            db = self.connection()
+            row = db.execute(ACQUIRE_SQL, {"key": key, "now": now, "interval": interval, "period": duration}).fetchone()
+            self.prune(db, now)
+            if row is not None:
+                return True, 0.0
+
+            row = db.execute("SELECT tat FROM throttle WHERE key = ?", [key]).fetchone()
+        except sqlite3.OperationalError as e:
+            logger.warning("Throttle store unavailable, allowing request for %s: %s", key, e)
+            return True, 0.0
+        return False, max(row[0] + interval - duration - now, 0.0) if row else 0.0
+
+    def prune(self, db, now):
+        # drop keys whose allowance is fully restored, at most once per PRUNE_INTERVAL per process
+        if now - self._pruned_at < self.options["PRUNE_INTERVAL"]:
+            return
+        self._pruned_at = now
+        db.execute("DELETE FROM throttle WHERE tat < ?", [now])
+
+    def clear(self):
+        self.connection().execute("DELETE FROM throttle")
+
+
+throttle_store = ThrottleStore()
+
+
+class SharedRateThrottleMixin:
+    """
+    Replace the cache-based sliding window of DRF's SimpleRateThrottle with
+    the shared GCRA store. Rates, scopes and cache keys work as in DRF.
+    """
+
+    store = throttle_store
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        allowed, self._wait = self.store.acquire(self.key, self.num_requests, self.duration, self.timer())
+        return allowed
+
+    def wait(self):
+        return self._wait or None
+
+
+class SharedAnonRateThrottle(SharedRateThrottleMixin, AnonRateThrottle):
+    pass
+
+
+class SharedUserRateThrottle(SharedRateThrottleMixin, UserRateThrottle):
+    pass
+
+
+class SharedScopedRateThrottle(SharedRateThrottleMixin, ScopedRateThrottle):
+    pass
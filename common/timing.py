@@ -0,0 +1,123 @@
+import contextvars
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template
+
+_metrics = contextvars.ContextVar("request_metrics", default=None)
+_template_depth = contextvars.ContextVar("template_depth", default=0)
+_MISSING = object()
+
+
+class RequestMetrics:
+    """
+    Counters collected while a single request is handled.
+    """
+
+    def __init__(self):
+        self.db_time = 0.0
+        self.queries = 0
+        self.template_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+
+def current_metrics():
+    return _metrics.get()
+
+
+def start_request():
+    return _metrics.set(RequestMetrics())
+
+
+def end_request(token):
+    _metrics.reset(token)
+
+
+def db_timer(execute, sql, params, many, context):
+    metrics = _metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_time += time.perf_counter() - started
+        metrics.queries += 1
+
+
+def instrument_databases(stack):
+    """
+    Time every query run on any configured database until stack is closed.
+    """
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(db_timer))
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        metrics = _metrics.get()
+        depth = _template_depth.get()
+        if metrics is None or depth:
+            # templates rendered from inside another one are already covered by the outermost render
+            return super().render(context, request)
+        token = _template_depth.set(depth + 1)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_time += time.perf_counter() - started
+            _template_depth.reset(token)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    The Django template backend, with templates that report their render time
+    into the metrics of the current request.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
+
+
+def _counted_get(get):
+    def wrapper(key, default=None, version=None):
+        value = get(key, _MISSING, version=version)
+        metrics = _metrics.get()
+        if metrics is not None:
+            if value is _MISSING:
+                metrics.cache_misses += 1
+            else:
+                metrics.cache_hits += 1
+        return default if value is _MISSING else value
+
+    return wrapper
+
+
+def instrument_caches(stack):
+    """
+    Count the hits and misses of get() on every configured cache until stack
+    is closed. Cache objects belong to one thread (or async context), so only
+    the instances this request uses are wrapped, never the backend classes.
+    """
+    for alias in settings.CACHES:
+        cache = caches[alias]
+        if "get" in vars(cache):
+            continue
+        cache.get = _counted_get(cache.get)
+        stack.callback(vars(cache).pop, "get", None)
+
+
+def server_timing(total, metrics):
+    return ", ".join([
+        f"total;dur={total * 1000:.1f}",
+        f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries"',
+        f"tpl;dur={metrics.template_time * 1000:.1f}",
+        f'cache;desc="{metrics.cache_hits} hits, {metrics.cache_misses} misses"',
+    ])
+
@@ -0,0 +1,84 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+DEFAULTS = {
+    "MAX_SIZE": 1024,
+    "TTL": 30,
+    "USE_SHARED_CACHE": False,
+    "KEY_PREFIX": "auth_user",
+}
+
+
+class AuthUserCache:
+    """
+    LRU + TTL cache of users resolved by CookieAuthentication, keyed by the
+    user id claim of the token.
+
+    Entries live in process memory and, when USE_SHARED_CACHE is enabled,
+    also in the Django cache so other workers can reuse them. Invalidation
+    removes the local entry and the shared one; local entries in other
+    worker processes expire after TTL seconds.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def options(self):
+        return {**DEFAULTS, **getattr(settings, "AUTH_USER_CACHE", {})}
+
+    def _shared_key(self, user_id):
+        return f"{self.options['KEY_PREFIX']}:{user_id}"
+
+    def get(self, user_id):
+        user_id = str(user_id)
+        options = self.options
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                user, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(user_id)
+                    return copy.copy(user)
+                del self._entries[user_id]
+
+        if options["USE_SHARED_CACHE"]:
+            user = cache.get(self._shared_key(user_id))
+            if user is not None:
+                self._store(user_id, user, options)
+                return copy.copy(user)
+        return None
+
+    def set(self, user_id, user):
+        user_id = str(user_id)
+        options = self.options
+        self._store(user_id, user, options)
+        if options["USE_SHARED_CACHE"]:
+            cache.set(self._shared_key(user_id), user, options["TTL"])
+
+    def _store(self, user_id, user, options):
+        with self._lock:
+            self._entries[user_id] = (user, time.monotonic() + options["TTL"])
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > options["MAX_SIZE"]:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        user_id = str(user_id)
+        with self._lock:
+            self._entries.pop(user_id, None)
+        if self.options["USE_SHARED_CACHE"]:
+            cache.delete(self._shared_key(user_id))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = AuthUserCache()
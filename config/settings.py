@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from datetime import timedelta
 from pathlib import Path
 
@@ -50,14 +51,17 @@ LOCAL_APPS = [
     "tasks",
     "dashboard",          
     "common",
+    "jobs",
 ]
 
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 
 MIDDLEWARE = [
+    'common.middleware.RequestTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'common.middleware.ReplicaPinningMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -65,11 +69,14 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Server-Timing header with total/db/template/cache timings, see common.middleware
+REQUEST_TIMING_HEADER = True
+
 ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'common.timing.TimedDjangoTemplates',  # DjangoTemplates that reports render time, see common.timing
         'DIRS': ["templates"],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -88,13 +95,76 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Production SQLite profile: WAL lets readers run alongside the single writer,
+# IMMEDIATE transactions take the write lock up front (so they wait on the busy
+# timeout instead of failing with "database is locked" when a read turns into a
+# write) and connections are reused across requests. Select it with
+# DATABASE_PROFILE=production; by default the stock settings are used. Under
+# ASGI set DATABASE_CONN_MAX_AGE=0, async views do not reuse connections.
+# Compare the profiles with `python manage.py benchmark_sqlite`.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,  # ms
+    'mmap_size': 128 * 1024 * 1024,
+    'cache_size': -20000,  # KiB
+    'temp_store': 'MEMORY',
+}
+
+DATABASE_PROFILES = {
+    'stock': {},
+    'production': {
+        'CONN_MAX_AGE': int(os.environ.get('DATABASE_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'init_command': '; '.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+            'transaction_mode': 'IMMEDIATE',
+        },
+    },
+}
+DATABASE_PROFILE = os.environ.get('DATABASE_PROFILE', 'stock')
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        **DATABASE_PROFILES[DATABASE_PROFILE],
     }
 }
 
+# Read replicas for the list, report and dashboard views (see common.db_router).
+# To try it locally, point SQLITE_REPLICA_PATH at a copy of db.sqlite3 and keep
+# it fresh with `python manage.py sync_sqlite_replica`.
+DATABASE_ROUTERS = ['common.db_router.ReplicaRouter']
+DATABASE_REPLICAS = []
+if os.environ.get('SQLITE_REPLICA_PATH'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ['SQLITE_REPLICA_PATH'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append('replica')
+
+DATABASE_REPLICA = {
+    'PIN_SECONDS': 5,  # reads stay on the primary this long after a client writes
+}
+
+
+# Logging
+# https://docs.djangoproject.com/en/5.2/topics/logging/
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "common.timing": {"handlers": ["console"], "level": "INFO", "propagate": False},
+        "jobs": {"handlers": ["console"], "level": "INFO", "propagate": False},
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -114,6 +184,30 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Argon2id first; existing PBKDF2 hashes still verify and are rehashed on the next login.
+PASSWORD_HASHERS = [
+    'common.hashing.TunedArgon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# Argon2 cost parameters (OWASP minimum: 19 MiB, 2 passes, 1 lane). Raising them
+# makes every login slower; compare with `python manage.py benchmark_logins`.
+ARGON2 = {
+    'TIME_COST': 2,
+    'MEMORY_COST': 19456,  # KiB
+    'PARALLELISM': 1,
+}
+
+# Password checks run in a bounded pool, see common.hashing
+AUTHENTICATION_BACKENDS = ['common.hashing.PooledModelBackend']
+HASHING_POOL = {
+    'MAX_WORKERS': 2,  # concurrent password checks per process
+    'QUEUE_TIMEOUT': 2.0,  # seconds a login waits for a slot before a 503
+}
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
@@ -136,6 +230,22 @@ STATICFILES_DIRS = [
     BASE_DIR / "static",
 ]
 
+# files written by background jobs (task exports), downloaded through the jobs API only
+MEDIA_ROOT = BASE_DIR / "media"
+
+# Background jobs run by `python manage.py run_jobs`, see jobs.worker
+JOBS = {
+    "POLL_INTERVAL": 1.0,
+    "BACKOFF_BASE": 5,
+    "BACKOFF_MAX": 3600,
+    "LOCK_TIMEOUT": 600,
+    "KEEP_SUCCEEDED_DAYS": 7,
+}
+
+# assignment notifications are printed to the console in development
+EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
+DEFAULT_FROM_EMAIL = "noreply@taskmanagement.local"
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -150,6 +260,14 @@ COOKIE_PATH = "/"
 COOKIE_HTTPONLY = True
 COOKIE_SECURE = False #dev purpose
 
+# users resolved by CookieAuthentication are cached per process for TTL seconds,
+# and in the default cache as well when USE_SHARED_CACHE is set
+AUTH_USER_CACHE = {
+    "MAX_SIZE": 1024,
+    "TTL": 30,
+    "USE_SHARED_CACHE": False,
+}
+
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
@@ -164,8 +282,8 @@ REST_FRAMEWORK = {
     
     "PAGE_SIZE": 10,
     "DEFAULT_THROTTLE_CLASSES": (
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
+        "common.throttling.SharedAnonRateThrottle",
+        "common.throttling.SharedUserRateThrottle",
     ),
     
     "DEFAULT_THROTTLE_RATES": {
@@ -174,6 +292,18 @@ REST_FRAMEWORK = {
     },
 }
 
+# GCRA throttle state shared by all workers on the host, see common.throttling
+THROTTLE_STORE = {
+    "PATH": BASE_DIR / "throttle.sqlite3",
+    "BUSY_TIMEOUT": 1.0,
+}
+
+# pub/sub behind the task event stream, see common.events; events reach every worker through a shared SQLite file
+EVENT_BUS = {
+    "BACKEND": "common.events.SQLiteEventBackend",
+    "PATH": BASE_DIR / "events.sqlite3",
+}
+
 SIMPLE_JWT = {
     "SIGNING_KEY": SECRET_KEY, #dev purpose only
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=30),
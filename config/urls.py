@@ -2,35 +2,19 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 
+from common.openapi import openapi_schema_view, redoc_view
 
-from drf_yasg import openapi
-from drf_yasg.views import get_schema_view
-from rest_framework import permissions
-
-
-schema_view = get_schema_view(
-    openapi.Info(
-        title="Task management API",
-        default_version="v1",
-        description="An Task Management API for Management",
-        contact=openapi.Contact(email="api.imperfect@gmail.com"),
-        license=openapi.License(name="MIT License"),
-    ),
-    public=True,
-    permission_classes=[permissions.AllowAny],
-)
 
 urlpatterns = [
-    path(
-        "redoc/",
-        schema_view.with_ui("redoc", cache_timeout=0),
-        name="schema-redoc",
-    ),
+    # served from the stored schema, see the generate_openapi_schema command
+    path("redoc/", redoc_view, name="schema-redoc"),
+    path("openapi.json", openapi_schema_view, name="openapi-schema"),
     path("admin/", admin.site.urls), 
     path("api/v1/auth/", include("djoser.urls")),
     path("api/v1/auth/", include("users.urls")),
     path("api/v1/admin/", include("dashboard.urls")),
     path("api/v1/", include("tasks.urls")),
+    path("api/v1/", include("jobs.urls")),
 
 ]
 
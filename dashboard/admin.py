@@ -1,3 +1,6 @@
 from django.contrib import admin
+from .models import TaskStatistic, WorkedHours
 
 # Register your models here.
+admin.site.register(TaskStatistic)
+admin.site.register(WorkedHours)
@@ -0,0 +1,14 @@
+from jobs.registry import job
+
+from .stats import rebuild_task_statistics
+from .worked_hours import rebuild_worked_hours
+
+
+@job('dashboard.rebuild_task_stats', max_attempts=3)
+def rebuild_task_stats():
+    return {'rows': rebuild_task_statistics()}
+
+
+@job('dashboard.rebuild_worked_hours', max_attempts=3)
+def rebuild_worked_hours_rollups():
+    return {'rows': rebuild_worked_hours()}
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.stats import rebuild_task_statistics
+from jobs.registry import enqueue
+
+
+class Command(BaseCommand):
+    help = "Recompute the dashboard task statistics from the task table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--defer", action="store_true", help="Queue the rebuild for the job worker instead.")
+
+    def handle(self, *args, **options):
+        if options["defer"]:
+            job = enqueue("dashboard.rebuild_task_stats")
+            self.stdout.write(self.style.SUCCESS(f"Queued job #{job.pk}."))
+            return
+
+        rows = rebuild_task_statistics()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} task statistic rows."))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from dashboard.worked_hours import rebuild_worked_hours
+from jobs.registry import enqueue
+
+
+class Command(BaseCommand):
+    help = "Recompute the weekly and monthly worked hours rollups from the completed tasks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--defer", action="store_true", help="Queue the rebuild for the job worker instead.")
+
+    def handle(self, *args, **options):
+        if options["defer"]:
+            job = enqueue("dashboard.rebuild_worked_hours")
+            self.stdout.write(self.style.SUCCESS(f"Queued job #{job.pk}."))
+            return
+
+        rows = rebuild_worked_hours()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} worked hours rows."))
@@ -1,3 +1,61 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class TaskStatistic(models.Model):
+    """
+    Task counts per status, maintained incrementally by the task signal
+    handlers in dashboard.signals. A row holds the count for one status
+    within one bucket of a dimension (everything, a creation month or an
+    assignee).
+    """
+
+    class Dimensions(models.TextChoices):
+        TOTAL = "total", "Total"
+        MONTH = "month", "Month"
+        ASSIGNEE = "assignee", "Assignee"
+
+    dimension = models.CharField(max_length=20, choices=Dimensions.choices)
+    key = models.CharField(max_length=64, blank=True, default="")
+    status = models.CharField(max_length=20)
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["dimension", "key", "status"], name="unique_task_statistic"),
+        ]
+
+    def __str__(self):
+        return f"{self.dimension}:{self.key}:{self.status} = {self.count}"
+
+
+class WorkedHours(models.Model):
+    """
+    Worked hours and number of completed tasks per user per week or month,
+    bucketed by the tasks' completed_at and maintained incrementally by the
+    task signal handlers in dashboard.signals, like TaskStatistic.
+    period_start is the Monday of the week or the first day of the month.
+    """
+
+    class Periods(models.TextChoices):
+        WEEK = "week", "Week"
+        MONTH = "month", "Month"
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="+")
+    period = models.CharField(max_length=10, choices=Periods.choices)
+    period_start = models.DateField()
+    hours = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    completed = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # also serves one user's range queries
+            models.UniqueConstraint(fields=["user", "period", "period_start"], name="unique_worked_hours"),
+        ]
+        indexes = [
+            # range queries across many users
+            models.Index(fields=["period", "period_start"], name="worked_hours_period_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}:{self.period}:{self.period_start} = {self.hours}h/{self.completed}"
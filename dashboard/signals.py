@@ -0,0 +1,55 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from tasks.models import Task
+from tasks.signals import tasks_bulk_created
+from .stats import record_task_change, record_tasks_created
+from .worked_hours import record_worked_hours_change
+
+STATE_FIELDS = ("status", "assigned_to_id", "created_at", "completed_at", "worked_hours")
+
+
+def task_state(instance):
+    return tuple(getattr(instance, field) for field in STATE_FIELDS)
+
+
+def statistics_state(state):
+    return state and state[:3]
+
+
+def worked_hours_state(state):
+    return state and (state[0], state[1], state[3], state[4])
+
+
+def record_state_change(old_state, new_state):
+    record_task_change(statistics_state(old_state), statistics_state(new_state))
+    record_worked_hours_change(worked_hours_state(old_state), worked_hours_state(new_state))
+
+
+@receiver(post_save, sender=Task)
+def update_task_statistics(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    # Task.save read the replaced row under a lock, so each transition is counted once
+    saved = None if created else getattr(instance, "_saved_values", None)
+    old_state = saved and tuple(saved[field] for field in STATE_FIELDS)
+    new_state = task_state(instance)
+    if old_state and update_fields is not None:
+        # fields the save did not write keep their stored values
+        written = {field for name in update_fields for field in (name, f"{name}_id")}
+        new_state = tuple(new if field in written else old for field, old, new in zip(STATE_FIELDS, old_state, new_state))
+    record_state_change(old_state, new_state)
+
+
+@receiver(post_delete, sender=Task)
+def remove_task_statistics(sender, instance, **kwargs):
+    # Task.delete reads the stored row (None when it was already gone); queryset deletes pass instances fetched for the delete
+    if not hasattr(instance, "_saved_values"):
+        record_state_change(task_state(instance), None)
+    elif instance._saved_values is not None:
+        record_state_change(tuple(instance._saved_values[field] for field in STATE_FIELDS), None)
+
+
+@receiver(tasks_bulk_created)
+def add_bulk_task_statistics(sender, tasks, **kwargs):
+    record_tasks_created(tasks)
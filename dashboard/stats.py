@@ -0,0 +1,157 @@
+import datetime
+from collections import Counter
+
+from django.db import connections, router, transaction
+from django.db.models import CharField, Count, Sum
+from django.db.models.functions import Cast, TruncMonth
+from django.utils import timezone
+
+from tasks.models import Task
+from .models import TaskStatistic
+
+Dimensions = TaskStatistic.Dimensions
+
+
+def month_key(value):
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    return value.strftime("%Y-%m")
+
+
+def task_buckets(status, assigned_to_id, created_at):
+    """
+    Statistic rows a task with the given state is counted in.
+    """
+    return [
+        (Dimensions.TOTAL, "", status),
+        (Dimensions.MONTH, month_key(created_at), status),
+        (Dimensions.ASSIGNEE, str(assigned_to_id), status),
+    ]
+
+
+def add_to_rows(model, key_fields, value_fields, rows):
+    """
+    Add rows of (*key values, *value deltas) to model's rows with those keys
+    in one INSERT ... ON CONFLICT DO UPDATE SET value = value + delta,
+    creating missing rows. key_fields must be covered by a unique
+    constraint. SQLite and PostgreSQL both take this statement.
+    """
+    if not rows:
+        return
+    using = router.db_for_write(model)
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    fields = [model._meta.get_field(field) for field in [*key_fields, *value_fields]]
+    keys = [quote(field.column) for field in fields[:len(key_fields)]]
+    values = [quote(field.column) for field in fields[len(key_fields):]]
+    placeholders = ", ".join(["(" + ", ".join(["%s"] * (len(keys) + len(values))) + ")"] * len(rows))
+    sql = (
+        f"INSERT INTO {table} ({', '.join(keys + values)}) VALUES {placeholders} "
+        f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET "
+        + ", ".join(f"{column} = {table}.{column} + excluded.{column}" for column in values)
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [field.get_db_prep_save(value, connection) for row in rows for field, value in zip(fields, row)])
+
+
+def apply_deltas(deltas):
+    """
+    Add each (dimension, key, status) -> delta to its statistic row, all in
+    one statement.
+    """
+    add_to_rows(
+        TaskStatistic, ["dimension", "key", "status"], ["count"],
+        [(*bucket, delta) for bucket, delta in deltas.items() if delta],
+    )
+
+
+def record_task_change(old_state, new_state):
+    """
+    Move a task's counts from old_state to new_state, each a
+    (status, assigned_to_id, created_at) tuple or None.
+    """
+    deltas = Counter()
+    if old_state is not None:
+        deltas.subtract(task_buckets(*old_state))
+    if new_state is not None:
+        deltas.update(task_buckets(*new_state))
+    apply_deltas(deltas)
+
+
+def record_tasks_created(tasks):
+    deltas = Counter()
+    for task in tasks:
+        deltas.update(task_buckets(task.status, task.assigned_to_id, task.created_at))
+    apply_deltas(deltas)
+
+
+def rebuild_task_statistics():
+    """
+    Recompute every statistic row from the task table.
+    """
+    rows = []
+    totals = Task.objects.values("status").annotate(total=Count("id")).order_by()
+    rows += [TaskStatistic(dimension=Dimensions.TOTAL, key="", status=row["status"], count=row["total"]) for row in totals]
+
+    months = Task.objects.annotate(month=TruncMonth("created_at")).values("month", "status").annotate(total=Count("id")).order_by()
+    rows += [
+        TaskStatistic(dimension=Dimensions.MONTH, key=month_key(row["month"]), status=row["status"], count=row["total"])
+        for row in months
+    ]
+
+    assignees = Task.objects.values("assigned_to_id", "status").annotate(total=Count("id")).order_by()
+    rows += [
+        TaskStatistic(dimension=Dimensions.ASSIGNEE, key=str(row["assigned_to_id"]), status=row["status"], count=row["total"])
+        for row in assignees
+    ]
+
+    with transaction.atomic():
+        TaskStatistic.objects.all().delete()
+        TaskStatistic.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
+
+
+def status_counts(dimension, key=""):
+    counts = {value: 0 for value, label in Task.STATUS_CHOICES}
+    for status, count in TaskStatistic.objects.filter(dimension=dimension, key=key).values_list("status", "count"):
+        counts[status] = count
+    return counts
+
+
+def monthly_counts(year):
+    """
+    Tasks created per month of the given year, as {"Jan": n, ...}.
+    """
+    months = {datetime.date(year, month, 1).strftime("%b"): 0 for month in range(1, 13)}
+    rows = TaskStatistic.objects.filter(dimension=Dimensions.MONTH, key__startswith=f"{year}-").values_list("key", "count")
+    for key, count in rows:
+        months[datetime.date(year, int(key[5:7]), 1).strftime("%b")] += count
+    return months
+
+
+def scoped_status_counts(users):
+    """
+    Status counts summed over the tasks of the users in the users queryset,
+    with one aggregate over their statistic rows.
+    """
+    keys = users.annotate(key=Cast("pkid", CharField())).values("key")
+    counts = {value: 0 for value, label in Task.STATUS_CHOICES}
+    rows = TaskStatistic.objects.filter(dimension=Dimensions.ASSIGNEE, key__in=keys).values("status").annotate(total=Sum("count"))
+    for row in rows.order_by():
+        counts[row["status"]] = row["total"]
+    return counts
+
+
+def assignee_counts(assigned_to_ids=None):
+    """
+    Per-assignee status counts as {assigned_to_id: {status: n}}.
+    """
+    rows = TaskStatistic.objects.filter(dimension=Dimensions.ASSIGNEE)
+    if assigned_to_ids is not None:
+        rows = rows.filter(key__in=[str(pk) for pk in assigned_to_ids])
+
+    counts = {}
+    for key, status, count in rows.values_list("key", "status", "count"):
+        counts.setdefault(int(key), {value: 0 for value, label in Task.STATUS_CHOICES})[status] = count
+    return counts
@@ -1,3 +1,218 @@
-from django.test import TestCase
+import datetime
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from tasks.tests import TEST_THROTTLE_STORE, api_client, make_task, make_user
+from tasks.models import Task
+from . import views
+from .models import TaskStatistic, WorkedHours
+from .stats import monthly_counts, rebuild_task_statistics, status_counts
+from .worked_hours import rebuild_worked_hours
+
+
+@override_settings(THROTTLE_STORE=TEST_THROTTLE_STORE)
+class AdminDashboardTests(TestCase):
+    def setUp(self):
+        self.admin = make_user("dash_admin", role="admin")
+        self.users = [make_user(f"dash_user{n}", admin=self.admin) for n in range(3)]
+        make_task(self.users[0])
+        make_task(self.users[1], status="completed")
+        make_task(make_user("outsider"))
+
+    def test_admin_sees_their_users_counts(self):
+        self.client.force_login(self.admin)
+        context = self.client.get(reverse("admin_dashboard")).context
+        self.assertEqual(context["task_status"], {"pending": 1, "in_progress": 0, "completed": 1})
+        self.assertEqual([username for username, counts in context["assignee_stats"]], ["dash_user0", "dash_user1", "dash_user2"])
+        self.assertFalse(context["assignee_more"])
+
+    def test_per_user_table_is_capped(self):
+        self.client.force_login(self.admin)
+        with mock.patch.object(views, "ADMIN_DASHBOARD_USERS", 2):
+            context = self.client.get(reverse("admin_dashboard")).context
+        self.assertEqual(len(context["assignee_stats"]), 2)
+        self.assertTrue(context["assignee_more"])
+        # the totals still cover every user below the admin
+        self.assertEqual(context["total_tasks"], 2)
+
+    def test_superadmin_gets_no_per_user_table(self):
+        self.client.force_login(make_user("dash_root", role="superadmin"))
+        context = self.client.get(reverse("admin_dashboard")).context
+        self.assertNotIn("assignee_stats", context)
+        self.assertEqual(context["total_tasks"], 3)
+
+
+def statistic_rows():
+    return set(TaskStatistic.objects.exclude(count=0).values_list("dimension", "key", "status", "count"))
+
+
+class TaskStatisticTests(TestCase):
+    def setUp(self):
+        self.user = make_user("stats_user")
+        self.other = make_user("stats_other")
+        self.task = make_task(self.user)
+
+    def assert_matches_rebuild(self):
+        incremental = statistic_rows()
+        rebuild_task_statistics()
+        self.assertEqual(incremental, statistic_rows())
+
+    def test_create(self):
+        self.assertEqual(status_counts(TaskStatistic.Dimensions.TOTAL)["pending"], 1)
+        self.assertEqual(status_counts(TaskStatistic.Dimensions.ASSIGNEE, str(self.user.pkid))["pending"], 1)
+        self.assert_matches_rebuild()
+
+    def test_status_change_and_reassignment(self):
+        self.task.status = "completed"
+        self.task.save()
+        self.task.assigned_to = self.other
+        self.task.save()
+        self.assertEqual(status_counts(TaskStatistic.Dimensions.TOTAL), {"pending": 0, "in_progress": 0, "completed": 1})
+        self.assertEqual(status_counts(TaskStatistic.Dimensions.ASSIGNEE, str(self.user.pkid))["completed"], 0)
+        self.assertEqual(status_counts(TaskStatistic.Dimensions.ASSIGNEE, str(self.other.pkid))["completed"], 1)
+        self.assert_matches_rebuild()
+
+    def test_stale_instances_count_a_transition_once(self):
+        first, second = Task.objects.get(pk=self.task.pk), Task.objects.get(pk=self.task.pk)
+        first.status = "completed"
+        first.save()
+        second.status = "completed"
+        second.save()
+        self.assertEqual(status_counts(TaskStatistic.Dimensions.TOTAL), {"pending": 0, "in_progress": 0, "completed": 1})
+        self.assert_matches_rebuild()
+
+    def test_update_fields_keeps_unwritten_fields(self):
+        stale = Task.objects.get(pk=self.task.pk)
+        self.task.assigned_to = self.other
+        self.task.save()
+        stale.status = "in_progress"
+        stale.save(update_fields=["status"])
+        self.assert_matches_rebuild()
+
+    def test_delete(self):
+        make_task(self.user)
+        stale = Task.objects.get(pk=self.task.pk)
+        self.task.status = "completed"
+        self.task.save()
+        stale.delete()
+        Task.objects.filter(assigned_to=self.user).delete()
+        self.assertEqual(sum(status_counts(TaskStatistic.Dimensions.TOTAL).values()), 0)
+        self.assert_matches_rebuild()
+
+    def test_monthly_counts(self):
+        created = timezone.localtime(self.task.created_at)
+        counts = monthly_counts(created.year)
+        self.assertEqual(len(counts), 12)
+        self.assertEqual(counts[created.strftime("%b")], 1)
+
+
+def worked_hours_rows():
+    return set(
+        WorkedHours.objects.exclude(hours=0, completed=0).values_list("user_id", "period", "period_start", "hours", "completed")
+    )
+
+
+class WorkedHoursRollupTests(TestCase):
+    # a Sunday at the end of a month, so the week and the month both roll over a day later
+    sunday = timezone.make_aware(datetime.datetime(2030, 3, 31, 12))
+
+    def setUp(self):
+        self.user = make_user("hours_user")
+        self.other = make_user("hours_other")
+        self.task = make_task(self.user)
+
+    def complete(self, task, hours, completed_at=None):
+        task.status = "completed"
+        task.worked_hours = Decimal(hours)
+        task.completed_at = completed_at
+        task.save()
+
+    def assert_matches_rebuild(self):
+        incremental = worked_hours_rows()
+        rebuild_worked_hours()
+        self.assertEqual(incremental, worked_hours_rows())
+
+    def test_completing_adds_to_the_week_and_month(self):
+        self.complete(self.task, "2.5", self.sunday)
+        self.assertEqual(worked_hours_rows(), {
+            (self.user.pkid, "week", datetime.date(2030, 3, 25), Decimal("2.5"), 1),
+            (self.user.pkid, "month", datetime.date(2030, 3, 1), Decimal("2.5"), 1),
+        })
+        self.assert_matches_rebuild()
+
+    def test_uncompleting_removes_the_hours(self):
+        self.complete(self.task, "2", self.sunday)
+        self.task.status = "in_progress"
+        self.task.save()
+        self.assertEqual(worked_hours_rows(), set())
+        self.assert_matches_rebuild()
+
+    def test_moving_completed_at_across_week_and_month(self):
+        self.complete(self.task, "3", self.sunday)
+        self.task.completed_at = self.sunday + datetime.timedelta(days=1)
+        self.task.save()
+        self.assertEqual(worked_hours_rows(), {
+            (self.user.pkid, "week", datetime.date(2030, 4, 1), Decimal("3"), 1),
+            (self.user.pkid, "month", datetime.date(2030, 4, 1), Decimal("3"), 1),
+        })
+        self.assert_matches_rebuild()
+
+    def test_reassignment_and_hours_change(self):
+        self.complete(self.task, "1", self.sunday)
+        self.task.assigned_to = self.other
+        self.task.worked_hours = Decimal("4")
+        self.task.save()
+        self.assertEqual({row[0] for row in worked_hours_rows()}, {self.other.pkid})
+        self.assert_matches_rebuild()
+
+    def test_stale_instances_count_hours_once(self):
+        first, second = Task.objects.get(pk=self.task.pk), Task.objects.get(pk=self.task.pk)
+        self.complete(first, "2", self.sunday)
+        self.complete(second, "2", self.sunday)
+        self.assert_matches_rebuild()
+        second.delete()
+        self.assertEqual(worked_hours_rows(), set())
+
+
+@override_settings(THROTTLE_STORE=TEST_THROTTLE_STORE)
+class WorkedHoursAnalyticsTests(TestCase):
+    def setUp(self):
+        self.admin = make_user("wh_admin", role="admin")
+        self.users = [make_user(f"wh_user{n}", admin=self.admin) for n in range(3)]
+        self.outsider = make_user("wh_outsider")
+        completed_at = timezone.make_aware(datetime.datetime(2030, 3, 5, 12))
+        for hours, user in zip(["1", "2", "3", "9"], [*self.users, self.outsider]):
+            task = make_task(user, status="completed", worked_hours=Decimal(hours))
+            task.completed_at = completed_at
+            task.save()
+        self.params = "?period=month&from=2030-01-01&to=2030-06-30"
+
+    def get(self, user, params=""):
+        return api_client(user).get(reverse("task-worked-hours") + self.params + params)
+
+    def test_admin_sees_only_their_users(self):
+        response = self.get(self.admin)
+        self.assertEqual(response.status_code, 200)
+        [row] = response.json()["results"]
+        self.assertEqual((row["period_start"], float(row["hours"]), row["completed"]), ("2030-03-01", 6.0, 3))
+
+    def test_user_sees_only_themselves(self):
+        results = self.get(self.users[0], f"&user={self.outsider.pkid}").json()["results"]
+        self.assertEqual(results, [])
+
+    def test_group_by_user_is_paginated(self):
+        first = self.get(self.admin, "&group=user&page_size=2").json()
+        self.assertEqual(first["count"], 3)
+        self.assertEqual([row["username"] for row in first["results"]], ["wh_user2", "wh_user1"])
+        second = api_client(self.admin).get(first["next"]).json()
+        self.assertEqual([row["username"] for row in second["results"]], ["wh_user0"])
+
+    def test_range_is_limited_to_two_years(self):
+        response = api_client(self.admin).get(reverse("task-worked-hours") + "?from=2027-01-01&to=2030-01-02")
+        self.assertEqual(response.status_code, 400)
+        response = api_client(self.admin).get(reverse("task-worked-hours") + "?from=2030-02-01&to=2030-01-01")
+        self.assertEqual(response.status_code, 400)
@@ -10,11 +10,14 @@ urlpatterns = [
     path('logout/', views.logout_view, name='admin_logout'),
     path('admin_details/', views.list_admin_users, name="admin_details"),
     path('user_details/', views.list_users, name="user_details"),
+    path('user_rows/', views.user_rows, name="user_rows"),
+    path('import_users/', views.import_users_view, name="import_users"),
     path('block_user/<uuid:user_id>/', views.UserBlock, name="block_user"),
     path('delete_admin/<uuid:user_id>/', views.delete_admin, name='delete_admin'),
     path('delete_user/<uuid:user_id>/', views.delete_user, name='delete_user'),
     path('update-role/<uuid:user_id>/', views.update_user_role, name='update_user_role'),
     path('update-admin-role/<uuid:user_id>/', views.update_admin_role, name='update_admin_role'),
+    path('assign-admin/<uuid:user_id>/', views.assign_admin, name='assign_admin'),
     
     #<------------------------------------admin----------------------------------------------
     path('admin_dash/', views.admin_dashboard, name="admin_dashboard"),
@@ -8,9 +8,19 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from django.views.decorators.cache import never_cache
 from django.views.decorators.http import require_POST
 from django.utils.decorators import method_decorator
-from django.http import JsonResponse
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
+from django.urls import reverse
+from django.utils.http import urlencode
 from django.views.decorators.csrf import csrf_exempt
 import json
+from django.utils import timezone
+from django.core.exceptions import ValidationError
+from .models import TaskStatistic
+from .stats import assignee_counts, monthly_counts, scoped_status_counts, status_counts
+from common.db_router import replica_reads
+from common.hashing import HashingPoolBusy
+from users.bulk import UserImportError, import_users, parse_user_upload
+from users.hierarchy import scope_users
 
 
 def get_tokens_for_user(user):
@@ -21,14 +31,30 @@ def get_tokens_for_user(user):
     }
     
     
+# task counts for the dashboards, read from the TaskStatistic rollup rows
+def task_dashboard_context(request, task_status=None):
+    if task_status is None:
+        task_status = status_counts(TaskStatistic.Dimensions.TOTAL)
+    return {
+        'user': request.user,
+        'task_status': task_status,
+        'total_tasks': sum(task_status.values()),
+        'monthly_task_data': monthly_counts(timezone.now().year),
+    }
+
+
 @never_cache
 @login_required(login_url='admin_login')
+@replica_reads
 def DashBoard(request):
     if request.user.role not in ['admin', 'superadmin']:
         return redirect('admin_login')  # prevent unauthorized access
     if request.user.role == "superadmin":
-        return render(request, 'adminside/dashboard/superadmin_index.html', {'user': request.user})
-    return render(request, 'adminside/dashboard/admin_index.html', {'user': request.user})
+        context = task_dashboard_context(request)
+        context['total_users'] = User.objects.filter(role="user").count()
+        context['total_admins'] = User.objects.filter(role="admin").count()
+        return render(request, 'adminside/dashboard/superadmin_index.html', context)
+    return admin_dashboard(request)
     
     
 
@@ -41,7 +67,10 @@ def admin_login_view(request):
         username = request.POST.get('username')
         password = request.POST.get('password')
 
-        user = authenticate(request, username=username, password=password)
+        try:
+            user = authenticate(request, username=username, password=password)
+        except HashingPoolBusy as e:
+            return render(request, 'adminside/admin_login.html', {'error': e.detail}, status=503)
         if user is not None and user.role in ['admin', 'superadmin']:
             login(request, user)
             
@@ -94,8 +123,7 @@ def register_user(request):
             role = role
         )
         
-        users = User.objects.filter(role="user")
-        return render(request, 'adminside/users/admin_details.html', {'users': users})
+        return user_action_response(request, user, user.role, user_list_url(user.role))
 
     return JsonResponse({'error': 'Only POST method allowed'}, status=405)
 
@@ -109,49 +137,115 @@ def logout_view(request):
     return response
 
 
+USER_ROWS_PAGE_SIZE = 25
+USER_ROW_FIELDS = ('pkid', 'id', 'username', 'email', 'mobile', 'date_joined', 'is_active', 'role')
+
+
+def user_list_url(role):
+    return 'admin_details' if role == 'admin' else 'user_details'
+
+
+def user_summary(user):
+    return {
+        'id': str(user.id),
+        'username': user.username,
+        'email': user.email,
+        'mobile': user.mobile,
+        'role': user.role,
+        'is_active': user.is_active,
+    }
+
+
+# one page of user table rows, keyset paged on pkid so deep pages cost the same as the first
+def user_rows_context(request, table, actions):
+    users = scope_users(request.user, User.objects.filter(role=table)).only(*USER_ROW_FIELDS).order_by('-pkid')
+    after = request.GET.get('after', '')
+    if after.isdigit():
+        users = users.filter(pkid__lt=int(after))
+
+    rows = list(users[:USER_ROWS_PAGE_SIZE + 1])
+    next_url = None
+    if len(rows) > USER_ROWS_PAGE_SIZE:
+        rows = rows[:USER_ROWS_PAGE_SIZE]
+        next_url = reverse('user_rows') + '?' + urlencode({'table': table, 'after': rows[-1].pkid})
+    return {'users': rows, 'table': table, 'actions': actions, 'next_url': next_url}
+
+
+def user_action_response(request, user, table, list_url):
+    """
+    Answer a user management action with only what changed: JSON for
+    Accept: application/json, the user's table row (empty once the user no
+    longer belongs in the table) for fetch/htmx requests, and a redirect to
+    the list page otherwise.
+    """
+    if 'application/json' in request.headers.get('Accept', ''):
+        return JsonResponse({'user': user_summary(user) if user is not None else None})
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest' or 'HX-Request' in request.headers:
+        if user is None or user.role != table:
+            return HttpResponse('')
+        return render(request, 'adminside/users/include/user_row.html', {'user': user, 'table': table, 'actions': True})
+    return redirect(list_url)
+
+
 # superAmin view the user details
+@login_required(login_url='admin_login')
+@replica_reads
 def list_admin_users(request):
-    admin_users = User.objects.filter(role="admin")
-    return render(request, 'adminside/users/admin_details.html', {'users': admin_users})
+    return render(request, 'adminside/users/admin_details.html', user_rows_context(request, 'admin', True))
+
+
+# further rows for the user tables, loaded as the page scrolls
+@login_required(login_url='admin_login')
+@replica_reads
+def user_rows(request):
+    table = request.GET.get('table', 'user')
+    if request.user.role == 'superadmin' and table in ('admin', 'user'):
+        actions = True
+    elif request.user.role == 'admin' and table == 'user':
+        actions = False
+    else:
+        return HttpResponseForbidden()
+    return render(request, 'adminside/users/include/user_rows.html', user_rows_context(request, table, actions))
 
 
 # superadmin can block user
 def UserBlock(request, user_id):
-    user = User.objects.get(id=user_id)
-    if user.is_active:
-        user.is_active = False
-        user.save()
-        
-        users = User.objects.filter(role=user.role).order_by('id')
-        context = {
-            'users': users
-        }
-        if user.role == "admin":
-            return render(request, 'adminside/users/admin_details.html', context)
-        elif user.role == "user":
-            return render(request, 'adminside/users/users_details.html', context)
-    else:
-        user.is_active = True
-        user.save()
-        users = User.objects.filter(role=user.role).order_by('id')
-        context = {
-            'users': users
-        }
-        if user.role == "admin":
-            return render(request, 'adminside/users/admin_details.html', context)
-        elif user.role == "user":
-            return render(request, 'adminside/users/users_details.html', context)
+    user = get_object_or_404(User, id=user_id)
+    user.is_active = not user.is_active
+    user.save(update_fields=['is_active'])
+    return user_action_response(request, user, user.role, user_list_url(user.role))
  
  
+ADMIN_DASHBOARD_USERS = 50
+
+
 #  admin dashboard 
+@never_cache
+@login_required(login_url='admin_login')
+@replica_reads
 def admin_dashboard(request):
-    return render(request, 'adminside/dashboard/admin_index.html', {'user': request.user})
+    if request.user.role != 'admin':
+        # the per-user table is for an admin's own users; everyone's is the user list
+        return render(request, 'adminside/dashboard/admin_index.html', task_dashboard_context(request))
+
+    # the users below this admin, directly or through nested admins
+    users = scope_users(request.user, User.objects.filter(role='user'))
+    context = task_dashboard_context(request, scoped_status_counts(users))
+
+    # the first ADMIN_DASHBOARD_USERS of them by username; the rest are on the user list
+    shown = list(users.order_by('username').values_list('pkid', 'username')[:ADMIN_DASHBOARD_USERS + 1])
+    context['assignee_more'] = len(shown) > ADMIN_DASHBOARD_USERS
+    shown = shown[:ADMIN_DASHBOARD_USERS]
+    counts = assignee_counts([pkid for pkid, username in shown])
+    context['assignee_stats'] = [(username, counts.get(pkid, {})) for pkid, username in shown]
+    return render(request, 'adminside/dashboard/admin_index.html', context)
 
 
 # superAmin view the user details
+@login_required(login_url='admin_login')
+@replica_reads
 def list_users(request):
-    users = User.objects.filter(role="user")
-    return render(request, 'adminside/users/users_details.html', {'users': users})
+    return render(request, 'adminside/users/users_details.html', user_rows_context(request, 'user', True))
 
 
 # verifyng the superuser
@@ -159,6 +253,20 @@ def is_superadmin(user):
     return user.is_authenticated and user.role == 'superadmin'
 
 
+# superuser can import users from a CSV/JSON file
+@login_required(login_url='admin_login')
+@user_passes_test(is_superadmin)
+def import_users_view(request):
+    context = {}
+    if request.method == 'POST' and 'file' in request.FILES:
+        try:
+            context['created'], context['errors'] = import_users(parse_user_upload(request.FILES['file']))
+        except UserImportError as e:
+            context['error'] = str(e)
+
+    return render(request, 'adminside/users/import_users.html', context)
+
+
 # superuser delete admin
 @login_required
 @user_passes_test(is_superadmin)
@@ -167,7 +275,7 @@ def delete_admin(request, user_id):
     if admin_user:
         admin_user.delete()
     
-    return redirect('admin_details') 
+    return user_action_response(request, None, 'admin', 'admin_details')
 
 
 # superuser delete user
@@ -180,7 +288,7 @@ def delete_user(request, user_id):
         user.delete()
         
 
-    return redirect('user_details') 
+    return user_action_response(request, None, 'user', 'user_details')
 
 
 # superuser can update user role
@@ -191,9 +299,9 @@ def update_user_role(request, user_id):
     
     if new_role in ['user', 'admin']:
         user.role = new_role
-        user.save()
+        user.save(update_fields=['role'])
     
-    return redirect('user_details') 
+    return user_action_response(request, user, 'user', 'user_details')
 
 
 # superuser can update admin role
@@ -204,12 +312,36 @@ def update_admin_role(request, user_id):
     
     if new_role in ['user', 'admin']:
         user.role = new_role
-        user.save()
+        user.save(update_fields=['role'])
     
-    return redirect('admin_details') 
+    return user_action_response(request, user, 'admin', 'admin_details')
+
+
+
+# superuser can assign a user or admin to an admin, or clear the assignment
+@require_POST
+@login_required
+@user_passes_test(is_superadmin)
+def assign_admin(request, user_id):
+    user = get_object_or_404(User, id=user_id)
+    value = request.POST.get('assigned_admin', '').strip()
+    admin = None
+    if value:
+        admin = User.objects.filter(role='admin', **{'pkid' if value.isdigit() else 'username': value}).first()
+        if admin is None:
+            return JsonResponse({'error': 'Admin not found.'}, status=400)
 
+    user.assigned_admin = admin
+    try:
+        user.save(update_fields=['assigned_admin'])
+    except ValidationError as e:
+        # assigning an admin to someone below them would close a cycle
+        return JsonResponse({'error': e.messages[0]}, status=400)
 
+    return user_action_response(request, user, user.role, user_list_url(user.role))
 
+
+@login_required(login_url='admin_login')
+@replica_reads
 def list_admin_all_users(request):
-    users = User.objects.filter(role="user")
-    return render(request, 'adminside/users/users_details_for_admin.html', {'users': users})
\ No newline at end of file
+    return render(request, 'adminside/users/users_details_for_admin.html', user_rows_context(request, 'user', False))
\ No newline at end of file
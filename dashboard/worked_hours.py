@@ -0,0 +1,113 @@
+import datetime
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DateField, Sum
+from django.db.models.functions import Coalesce, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from tasks.models import Task
+from .models import WorkedHours
+from .stats import add_to_rows
+
+Periods = WorkedHours.Periods
+
+
+def period_start(period, day):
+    """
+    The start of the week or month that day falls in.
+    """
+    return day - datetime.timedelta(days=day.weekday()) if period == Periods.WEEK else day.replace(day=1)
+
+
+def period_starts(completed_at):
+    day = timezone.localtime(completed_at).date() if timezone.is_aware(completed_at) else completed_at.date()
+    return {period: period_start(period, day) for period in Periods.values}
+
+
+def hours_buckets(status, assigned_to_id, completed_at, worked_hours):
+    """
+    Rollup rows a task with the given state counts in, as
+    {(user_id, period, period_start): (hours, completed)}. Only completed
+    tasks count.
+    """
+    if status != "completed" or completed_at is None:
+        return {}
+    hours = Decimal(worked_hours or 0)
+    return {(assigned_to_id, period, start): (hours, 1) for period, start in period_starts(completed_at).items()}
+
+
+def apply_hours_deltas(deltas):
+    """
+    Add each (user_id, period, period_start) -> (hours, completed) delta to
+    its rollup row, all in one statement.
+    """
+    add_to_rows(
+        WorkedHours, ["user", "period", "period_start"], ["hours", "completed"],
+        [(*bucket, hours, completed) for bucket, (hours, completed) in deltas.items() if hours or completed],
+    )
+
+
+def record_worked_hours_change(old_state, new_state):
+    """
+    Move a task's hours from old_state to new_state, each a
+    (status, assigned_to_id, completed_at, worked_hours) tuple or None.
+    """
+    deltas = {}
+    for state, sign in ((old_state, -1), (new_state, 1)):
+        if state is None:
+            continue
+        for key, (hours, completed) in hours_buckets(*state).items():
+            total_hours, total_completed = deltas.get(key, (Decimal(0), 0))
+            deltas[key] = (total_hours + sign * hours, total_completed + sign * completed)
+    apply_hours_deltas(deltas)
+
+
+def rebuild_worked_hours():
+    """
+    Recompute every rollup row from the completed tasks.
+    """
+    rows = []
+    completed = Task.objects.filter(status="completed", completed_at__isnull=False)
+    for period, trunc in ((Periods.WEEK, TruncWeek), (Periods.MONTH, TruncMonth)):
+        totals = (
+            completed.annotate(start=trunc("completed_at", output_field=DateField()))
+            .values("assigned_to_id", "start")
+            .annotate(hours=Coalesce(Sum("worked_hours"), Decimal(0)), completed=Count("id"))
+            .order_by()
+        )
+        rows += [
+            WorkedHours(user_id=row["assigned_to_id"], period=period, period_start=row["start"],
+                        hours=row["hours"], completed=row["completed"])
+            for row in totals
+        ]
+
+    with transaction.atomic():
+        WorkedHours.objects.all().delete()
+        WorkedHours.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
+
+
+def worked_hours_rollups(period, start, end, users=None):
+    """
+    Rollup rows of the given period between the periods containing start and
+    end, optionally limited to a queryset of users.
+    """
+    rows = WorkedHours.objects.filter(
+        period=period, period_start__gte=period_start(period, start), period_start__lte=period_start(period, end),
+    )
+    if users is not None:
+        rows = rows.filter(user__in=users.values("pkid"))
+    return rows
+
+
+def worked_hours_by_period(rows):
+    return rows.values("period_start").annotate(hours=Sum("hours"), completed=Sum("completed")).order_by("period_start")
+
+
+def worked_hours_by_user(rows):
+    return (
+        rows.values("user_id", "user__username")
+        .annotate(hours=Sum("hours"), completed=Sum("completed"))
+        .order_by("-hours", "user_id")
+    )
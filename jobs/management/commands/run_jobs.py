@@ -0,0 +1,26 @@
+import signal
+
+from django.core.management.base import BaseCommand
+
+from jobs.worker import Worker
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background jobs. Retries failed jobs with exponential backoff and "
+        "stops gracefully on SIGINT/SIGTERM after the running jobs finish."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=2, help="Jobs run at the same time (threads).")
+        parser.add_argument("--job", action="append", dest="names", help="Only run jobs with this name (repeatable).")
+        parser.add_argument("--once", action="store_true", help="Exit when no job is due instead of polling.")
+
+    def handle(self, *args, **options):
+        worker = Worker(concurrency=max(options["concurrency"], 1), names=options["names"], once=options["once"])
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: worker.stop())
+
+        self.stdout.write(f"Worker {worker.worker_id} running with {worker.concurrency} threads.")
+        processed = worker.run()
+        self.stdout.write(self.style.SUCCESS(f"Worker stopped after {processed} jobs."))
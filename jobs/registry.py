@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import Job
+
+handlers = {}
+
+
+def job(name, max_attempts=None):
+    """
+    Register the decorated function as the handler for jobs called name. The
+    function is called with the job payload as keyword arguments and may
+    return a JSON serializable result, which is stored on the job.
+    """
+    def register(func):
+        func.job_name = name
+        func.max_attempts = max_attempts
+        handlers[name] = func
+        return func
+
+    return register
+
+
+def enqueue(name, payload=None, *, delay=None, max_attempts=None, created_by=None):
+    """
+    Queue a job for the worker. The row is written in the caller's transaction,
+    so a job queued inside a transaction that rolls back never runs.
+    """
+    if name not in handlers:
+        raise LookupError(f"No job handler registered for {name!r}.")
+
+    handler = handlers[name]
+    fields = {"name": name, "payload": payload or {}, "created_by": created_by}
+    if delay is not None:
+        fields["run_at"] = timezone.now() + (delay if isinstance(delay, timedelta) else timedelta(seconds=delay))
+    if max_attempts or handler.max_attempts:
+        fields["max_attempts"] = max_attempts or handler.max_attempts
+    return Job.objects.create(**fields)
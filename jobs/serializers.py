@@ -0,0 +1,18 @@
+from django.urls import reverse
+from rest_framework import serializers
+
+from .models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Job
+        fields = ['id', 'name', 'status', 'attempts', 'max_attempts', 'run_at', 'result', 'download_url',
+                  'created_at', 'updated_at']
+
+    def get_download_url(self, job):
+        if job.status != Job.Status.SUCCEEDED or not (job.result or {}).get('file'):
+            return None
+        return self.context['request'].build_absolute_uri(reverse('job-download', args=[job.pk]))
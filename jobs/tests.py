@@ -0,0 +1,91 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from .models import Job
+from .registry import enqueue, job
+from .worker import Worker, backoff_delay
+
+calls = []
+
+
+@job("tests.record")
+def record_job(**payload):
+    calls.append(payload)
+    return {"ok": True}
+
+
+@job("tests.broken", max_attempts=2)
+def broken_job(**payload):
+    raise ValueError("broken")
+
+
+class WorkerTests(TestCase):
+    def setUp(self):
+        calls.clear()
+        self.worker = Worker(once=True)
+
+    def test_claim_marks_the_job_running_and_counts_the_attempt(self):
+        queued = enqueue("tests.record", {"n": 1})
+        claimed = self.worker.claim()
+        self.assertEqual(claimed.pk, queued.pk)
+        self.assertEqual(claimed.status, Job.Status.RUNNING)
+        self.assertEqual(claimed.attempts, 1)
+        self.assertIsNone(self.worker.claim())
+
+    def test_jobs_not_yet_due_are_not_claimed(self):
+        enqueue("tests.record", delay=60)
+        self.assertIsNone(self.worker.claim())
+
+    def test_successful_job_stores_its_result(self):
+        queued = enqueue("tests.record", {"n": 1})
+        self.worker.run_job(self.worker.claim())
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Job.Status.SUCCEEDED)
+        self.assertEqual(queued.result, {"ok": True})
+        self.assertEqual(calls, [{"n": 1}])
+
+    def test_failed_job_is_retried_with_backoff_then_failed(self):
+        queued = enqueue("tests.broken")
+        before = timezone.now()
+        self.worker.run_job(self.worker.claim())
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Job.Status.QUEUED)
+        self.assertIn("ValueError", queued.last_error)
+        # the first retry waits between half and all of BACKOFF_BASE
+        base = self.worker.options["BACKOFF_BASE"]
+        self.assertGreaterEqual(queued.run_at, before + timedelta(seconds=base / 2))
+
+        Job.objects.filter(pk=queued.pk).update(run_at=timezone.now())
+        self.worker.run_job(self.worker.claim())
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Job.Status.FAILED)
+        self.assertEqual(queued.attempts, 2)
+
+    def test_backoff_doubles_up_to_the_cap(self):
+        options = {"BACKOFF_BASE": 5, "BACKOFF_MAX": 30}
+        with mock.patch("jobs.worker.random.uniform", return_value=1.0):
+            self.assertEqual([backoff_delay(n, options) for n in range(1, 6)], [5, 10, 20, 30, 30])
+
+    def test_stale_job_counts_as_a_failed_attempt(self):
+        queued = enqueue("tests.broken")
+        lost = timezone.now() - timedelta(seconds=self.worker.options["LOCK_TIMEOUT"] + 1)
+        Job.objects.filter(pk=queued.pk).update(status=Job.Status.RUNNING, attempts=1, locked_at=lost, locked_by="gone:1")
+        self.assertEqual(self.worker.requeue_stale(), 1)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Job.Status.QUEUED)
+        self.assertIn("gone:1", queued.last_error)
+
+        Job.objects.filter(pk=queued.pk).update(status=Job.Status.RUNNING, attempts=2, locked_at=lost)
+        self.worker.requeue_stale()
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Job.Status.FAILED)
+
+    def test_running_job_within_the_lock_timeout_is_left_alone(self):
+        queued = enqueue("tests.record")
+        self.worker.claim()
+        self.assertEqual(self.worker.requeue_stale(), 0)
+        queued.refresh_from_db()
+        self.assertEqual(queued.status, Job.Status.RUNNING)
@@ -0,0 +1,7 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('jobs/<int:pk>/', views.JobDetailAPIView.as_view(), name='job-detail'),
+    path('jobs/<int:pk>/download/', views.JobDownloadAPIView.as_view(), name='job-download'),
+]
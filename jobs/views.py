@@ -0,0 +1,40 @@
+import os
+
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404
+from rest_framework import generics, permissions
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.views import APIView
+
+from common.cookie_auth import CookieAuthentication
+from .models import Job
+from .serializers import JobSerializer
+
+
+def visible_jobs(user):
+    jobs = Job.objects.all()
+    return jobs if user.role == 'superadmin' else jobs.filter(created_by=user)
+
+
+# the user who queued a job can follow its status
+class JobDetailAPIView(generics.RetrieveAPIView):
+    authentication_classes = [CookieAuthentication, SessionAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+    serializer_class = JobSerializer
+
+    def get_queryset(self):
+        return visible_jobs(self.request.user)
+
+
+# and download the file a finished export job wrote
+class JobDownloadAPIView(APIView):
+    authentication_classes = [CookieAuthentication, SessionAuthentication]
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, pk):
+        job = get_object_or_404(visible_jobs(request.user), pk=pk, status=Job.Status.SUCCEEDED)
+        name = (job.result or {}).get('file')
+        if not name or not default_storage.exists(name):
+            raise Http404("No file for this job.")
+        return FileResponse(default_storage.open(name, 'rb'), as_attachment=True, filename=os.path.basename(name))
@@ -0,0 +1,177 @@
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+from .registry import handlers
+
+logger = logging.getLogger("jobs")
+
+DEFAULTS = {
+    "POLL_INTERVAL": 1.0,
+    "BACKOFF_BASE": 5,  # seconds before the first retry, doubled on each attempt
+    "BACKOFF_MAX": 3600,
+    "LOCK_TIMEOUT": 600,  # running jobs older than this are assumed lost and count as a failed attempt
+    "KEEP_SUCCEEDED_DAYS": 7,
+    "MAINTENANCE_INTERVAL": 60,
+}
+
+
+def job_settings():
+    return {**DEFAULTS, **getattr(settings, "JOBS", {})}
+
+
+def backoff_delay(attempts, options):
+    """
+    Exponential backoff with jitter: BACKOFF_BASE * 2 ** (attempts - 1) seconds,
+    capped at BACKOFF_MAX and randomised between half and the full delay so
+    jobs that failed together do not retry together.
+    """
+    delay = min(options["BACKOFF_BASE"] * 2 ** max(attempts - 1, 0), options["BACKOFF_MAX"])
+    return delay * random.uniform(0.5, 1.0)
+
+
+class Worker:
+    """
+    Run queued jobs on concurrency threads until stop() is called, or until
+    the queue is empty when once is set.
+    """
+
+    claim_batch = 10
+
+    def __init__(self, concurrency=1, names=None, once=False):
+        self.concurrency = concurrency
+        self.names = names
+        self.once = once
+        self.options = job_settings()
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.stopping = threading.Event()
+        self.processed = 0
+        self._lock = threading.Lock()
+
+    def due_jobs(self):
+        jobs = Job.objects.filter(status=Job.Status.QUEUED, run_at__lte=timezone.now())
+        if self.names:
+            jobs = jobs.filter(name__in=self.names)
+        return jobs.order_by("run_at", "id")
+
+    def claim(self):
+        """
+        Take the next due job, marking it running. Uses SELECT ... SKIP LOCKED
+        where the database has it and a compare-and-set UPDATE elsewhere
+        (SQLite), so concurrent workers never run the same job twice.
+        """
+        now = timezone.now()
+        claimed = {
+            "status": Job.Status.RUNNING, "locked_by": self.worker_id, "locked_at": now,
+            "attempts": F("attempts") + 1, "updated_at": now,
+        }
+        if connection.features.has_select_for_update_skip_locked:
+            with transaction.atomic():
+                job_id = self.due_jobs().select_for_update(skip_locked=True).values_list("id", flat=True).first()
+                if job_id is None:
+                    return None
+                Job.objects.filter(pk=job_id).update(**claimed)
+            return Job.objects.get(pk=job_id)
+
+        for job_id in self.due_jobs().values_list("id", flat=True)[:self.claim_batch]:
+            if Job.objects.filter(pk=job_id, status=Job.Status.QUEUED).update(**claimed):
+                return Job.objects.get(pk=job_id)
+        return None
+
+    def run_job(self, job):
+        started = time.perf_counter()
+        try:
+            handler = handlers.get(job.name)
+            if handler is None:
+                raise LookupError(f"No job handler registered for {job.name!r}.")
+            result = handler(**job.payload)
+        except Exception:
+            self.fail(job, traceback.format_exc())
+            return
+
+        now = timezone.now()
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.Status.SUCCEEDED, result=result, last_error="", locked_by="", locked_at=None, updated_at=now,
+        )
+        logger.info("job %s #%s succeeded in %.1f ms", job.name, job.pk, (time.perf_counter() - started) * 1000)
+
+    def fail(self, job, error):
+        now = timezone.now()
+        if job.attempts >= job.max_attempts:
+            Job.objects.filter(pk=job.pk).update(
+                status=Job.Status.FAILED, last_error=error, locked_by="", locked_at=None, updated_at=now,
+            )
+            logger.error("job %s #%s failed after %s attempts:\n%s", job.name, job.pk, job.attempts, error)
+            return
+
+        delay = backoff_delay(job.attempts, self.options)
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.Status.QUEUED, run_at=now + timedelta(seconds=delay), last_error=error,
+            locked_by="", locked_at=None, updated_at=now,
+        )
+        logger.warning("job %s #%s attempt %s failed, retrying in %.0f s", job.name, job.pk, job.attempts, delay)
+
+    def requeue_stale(self):
+        """
+        Treat running jobs locked longer than LOCK_TIMEOUT as failed attempts:
+        the claim already counted the attempt, so a job that keeps killing its
+        worker is retried with backoff and marked failed after max_attempts
+        instead of being requeued forever.
+        """
+        cutoff = timezone.now() - timedelta(seconds=self.options["LOCK_TIMEOUT"])
+        stale = list(Job.objects.filter(status=Job.Status.RUNNING, locked_at__lt=cutoff))
+        for job in stale:
+            self.fail(job, f"worker {job.locked_by} stopped responding (lock held since {job.locked_at.isoformat()})")
+        return len(stale)
+
+    def prune(self):
+        cutoff = timezone.now() - timedelta(days=self.options["KEEP_SUCCEEDED_DAYS"])
+        return Job.objects.filter(status=Job.Status.SUCCEEDED, updated_at__lt=cutoff).delete()[0]
+
+    def loop(self):
+        try:
+            while not self.stopping.is_set():
+                close_old_connections()
+                job = self.claim()
+                if job is None:
+                    if self.once:
+                        return
+                    self.stopping.wait(self.options["POLL_INTERVAL"])
+                    continue
+                self.run_job(job)
+                with self._lock:
+                    self.processed += 1
+        finally:
+            connection.close()
+
+    def run(self):
+        self.requeue_stale()
+        threads = [
+            threading.Thread(target=self.loop, name=f"job-worker-{n}", daemon=True) for n in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+
+        maintained_at = time.monotonic()
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=self.options["POLL_INTERVAL"])
+            if time.monotonic() - maintained_at >= self.options["MAINTENANCE_INTERVAL"]:
+                maintained_at = time.monotonic()
+                self.requeue_stale()
+                self.prune()
+        return self.processed
+
+    def stop(self):
+        self.stopping.set()
@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Task
+from .models import OverdueFlag, Task, TaskChange
 
 # Register your models here.
-admin.site.register(Task)
\ No newline at end of file
+admin.site.register(Task)
+admin.site.register(OverdueFlag)
+admin.site.register(TaskChange)
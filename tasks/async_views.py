@@ -0,0 +1,175 @@
+import json
+import math
+from functools import partial, wraps
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_http_methods
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from common.cookie_auth import AsyncCookieAuthentication
+from common.db_router import replica_reads
+from common.throttling import SharedUserRateThrottle
+from users.hierarchy import scope_tasks
+from .conditional import atask_list_validators, make_etag, set_conditional_headers
+from .events import iter_task_events, serves_asgi, stream_task_events
+from .history import changes_by
+from .models import Task
+from .serializers import TaskSerializer, TaskStatusUpdateSerializer
+
+authentication = AsyncCookieAuthentication()
+
+ASYNC_TASK_LIST_MAX_PAGE_SIZE = 100
+
+
+def async_api_view(view=None, *, session=False):
+    """
+    Authenticate an async view with AsyncCookieAuthentication and apply the
+    user rate throttle, answering 401/429 the way the DRF views do. The
+    authenticated user and token are set on request.user and request.auth.
+    With session=True a request without a token may use the session login
+    instead, as EventSource connections from the admin pages do.
+    """
+    if view is None:
+        return partial(async_api_view, session=session)
+
+    @csrf_exempt
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            result = await authentication.authenticate(request)
+        except AuthenticationFailed as e:
+            detail = e.detail if isinstance(e.detail, dict) else {'detail': e.detail}
+            return JsonResponse(detail, status=401)
+        if result is None and session:
+            user = await request.auser()
+            result = (user, None) if user.is_authenticated else None
+        if result is None:
+            return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+        request.user, request.auth = result
+
+        # the throttle check is a blocking SQLite write, so it runs off the event loop
+        throttle = SharedUserRateThrottle()
+        if not await sync_to_async(throttle.allow_request, thread_sensitive=False)(request, None):
+            response = JsonResponse({'detail': 'Request was throttled.'}, status=429)
+            wait = throttle.wait()
+            if wait is not None:
+                response['Retry-After'] = str(math.ceil(wait))
+            return response
+
+        return await view(request, *args, **kwargs)
+
+    return wrapper
+
+
+def get_int_param(request, name, default):
+    try:
+        return max(int(request.GET.get(name, default)), 1)
+    except ValueError:
+        return default
+
+
+# async version of UserTaskListAPIView, same page number pagination and ?count=false
+@require_GET
+@async_api_view
+@replica_reads
+async def task_list_async_view(request):
+    etag, last_modified = await atask_list_validators(request)
+    timestamp = int(last_modified.timestamp()) if last_modified is not None else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        return set_conditional_headers(response, etag, last_modified)
+
+    tasks = Task.objects.filter(assigned_to=request.user).order_by('due_date', 'id')
+    if request.GET.get('status'):
+        tasks = tasks.filter(status=request.GET['status'])
+
+    page_size = min(get_int_param(request, 'page_size', api_settings.PAGE_SIZE), ASYNC_TASK_LIST_MAX_PAGE_SIZE)
+    page_number = get_int_param(request, 'page', 1)
+    with_count = request.GET.get('count', 'true').lower() not in ('false', '0', 'no')
+
+    # fetch one extra row to learn whether a next page exists
+    offset = (page_number - 1) * page_size
+    rows = [task async for task in tasks[offset:offset + page_size + 1]]
+    if page_number > 1 and not rows:
+        return JsonResponse({'detail': 'Invalid page.'}, status=404)
+
+    url = request.build_absolute_uri()
+    data = {}
+    if with_count:
+        data['count'] = await tasks.acount()
+    data['next'] = replace_query_param(url, 'page', page_number + 1) if len(rows) > page_size else None
+    data['previous'] = replace_query_param(url, 'page', page_number - 1) if page_number > 1 else None
+    data['results'] = TaskSerializer(rows[:page_size], many=True).data
+    return set_conditional_headers(JsonResponse(data), etag, last_modified)
+
+
+# async version of TaskStatusUpdateAPIView
+@require_http_methods(['PUT', 'PATCH'])
+@async_api_view
+async def task_update_async_view(request, pk):
+    try:
+        task = await Task.objects.aget(pk=pk, assigned_to=request.user)
+    except Task.DoesNotExist:
+        return JsonResponse({'detail': 'No Task matches the given query.'}, status=404)
+
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return JsonResponse({'detail': 'JSON parse error.'}, status=400)
+
+    serializer = TaskStatusUpdateSerializer(task, data=data, partial=request.method == 'PATCH')
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=400)
+
+    for field, value in serializer.validated_data.items():
+        setattr(task, field, value)
+    with changes_by(request.user):
+        await task.asave()
+    return JsonResponse(serializer.data)
+
+
+# async version of TaskReportAPIView
+@require_GET
+@async_api_view
+@replica_reads
+async def task_report_async_view(request, pk):
+    try:
+        task = await scope_tasks(request.user, Task.objects.all()).aget(pk=pk)
+    except Task.DoesNotExist:
+        return JsonResponse({'error': 'Task not found'}, status=404)
+
+    if not request.user.is_superuser and not request.user.is_staff:
+        return JsonResponse({'error': 'Access denied'}, status=403)
+
+    if task.status != 'completed':
+        return JsonResponse({'error': 'Task not completed'}, status=400)
+
+    etag = make_etag('report', pk, task.updated_at)
+    response = get_conditional_response(request, etag=etag, last_modified=int(task.updated_at.timestamp()))
+    if response is None:
+        response = JsonResponse({
+            'completion_report': task.completion_report,
+            'worked_hours': task.worked_hours,
+        })
+    return set_conditional_headers(response, etag, task.updated_at)
+
+
+# live task create/update events as Server-Sent Events, in place of polling the task list
+@require_GET
+@async_api_view(session=True)
+async def task_events_async_view(request):
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    last_event_id = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+    if serves_asgi(request):
+        events = stream_task_events(request.user, last_event_id)
+    else:
+        events = iter_task_events(request.user, last_event_id)
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # stop nginx from buffering the stream
+    return response
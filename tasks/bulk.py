@@ -0,0 +1,122 @@
+import csv
+import io
+import json
+
+from django.db import transaction
+from django.db.models import Q
+
+from users.models import User
+from .models import Task
+from .serializers import BulkTaskRowSerializer
+from .signals import tasks_bulk_created
+
+BULK_CREATE_BATCH_SIZE = 500
+BULK_CREATE_MAX_ROWS = 20000
+
+
+class BulkUploadError(Exception):
+    pass
+
+
+def parse_task_upload(upload):
+    """
+    Read an uploaded CSV or JSON file into a list of row dicts.
+
+    CSV files need a header row with the columns title, description,
+    assigned_to and due_date. JSON files hold a list of objects with the
+    same keys, or an object with that list under "tasks".
+    """
+    try:
+        content = upload.read().decode('utf-8-sig')
+    except UnicodeDecodeError:
+        raise BulkUploadError("File must be UTF-8 encoded.")
+
+    if upload.name.lower().endswith('.json') or upload.content_type == 'application/json':
+        try:
+            rows = json.loads(content)
+        except ValueError:
+            raise BulkUploadError("File is not valid JSON.")
+        if isinstance(rows, dict):
+            rows = rows.get('tasks')
+        if not isinstance(rows, list):
+            raise BulkUploadError("JSON upload must be a list of tasks.")
+        return rows
+
+    return list(csv.DictReader(io.StringIO(content)))
+
+
+def resolve_assignees(rows, users=None):
+    """
+    Map every assigned_to value in rows (a username or user pkid) to a user
+    pkid using a single query. A value is a username first: an all-digit value
+    only falls back to the pkid when no user has it as username. Only users in
+    the users queryset (by default every user with the user role) can be
+    resolved.
+    """
+    values = set()
+    for row in rows:
+        value = str(row.get('assigned_to', '') if isinstance(row, dict) else '').strip()
+        if value:
+            values.add(value)
+    pkids = {int(value) for value in values if value.isdigit()}
+
+    by_pkid, by_username = {}, {}
+    users = User.objects.filter(role='user') if users is None else users
+    for pkid, username in users.filter(Q(pkid__in=pkids) | Q(username__in=values)).values_list('pkid', 'username'):
+        by_pkid[pkid] = pkid
+        by_username[username] = pkid
+
+    assignees = {}
+    for value in values:
+        if value in by_username:
+            assignees[value] = by_username[value]
+        elif value.isdigit() and int(value) in by_pkid:
+            assignees[value] = by_pkid[int(value)]
+    return assignees
+
+
+def bulk_create_tasks(rows, batch_size=BULK_CREATE_BATCH_SIZE, users=None):
+    """
+    Validate rows and insert the valid ones in batches inside one transaction.
+    Rows may only assign tasks to the users queryset (see resolve_assignees).
+
+    Returns the number of created tasks and a list of per-row errors, where
+    row numbers start at 1.
+    """
+    if not rows:
+        raise BulkUploadError("No tasks to create.")
+    if len(rows) > BULK_CREATE_MAX_ROWS:
+        raise BulkUploadError(f"A single upload can contain at most {BULK_CREATE_MAX_ROWS} tasks.")
+
+    assignees = resolve_assignees(rows, users)
+    tasks, errors = [], []
+    for number, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            errors.append({'row': number, 'errors': {'non_field_errors': ["Row must be an object."]}})
+            continue
+
+        serializer = BulkTaskRowSerializer(data=row)
+        if not serializer.is_valid():
+            errors.append({'row': number, 'errors': serializer.errors})
+            continue
+
+        data = serializer.validated_data
+        assigned_to_id = assignees.get(data['assigned_to'])
+        if assigned_to_id is None:
+            errors.append({'row': number, 'errors': {'assigned_to': ["User not found among your users."]}})
+            continue
+
+        tasks.append(Task(
+            title=data['title'],
+            description=data['description'],
+            assigned_to_id=assigned_to_id,
+            due_date=data['due_date'],
+            status='pending',
+        ))
+
+    with transaction.atomic():
+        for start in range(0, len(tasks), batch_size):
+            Task.objects.bulk_create(tasks[start:start + batch_size])
+        tasks_bulk_created.send(sender=Task, tasks=tasks)
+
+    return len(tasks), errors
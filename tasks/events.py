@@ -0,0 +1,153 @@
+import asyncio
+import json
+import queue
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+
+from common.events import event_hub
+from users.hierarchy import scope_user_ids
+from users.models import User
+
+EVENT_HEARTBEAT_SECONDS = 15
+EVENT_STREAM_SECONDS = 600  # streams end after this long and EventSource reconnects, resuming from Last-Event-ID
+EVENT_RETRY_MS = 3000
+
+
+def task_event(kind, task, changed=(), previous_assignee_id=None):
+    event = {
+        'type': f'task.{kind}',
+        'task': {
+            'id': task.pk,
+            'title': task.title,
+            'status': task.status,
+            'assigned_to': task.assigned_to_id,
+            'due_date': str(task.due_date),
+            'worked_hours': None if task.worked_hours is None else str(task.worked_hours),
+            'updated_at': task.updated_at.isoformat() if task.updated_at else None,
+        },
+        'changed': list(changed),
+    }
+    if previous_assignee_id is not None and previous_assignee_id != task.assigned_to_id:
+        event['previous_assigned_to'] = previous_assignee_id
+    return event
+
+
+def publish_task_events(events):
+    """
+    Publish events once the surrounding transaction commits, so streams never
+    show a write that was rolled back. A failing publish is logged rather
+    than failing the request that made the write.
+    """
+    if events:
+        transaction.on_commit(lambda: event_hub.publish(events), robust=True)
+
+
+def visible_assignees(user):
+    """
+    The assignee pkids whose task events user may see, or None for all of
+    them (superadmins).
+    """
+    if user.role == User.Roles.SUPERADMIN:
+        return None
+    if user.role == User.Roles.ADMIN:
+        return set(scope_user_ids(user).values_list('descendant_id', flat=True))
+    return {user.pkid}
+
+
+def is_visible(event, assignees):
+    if assignees is None:
+        return True
+    task = event.get('task', {})
+    return task.get('assigned_to') in assignees or event.get('previous_assigned_to') in assignees
+
+
+def format_event(event_id, event):
+    return f"id: {event_id}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+def replay_task_events(last_event_id, assignees):
+    """
+    The formatted events after last_event_id that assignees may see, and the
+    id of the last event replayed (0 when none), so live delivery can skip
+    events the replay already sent.
+    """
+    seen, chunks = 0, []
+    if last_event_id is not None:
+        for event_id, event in event_hub.replay(last_event_id):
+            seen = event_id
+            if is_visible(event, assignees):
+                chunks.append(format_event(event_id, event))
+    return seen, chunks
+
+
+async def stream_task_events(user, last_event_id=None):
+    """
+    Yield Server-Sent Events for the task writes user may see: first the
+    ones published after last_event_id that are still held for replay, then
+    live ones, with a comment line every EVENT_HEARTBEAT_SECONDS to keep
+    proxies from closing an idle connection. For ASGI.
+    """
+    assignees = await sync_to_async(visible_assignees)(user)
+    loop = asyncio.get_running_loop()
+    subscription = await sync_to_async(event_hub.subscribe)(loop)
+    deadline = loop.time() + EVENT_STREAM_SECONDS
+    try:
+        yield f"retry: {EVENT_RETRY_MS}\n\n"
+        seen, chunks = await sync_to_async(replay_task_events)(last_event_id, assignees)
+        for chunk in chunks:
+            yield chunk
+
+        # a subscriber that fell too far behind is cut off and catches up by reconnecting
+        while not subscription.overflowed:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            try:
+                event_id, event = await subscription.get(min(EVENT_HEARTBEAT_SECONDS, remaining))
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if event_id > seen and is_visible(event, assignees):
+                yield format_event(event_id, event)
+    finally:
+        event_hub.unsubscribe(subscription)
+
+
+def iter_task_events(user, last_event_id=None):
+    """
+    Synchronous stream_task_events for WSGI, where Django would read an
+    async iterator to the end before sending anything. The stream holds a
+    worker thread for as long as it stays open.
+    """
+    assignees = visible_assignees(user)
+    subscription = event_hub.subscribe()
+    deadline = time.monotonic() + EVENT_STREAM_SECONDS
+    try:
+        yield f"retry: {EVENT_RETRY_MS}\n\n"
+        seen, chunks = replay_task_events(last_event_id, assignees)
+        yield from chunks
+
+        while not subscription.overflowed:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                event_id, event = subscription.get(min(EVENT_HEARTBEAT_SECONDS, remaining))
+            except queue.Empty:
+                yield ": keepalive\n\n"
+                continue
+            if event_id > seen and is_visible(event, assignees):
+                yield format_event(event_id, event)
+    finally:
+        event_hub.unsubscribe(subscription)
+
+
+def serves_asgi(request):
+    """
+    Whether request came in through ASGI, where an open event stream costs
+    no worker thread.
+    """
+    return isinstance(request, ASGIRequest)
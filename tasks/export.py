@@ -0,0 +1,71 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.dateparse import parse_date
+
+from .models import Task
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FIELDS = [
+    ('id', 'id'),
+    ('title', 'title'),
+    ('status', 'status'),
+    ('due_date', 'due_date'),
+    ('assigned_to', 'assigned_to__username'),
+    ('assigned_to_email', 'assigned_to__email'),
+    ('worked_hours', 'worked_hours'),
+    ('completion_report', 'completion_report'),
+    ('created_at', 'created_at'),
+    ('updated_at', 'updated_at'),
+]
+
+
+class Echo:
+    """
+    File-like object whose write() returns the value, so csv.writer output
+    can be yielded straight into a streaming response.
+    """
+
+    def write(self, value):
+        return value
+
+
+def filter_export_tasks(params):
+    """
+    Tasks matching the export filters: status, assigned_to (user pkid) and a
+    due_from/due_to due date range. Raises ValueError for malformed dates.
+    """
+    tasks = Task.objects.all()
+    if params.get('status') in dict(Task.STATUS_CHOICES):
+        tasks = tasks.filter(status=params['status'])
+    if params.get('assigned_to', '').isdigit():
+        tasks = tasks.filter(assigned_to_id=params['assigned_to'])
+    for param, lookup in [('due_from', 'due_date__gte'), ('due_to', 'due_date__lte')]:
+        if params.get(param):
+            try:
+                value = parse_date(params[param])
+            except ValueError:
+                value = None
+            if value is None:
+                raise ValueError(f"{param} must be a date in YYYY-MM-DD format.")
+            tasks = tasks.filter(**{lookup: value})
+    return tasks
+
+
+def export_rows(tasks):
+    lookups = [lookup for name, lookup in EXPORT_FIELDS]
+    return tasks.order_by('id').values_list(*lookups).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def stream_csv(tasks):
+    writer = csv.writer(Echo())
+    yield writer.writerow([name for name, lookup in EXPORT_FIELDS])
+    for row in export_rows(tasks):
+        yield writer.writerow(row)
+
+
+def stream_ndjson(tasks):
+    names = [name for name, lookup in EXPORT_FIELDS]
+    for row in export_rows(tasks):
+        yield json.dumps(dict(zip(names, row)), cls=DjangoJSONEncoder) + '\n'
@@ -0,0 +1,110 @@
+import contextvars
+import datetime
+from contextlib import contextmanager
+
+from django.utils import timezone
+
+from .models import Task, TaskChange
+
+HISTORY_FIELDS = ('title', 'description', 'assigned_to_id', 'due_date', 'status', 'completion_report', 'worked_hours')
+HISTORY_RETAIN_DAYS = 365
+HISTORY_PRUNE_BATCH_SIZE = 1000
+
+Actions = TaskChange.Actions
+
+_actor = contextvars.ContextVar('task_history_actor', default=None)
+
+
+@contextmanager
+def changes_by(user):
+    """
+    Record task writes made inside the block as made by user.
+    """
+    token = _actor.set(getattr(user, 'pkid', None))
+    try:
+        yield
+    finally:
+        _actor.reset(token)
+
+
+def history_values(task, fields=HISTORY_FIELDS):
+    """
+    The task's current values of fields, cleaned the way the database would
+    store them, so a due date assigned as a string compares equal to the
+    date it was loaded as.
+    """
+    return {field: Task._meta.get_field(field).to_python(getattr(task, field)) for field in fields}
+
+
+def saved_history_values(task):
+    """
+    The values fields had before this save: the row Task.save read and locked
+    just before writing it, so they hold whatever the last save committed.
+    """
+    saved = getattr(task, '_saved_values', None) or {}
+    return {field: saved[field] for field in HISTORY_FIELDS if field in saved}
+
+
+def created_change(task, values):
+    return TaskChange(
+        task_id=task.pk,
+        changed_by_id=_actor.get(),
+        action=Actions.CREATED,
+        changes={field: [None, value] for field, value in values.items() if value not in (None, '')},
+    )
+
+
+def record_task_saved(task, created, update_fields=None):
+    """
+    Append a TaskChange for a saved task holding only the fields that
+    changed, and return those changes. Called from post_save, inside the
+    transaction of the save.
+    """
+    fields = HISTORY_FIELDS
+    if update_fields is not None:
+        # update_fields may name the foreign key as assigned_to or assigned_to_id
+        fields = [field for field in HISTORY_FIELDS if {field, field.removesuffix('_id')} & set(update_fields)]
+    values = history_values(task, fields)
+    if created:
+        change = created_change(task, values)
+        change.save()
+        changes = change.changes
+    else:
+        before = getattr(task, '_history_values', None) or {}
+        changes = {field: [before.get(field), value] for field, value in values.items() if before.get(field) != value}
+        if changes:
+            TaskChange.objects.create(task_id=task.pk, changed_by_id=_actor.get(), changes=changes)
+    return changes
+
+
+def record_tasks_created(tasks):
+    """
+    Append a created entry for every task inserted with bulk_create, which
+    sends no post_save.
+    """
+    TaskChange.objects.bulk_create(
+        [created_change(task, history_values(task)) for task in tasks if task.pk is not None],
+        batch_size=HISTORY_PRUNE_BATCH_SIZE,
+    )
+
+
+def task_timeline(task_id):
+    """
+    A task's changes, newest first, read from task_change_timeline_idx.
+    """
+    return TaskChange.objects.filter(task_id=task_id).select_related('changed_by').order_by('-changed_at', '-id')
+
+
+def prune_task_history(days=HISTORY_RETAIN_DAYS, batch_size=HISTORY_PRUNE_BATCH_SIZE, now=None):
+    """
+    Delete history entries older than days days, batch_size rows per
+    statement so each delete holds the write lock only briefly. Returns the
+    number of deleted entries.
+    """
+    cutoff = (now or timezone.now()) - datetime.timedelta(days=days)
+    deleted = 0
+    while True:
+        ids = list(TaskChange.objects.filter(changed_at__lt=cutoff).order_by('changed_at').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += TaskChange.objects.filter(id__in=ids).delete()[0]
@@ -0,0 +1,95 @@
+import tempfile
+import uuid
+from itertools import groupby
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.mail import send_mass_mail
+
+from jobs.registry import job
+from users.hierarchy import scope_tasks
+from users.models import User
+from .export import filter_export_tasks, stream_csv, stream_ndjson
+from .history import HISTORY_RETAIN_DAYS, prune_task_history
+from .models import OverdueFlag, Task
+from .overdue import DUE_SOON_DAYS, queue_overdue_notification, scan_overdue_tasks
+
+EXPORT_OUTPUTS = {
+    'csv': (stream_csv, 'csv'),
+    'ndjson': (stream_ndjson, 'ndjson'),
+}
+
+
+@job('tasks.notify_assignment')
+def notify_assignment(task_ids):
+    """
+    Email each assignee the tasks in task_ids that were assigned to them, one
+    message per user.
+    """
+    tasks = Task.objects.filter(id__in=task_ids).select_related('assigned_to').order_by('assigned_to_id', 'due_date')
+    messages = []
+    for user, user_tasks in groupby(tasks, key=lambda task: task.assigned_to):
+        lines = [f"- {task.title} (due {task.due_date:%Y-%m-%d})" for task in user_tasks]
+        subject = "New task assigned to you" if len(lines) == 1 else f"{len(lines)} new tasks assigned to you"
+        body = f"Hi {user.name or user.username},\n\nYou have been assigned:\n" + "\n".join(lines) + "\n"
+        messages.append((subject, body, settings.DEFAULT_FROM_EMAIL, [user.email]))
+    return {'emails': send_mass_mail(messages, fail_silently=False) if messages else 0}
+
+
+@job('tasks.notify_overdue')
+def notify_overdue(task_ids):
+    """
+    Email each assignee the tasks in task_ids that the overdue scanner
+    flagged for them, one message per user.
+    """
+    tasks = (
+        Task.objects.filter(id__in=task_ids, overdue_flag__isnull=False)
+        .select_related('assigned_to', 'overdue_flag')
+        .order_by('assigned_to_id', 'due_date')
+    )
+    messages = []
+    for user, user_tasks in groupby(tasks, key=lambda task: task.assigned_to):
+        lines = [
+            f"- {task.title} ({'overdue' if task.overdue_flag.level == OverdueFlag.Levels.OVERDUE else 'due'} "
+            f"{task.due_date:%Y-%m-%d})"
+            for task in user_tasks
+        ]
+        subject = "A task needs your attention" if len(lines) == 1 else f"{len(lines)} tasks need your attention"
+        body = f"Hi {user.name or user.username},\n\nThese tasks are overdue or due soon:\n" + "\n".join(lines) + "\n"
+        messages.append((subject, body, settings.DEFAULT_FROM_EMAIL, [user.email]))
+    return {'emails': send_mass_mail(messages, fail_silently=False) if messages else 0}
+
+
+@job('tasks.scan_overdue', max_attempts=3)
+def scan_overdue(days=DUE_SOON_DAYS, notify=True):
+    """
+    Run the overdue scanner, queueing one notification job per batch of
+    newly flagged tasks.
+    """
+    return scan_overdue_tasks(days=days, on_flagged=queue_overdue_notification if notify else None)
+
+
+@job('tasks.prune_history', max_attempts=3)
+def prune_history(days=HISTORY_RETAIN_DAYS):
+    """
+    Delete task history entries older than days days.
+    """
+    return {'deleted': prune_task_history(days=days)}
+
+
+@job('tasks.export', max_attempts=3)
+def export_tasks(filters, user_id, output='csv'):
+    """
+    Write the tasks matching filters (see filter_export_tasks) that the user
+    with pkid user_id may see to a file in the default storage under exports/
+    and return its name.
+    """
+    stream, extension = EXPORT_OUTPUTS[output]
+    tasks = scope_tasks(User.objects.get(pkid=user_id), filter_export_tasks(filters))
+    with tempfile.TemporaryFile(mode='w+b') as buffer:
+        for chunk in stream(tasks):
+            buffer.write(chunk.encode())
+        buffer.seek(0)
+        name = default_storage.save(f'exports/tasks-{uuid.uuid4().hex}.{extension}', File(buffer))
+    return {'file': name, 'output': output}
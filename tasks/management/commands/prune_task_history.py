@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from jobs.registry import enqueue
+from tasks.history import HISTORY_PRUNE_BATCH_SIZE, HISTORY_RETAIN_DAYS, prune_task_history
+
+
+class Command(BaseCommand):
+    help = "Delete task change history entries older than --days days."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=HISTORY_RETAIN_DAYS, help="Keep entries from this many days back.")
+        parser.add_argument("--batch-size", type=int, default=HISTORY_PRUNE_BATCH_SIZE, help="Entries deleted per statement.")
+        parser.add_argument("--defer", action="store_true", help="Queue the pruning for the job worker instead.")
+
+    def handle(self, *args, **options):
+        if options["defer"]:
+            job = enqueue("tasks.prune_history", {"days": options["days"]})
+            self.stdout.write(self.style.SUCCESS(f"Queued job #{job.pk}."))
+            return
+
+        deleted = prune_task_history(days=options["days"], batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} history entries."))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from jobs.registry import enqueue
+from tasks.overdue import DUE_SOON_DAYS, OVERDUE_BATCH_SIZE, queue_overdue_notification, scan_overdue_tasks
+
+
+class Command(BaseCommand):
+    help = (
+        "Flag open tasks that are overdue or due within --days days and queue emails to their assignees. "
+        "Tasks flagged by an earlier run are skipped unless their due date changed or they became overdue."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=DUE_SOON_DAYS, help="Also flag tasks due within this many days.")
+        parser.add_argument("--batch-size", type=int, default=OVERDUE_BATCH_SIZE, help="Tasks read per keyset batch.")
+        parser.add_argument("--no-notify", action="store_true", help="Record the flags without queueing emails.")
+        parser.add_argument("--defer", action="store_true", help="Queue the scan for the job worker instead.")
+
+    def handle(self, *args, **options):
+        if options["defer"]:
+            job = enqueue("tasks.scan_overdue", {"days": options["days"], "notify": not options["no_notify"]})
+            self.stdout.write(self.style.SUCCESS(f"Queued job #{job.pk}."))
+            return
+
+        on_flagged = None if options["no_notify"] else queue_overdue_notification
+        result = scan_overdue_tasks(days=options["days"], batch_size=options["batch_size"], on_flagged=on_flagged)
+        self.stdout.write(self.style.SUCCESS(
+            f"Flagged {result['flagged']} tasks, escalated {result['escalated']} to overdue, cleared {result['cleared']}."
+        ))
@@ -0,0 +1,72 @@
+from django.db import migrations
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE tasks_task_fts USING fts5(
+        title, description, completion_report,
+        content='tasks_task', content_rowid='id', tokenize='unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER tasks_task_fts_insert AFTER INSERT ON tasks_task BEGIN
+        INSERT INTO tasks_task_fts(rowid, title, description, completion_report)
+        VALUES (new.id, new.title, new.description, new.completion_report);
+    END
+    """,
+    """
+    CREATE TRIGGER tasks_task_fts_delete AFTER DELETE ON tasks_task BEGIN
+        INSERT INTO tasks_task_fts(tasks_task_fts, rowid, title, description, completion_report)
+        VALUES ('delete', old.id, old.title, old.description, old.completion_report);
+    END
+    """,
+    """
+    CREATE TRIGGER tasks_task_fts_update AFTER UPDATE OF title, description, completion_report ON tasks_task BEGIN
+        INSERT INTO tasks_task_fts(tasks_task_fts, rowid, title, description, completion_report)
+        VALUES ('delete', old.id, old.title, old.description, old.completion_report);
+        INSERT INTO tasks_task_fts(rowid, title, description, completion_report)
+        VALUES (new.id, new.title, new.description, new.completion_report);
+    END
+    """,
+    "INSERT INTO tasks_task_fts(tasks_task_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS tasks_task_fts_update",
+    "DROP TRIGGER IF EXISTS tasks_task_fts_delete",
+    "DROP TRIGGER IF EXISTS tasks_task_fts_insert",
+    "DROP TABLE IF EXISTS tasks_task_fts",
+]
+
+POSTGRESQL_FORWARD = [
+    """
+    CREATE INDEX tasks_task_search_idx ON tasks_task USING GIN (
+        to_tsvector('english', coalesce(tasks_task.title, '') || ' ' ||
+        coalesce(tasks_task.description, '') || ' ' || coalesce(tasks_task.completion_report, ''))
+    )
+    """,
+]
+
+POSTGRESQL_BACKWARD = [
+    "DROP INDEX IF EXISTS tasks_task_search_idx",
+]
+
+
+def run_statements(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0003_task_assignee_status_due_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_statements({'sqlite': SQLITE_FORWARD, 'postgresql': POSTGRESQL_FORWARD}),
+            run_statements({'sqlite': SQLITE_BACKWARD, 'postgresql': POSTGRESQL_BACKWARD}),
+        ),
+    ]
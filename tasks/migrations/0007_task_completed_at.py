@@ -0,0 +1,25 @@
+# Generated by Django 5.2 on 2026-10-18 14:44
+
+from django.db import migrations, models
+
+
+def backfill_completed_at(apps, schema_editor):
+    # the best record of when an existing task was completed is its last update
+    Task = apps.get_model('tasks', 'Task')
+    Task.objects.filter(status='completed').update(completed_at=models.F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_overdue_scanner'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_completed_at, migrations.RunPython.noop),
+    ]
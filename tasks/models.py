@@ -1,6 +1,16 @@
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, router, transaction
+from django.db.models import Q
+from django.utils import timezone
 from users.models import User 
 
+# fields the save hooks compare before and after a save: change history and dashboard rollups
+SAVED_VALUE_FIELDS = (
+    'title', 'description', 'assigned_to_id', 'due_date', 'status', 'completion_report', 'worked_hours',
+    'created_at', 'completed_at',
+)
+
+
 class Task(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -15,9 +25,98 @@ class Task(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     completion_report = models.TextField(blank=True, null=True)
     worked_hours = models.DecimalField(max_digits=5, decimal_places=2, blank=True, null=True)
+    completed_at = models.DateTimeField(blank=True, null=True, editable=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # serves the per-user task list filtered by status and paged by (due_date, id)
+            models.Index(fields=['assigned_to', 'status', 'due_date', 'id'], name='task_assignee_status_due_idx'),
+            # covers the per-user count and max(updated_at) behind the task list ETag
+            models.Index(fields=['assigned_to', 'updated_at'], name='task_assignee_updated_idx'),
+            # open tasks by deadline for the overdue scanner; completed tasks, the bulk of the table, are left out
+            models.Index(fields=['due_date', 'id'], condition=~Q(status='completed'), name='task_open_due_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # completed_at is when the task last became completed; it buckets the worked hours rollups
+        if self.status == 'completed' and self.completed_at is None:
+            self.completed_at = timezone.now()
+        elif self.status != 'completed':
+            self.completed_at = None
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'status' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'completed_at'}
+        # post_save handlers (change history, dashboard rollups) write in the same transaction as the task
+        using = kwargs.get('using') or router.db_for_write(Task, instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            self._saved_values = None
+            if not self._state.adding and self.pk is not None:
+                # the row this save replaces, locked until commit, so concurrent saves of the task
+                # each diff against the other's result instead of against what they loaded
+                self._saved_values = (
+                    Task.objects.using(using).select_for_update().filter(pk=self.pk).values(*SAVED_VALUE_FIELDS).first()
+                )
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(Task, instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            # post_delete handlers take the counts out of what was stored, not what was loaded
+            self._saved_values = Task.objects.using(using).select_for_update().filter(pk=self.pk).values(*SAVED_VALUE_FIELDS).first()
+            return super().delete(*args, **kwargs)
+
+    def __str__(self):
+        return self.title
+
+
+class OverdueFlag(models.Model):
+    """
+    What the overdue scanner last flagged a task as. A flag stays valid while
+    the task keeps the due date it was flagged for, so reruns of the scanner
+    only write (and notify about) tasks that are new to the list, moved from
+    due soon to overdue, or had their deadline changed.
+    """
+
+    class Levels(models.TextChoices):
+        DUE_SOON = 'due_soon', 'Due soon'
+        OVERDUE = 'overdue', 'Overdue'
+
+    task = models.OneToOneField(Task, on_delete=models.CASCADE, primary_key=True, related_name='overdue_flag')
+    level = models.CharField(max_length=20, choices=Levels.choices)
+    due_date = models.DateField()
+    flagged_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.task_id}: {self.level} ({self.due_date})"
+
+
+class TaskChange(models.Model):
+    """
+    One write to a task: who made it, when, and {field: [old, new]} for the
+    fields it changed. Rows are only ever inserted (and pruned when old), so
+    a task's timeline is a range scan over task_change_timeline_idx.
+    """
+
+    class Actions(models.TextChoices):
+        CREATED = 'created', 'Created'
+        UPDATED = 'updated', 'Updated'
+
+    # task_change_timeline_idx starts with task, so the foreign key needs no index of its own
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='changes', db_index=False)
+    changed_by = models.ForeignKey(User, on_delete=models.SET_NULL, blank=True, null=True, related_name='+')
+    changed_at = models.DateTimeField(default=timezone.now)
+    action = models.CharField(max_length=10, choices=Actions.choices, default=Actions.UPDATED)
+    changes = models.JSONField(encoder=DjangoJSONEncoder)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['task', 'changed_at', 'id'], name='task_change_timeline_idx'),
+            # lets pruning find old entries without reading the whole table
+            models.Index(fields=['changed_at'], name='task_change_time_idx'),
+        ]
+
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return f"{self.task_id} {self.action} at {self.changed_at:%Y-%m-%d %H:%M}"
@@ -0,0 +1,89 @@
+import datetime
+
+from django.db.models import F, Q
+from django.utils import timezone
+
+from jobs.registry import enqueue
+from .models import OverdueFlag, Task
+
+OVERDUE_BATCH_SIZE = 500
+DUE_SOON_DAYS = 2
+
+Levels = OverdueFlag.Levels
+
+
+def open_tasks_due_by(horizon):
+    """
+    Open tasks due on or before horizon, in (due_date, id) order. The filter
+    matches the condition of the partial task_open_due_idx index, so the
+    database walks that index instead of the whole task table.
+    """
+    return Task.objects.filter(~Q(status='completed'), due_date__lte=horizon).order_by('due_date', 'id')
+
+
+def queue_overdue_notification(task_ids):
+    enqueue('tasks.notify_overdue', {'task_ids': task_ids})
+
+
+def flag_level(due_date, today):
+    return Levels.OVERDUE if due_date < today else Levels.DUE_SOON
+
+
+def iter_keyset_batches(queryset, batch_size):
+    """
+    Yield lists of at most batch_size rows from a queryset ordered by
+    (due_date, id), each batch picking up after the last row of the one before
+    instead of using OFFSET, so memory and per-batch cost stay constant.
+    """
+    after = None
+    while True:
+        batch = queryset
+        if after is not None:
+            # the redundant due_date__gte lets the index seek straight to the last position
+            batch = batch.filter(Q(due_date__gt=after[0]) | Q(due_date=after[0], id__gt=after[1]), due_date__gte=after[0])
+        rows = list(batch[:batch_size])
+        if not rows:
+            return
+        yield rows
+        if len(rows) < batch_size:
+            return
+        after = rows[-1]['due_date'], rows[-1]['id']
+
+
+def scan_overdue_tasks(days=DUE_SOON_DAYS, batch_size=OVERDUE_BATCH_SIZE, today=None, on_flagged=None):
+    """
+    Flag open tasks that are overdue or due within days days.
+
+    Tasks whose flag still holds (same due date, same level) are skipped in
+    the query itself, so a rerun only touches what changed since the last
+    scan. Flags of tasks that were completed or moved past the horizon are
+    cleared. on_flagged, when given, is called with the ids of each batch of
+    newly flagged tasks.
+
+    Returns counts of flagged, escalated (due soon to overdue) and cleared tasks.
+    """
+    today = today or timezone.localdate()
+    horizon = today + datetime.timedelta(days=days)
+    result = {'flagged': 0, 'escalated': 0, 'cleared': 0}
+
+    # a flag still holds while the due date is unchanged and the level cannot have gone up
+    current = Q(overdue_flag__due_date=F('due_date')) & (Q(overdue_flag__level=Levels.OVERDUE) | Q(due_date__gte=today))
+    tasks = open_tasks_due_by(horizon).filter(~current).values('id', 'due_date', 'overdue_flag__level')
+
+    for rows in iter_keyset_batches(tasks, batch_size):
+        now = timezone.now()
+        flags = [
+            OverdueFlag(task_id=row['id'], level=flag_level(row['due_date'], today), due_date=row['due_date'], flagged_at=now)
+            for row in rows
+        ]
+        OverdueFlag.objects.bulk_create(
+            flags, update_conflicts=True, unique_fields=['task'], update_fields=['level', 'due_date', 'flagged_at'],
+        )
+        escalated = sum(1 for row in rows if row['overdue_flag__level'] == Levels.DUE_SOON and row['due_date'] < today)
+        result['escalated'] += escalated
+        result['flagged'] += len(rows) - escalated
+        if on_flagged is not None:
+            on_flagged([row['id'] for row in rows])
+
+    result['cleared'] = OverdueFlag.objects.filter(Q(task__status='completed') | Q(task__due_date__gt=horizon)).delete()[0]
+    return result
@@ -0,0 +1,174 @@
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, PageNumberPagination, _reverse_ordering
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    CursorPagination whose cursor holds the values of every ordering field,
+    not only the first. DRF filters on the first field and steps over rows
+    that tie on it with an OFFSET, so a page deep into same-date tasks costs
+    LIMIT n OFFSET m; here the next page starts with a (a, b) > (x, y) seek
+    and never needs an offset. The ordering must end in a unique field.
+    """
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for order in ordering:
+            name = order.lstrip("-")
+            values.append(str(instance[name] if isinstance(instance, dict) else getattr(instance, name)))
+        return json.dumps(values)
+
+    def keyset_filter(self, ordering, position, reverse):
+        """
+        Q matching the rows after position in ordering (before it when
+        reverse), expanded as (a > x) OR (a = x AND b > y) ..., with a
+        redundant a >= x so the index seeks straight to the position.
+        """
+        fields = [(order.lstrip("-"), "lt" if order.startswith("-") != reverse else "gt") for order in ordering]
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(fields):
+            raise NotFound(self.invalid_cursor_message)
+
+        after = Q()
+        for index, ((name, lookup), value) in enumerate(zip(fields, values)):
+            equal = {earlier: earlier_value for (earlier, _), earlier_value in zip(fields[:index], values[:index])}
+            after |= Q(**equal, **{f"{name}__{lookup}": value})
+        first, lookup = fields[0]
+        return after & Q(**{f"{first}__{lookup}e": values[0]})
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # CursorPagination.paginate_queryset with the keyset filter in place of the first-field one
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            try:
+                queryset = queryset.filter(self.keyset_filter(self.ordering, current_position, reverse))
+            except ValidationError:
+                raise NotFound(self.invalid_cursor_message)
+
+        # positions are unique, so offset stays 0 for every cursor this class hands out
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = list(results[:self.page_size])
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+
+# keyset pagination over (due_date, id), served by the task_assignee_status_due_idx index
+class TaskCursorPagination(KeysetCursorPagination):
+    ordering = ("due_date", "id")
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+# keyset pagination over a task's history, newest first, served by task_change_timeline_idx
+class TaskHistoryCursorPagination(KeysetCursorPagination):
+    ordering = ("-changed_at", "-id")
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+# page number pagination that can skip the COUNT(*) query with ?count=false
+class TaskPageNumberPagination(PageNumberPagination):
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    count_query_param = "count"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.with_count = request.query_params.get(self.count_query_param, "true").lower() not in ("false", "0", "no")
+        if self.with_count:
+            return super().paginate_queryset(queryset, request, view)
+
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        try:
+            self.page_number = max(int(request.query_params.get(self.page_query_param, 1)), 1)
+        except ValueError:
+            self.page_number = 1
+
+        # fetch one extra row to learn whether a next page exists
+        offset = (self.page_number - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+        self.has_next = len(rows) > page_size
+        return rows[:page_size]
+
+    def get_next_link(self):
+        if self.with_count:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        return self._page_link(self.page_number + 1)
+
+    def get_previous_link(self):
+        if self.with_count:
+            return super().get_previous_link()
+        if self.page_number <= 1:
+            return None
+        return self._page_link(self.page_number - 1)
+
+    def _page_link(self, page_number):
+        return replace_query_param(self.request.build_absolute_uri(), self.page_query_param, page_number)
+
+    def get_paginated_response(self, data):
+        if self.with_count:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ("next", self.get_next_link()),
+            ("previous", self.get_previous_link()),
+            ("results", data),
+        ]))
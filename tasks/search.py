@@ -0,0 +1,82 @@
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+SEARCH_FIELDS = ['title', 'description', 'completion_report']
+FTS_TABLE = 'tasks_task_fts'
+# same expression as the tasks_task_search_idx GIN index on PostgreSQL
+PG_DOCUMENT = (
+    "to_tsvector('english', coalesce(tasks_task.title, '') || ' ' || "
+    "coalesce(tasks_task.description, '') || ' ' || coalesce(tasks_task.completion_report, ''))"
+)
+
+TERM_RE = re.compile(r'"([^"]+)"|(\S+)')
+WORD_RE = re.compile(r'\w+')
+
+
+def parse_search_terms(query):
+    """
+    Split a search box query into terms. Returns (words, is_phrase, is_prefix)
+    tuples: "quoted text" is a phrase and a trailing * makes a prefix term.
+    """
+    terms = []
+    for phrase, word in TERM_RE.findall(query):
+        words = WORD_RE.findall(phrase or word)
+        if words:
+            terms.append((words, bool(phrase), not phrase and word.endswith('*')))
+    return terms
+
+
+def fts5_query(terms):
+    parts = []
+    for words, is_phrase, is_prefix in terms:
+        part = '"%s"' % ' '.join(words)
+        parts.append(part + '*' if is_prefix else part)
+    return ' '.join(parts)
+
+
+def tsquery(terms):
+    parts = []
+    for words, is_phrase, is_prefix in terms:
+        if is_prefix:
+            words = words[:-1] + [words[-1] + ':*']
+        parts.append('(%s)' % ' <-> '.join(words))
+    return ' & '.join(parts)
+
+
+def search_tasks(queryset, query):
+    """
+    Filter a task queryset down to full text matches for query and annotate
+    each task with search_rank (lower is better), using the FTS5 index on
+    SQLite and the tsvector GIN index on PostgreSQL.
+    """
+    terms = parse_search_terms(query)
+    if not terms:
+        return queryset.annotate(search_rank=Value(0.0)).none()
+
+    if connection.vendor == 'sqlite':
+        match = fts5_query(terms)
+        return queryset.filter(
+            id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match])
+        ).annotate(search_rank=RawSQL(
+            f"SELECT bm25({FTS_TABLE}) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid = tasks_task.id",
+            [match],
+            output_field=FloatField(),
+        ))
+
+    if connection.vendor == 'postgresql':
+        ts = tsquery(terms)
+        return queryset.alias(
+            search_match=RawSQL(f"{PG_DOCUMENT} @@ to_tsquery('english', %s)", [ts], output_field=BooleanField())
+        ).filter(search_match=True).annotate(
+            search_rank=RawSQL(f"-ts_rank({PG_DOCUMENT}, to_tsquery('english', %s))", [ts], output_field=FloatField())
+        )
+
+    # no full text index on other backends
+    condition = Q()
+    for words, is_phrase, is_prefix in terms:
+        term = ' '.join(words)
+        condition &= Q(*[Q(**{f'{field}__icontains': term}) for field in SEARCH_FIELDS], _connector=Q.OR)
+    return queryset.filter(condition).annotate(search_rank=Value(0.0))
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Task
+from .models import Task, TaskChange
 
 class TaskSerializer(serializers.ModelSerializer):
     class Meta:
@@ -17,3 +17,33 @@ class TaskStatusUpdateSerializer(serializers.ModelSerializer):
             if not data.get('completion_report') or not data.get('worked_hours'):
                 raise serializers.ValidationError("Completion report and worked hours are required when marking task as completed.")
         return data
+
+
+class BulkTaskRowSerializer(serializers.Serializer):
+    title = serializers.CharField(max_length=255)
+    description = serializers.CharField()
+    assigned_to = serializers.CharField(help_text="Username of the assignee, or their pkid when no user has it as username.")
+    due_date = serializers.DateField()
+
+
+class OverdueTaskSerializer(serializers.ModelSerializer):
+    level = serializers.SerializerMethodField()
+    days_overdue = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Task
+        fields = ['id', 'title', 'assigned_to', 'due_date', 'status', 'level', 'days_overdue']
+
+    def get_level(self, task):
+        return 'overdue' if task.due_date < self.context['today'] else 'due_soon'
+
+    def get_days_overdue(self, task):
+        return (self.context['today'] - task.due_date).days
+
+
+class TaskChangeSerializer(serializers.ModelSerializer):
+    changed_by_username = serializers.CharField(source='changed_by.username', default=None, read_only=True)
+
+    class Meta:
+        model = TaskChange
+        fields = ['id', 'changed_at', 'action', 'changed_by', 'changed_by_username', 'changes']
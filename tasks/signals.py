@@ -0,0 +1,55 @@
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from jobs.registry import enqueue
+from .events import publish_task_events, task_event
+from .history import record_task_saved, record_tasks_created, saved_history_values
+from .models import Task
+
+# sent after Task.objects.bulk_create, which skips post_save; receivers get the created tasks
+tasks_bulk_created = Signal()
+
+
+@receiver(pre_save, sender=Task)
+def remember_task_values(sender, instance, raw=False, **kwargs):
+    if raw or instance._state.adding or instance.pk is None:
+        instance._history_values = None
+        instance._previous_assignee_id = None
+        return
+
+    instance._history_values = saved_history_values(instance)
+    instance._previous_assignee_id = instance._history_values.get('assigned_to_id')
+
+
+# history entry in the save's transaction, live event once it commits; a save that changed nothing gets neither
+@receiver(post_save, sender=Task)
+def record_task_history(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    changes = record_task_saved(instance, created, update_fields)
+    if changes:
+        publish_task_events([
+            task_event('created' if created else 'updated', instance, changes, getattr(instance, '_previous_assignee_id', None))
+        ])
+
+
+# tell the assignee about new and reassigned tasks, from the job worker
+@receiver(post_save, sender=Task)
+def queue_assignment_notification(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created or instance.assigned_to_id != getattr(instance, '_previous_assignee_id', instance.assigned_to_id):
+        enqueue('tasks.notify_assignment', {'task_ids': [instance.pk]})
+
+
+@receiver(tasks_bulk_created)
+def queue_bulk_assignment_notification(sender, tasks, **kwargs):
+    task_ids = [task.pk for task in tasks if task.pk is not None]
+    if task_ids:
+        enqueue('tasks.notify_assignment', {'task_ids': task_ids})
+
+
+@receiver(tasks_bulk_created)
+def record_bulk_task_history(sender, tasks, **kwargs):
+    record_tasks_created(tasks)
+    publish_task_events([task_event('created', task) for task in tasks if task.pk is not None])
@@ -1,3 +1,614 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import json
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection
+from asgiref.sync import sync_to_async
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, transaction
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from common.events import event_hub
+from users.models import User
+from .events import iter_task_events, replay_task_events, stream_task_events, visible_assignees
+from .history import changes_by, task_timeline
+from .jobs import export_tasks
+from . import bulk
+from .bulk import BulkUploadError, bulk_create_tasks, parse_task_upload
+from .models import OverdueFlag, Task
+from .overdue import scan_overdue_tasks
+
+# an in-memory throttle store, so test runs neither share nor use up the on-disk allowances
+TEST_THROTTLE_STORE = {"PATH": ":memory:"}
+
+
+def make_user(username, role="user", admin=None, **extra):
+    return User.objects.create(
+        username=username, email=f"{username}@example.com", mobile=username[-15:], name=username,
+        role=role, assigned_admin=admin, is_staff=role != "user", **extra,
+    )
+
+
+def make_task(user, due_date=datetime.date(2030, 1, 1), **extra):
+    extra = {"title": "Task", "description": "d", **extra}
+    return Task.objects.create(assigned_to=user, due_date=due_date, **extra)
+
+
+def api_client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+@override_settings(THROTTLE_STORE=TEST_THROTTLE_STORE)
+class TaskCursorPaginationTests(TestCase):
+    def setUp(self):
+        self.user = make_user("cursor_user")
+        # every task due the same day, so only the id tells them apart
+        self.tasks = [make_task(self.user) for _ in range(12)]
+        self.client = api_client(self.user)
+
+    def pages(self, url):
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            yield response.json(), queries
+            url = response.json()["next"]
+
+    def test_pages_through_same_date_ties_without_offset(self):
+        seen = []
+        url = reverse("task-list") + "?pagination=cursor&page_size=5"
+        for page, queries in self.pages(url):
+            seen += [task["id"] for task in page["results"]]
+            for query in queries.captured_queries:
+                self.assertNotIn("OFFSET", query["sql"])
+        self.assertEqual(seen, [task.id for task in self.tasks])
+
+    def test_previous_link_returns_the_earlier_page(self):
+        url = reverse("task-list") + "?pagination=cursor&page_size=5"
+        first = self.client.get(url).json()
+        second = self.client.get(first["next"]).json()
+        back = self.client.get(second["previous"]).json()
+        self.assertEqual([t["id"] for t in back["results"]], [t["id"] for t in first["results"]])
+
+    def test_malformed_cursor_is_not_found(self):
+        response = self.client.get(reverse("task-list") + "?pagination=cursor&cursor=cD1ub3Rqc29u")
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(THROTTLE_STORE=TEST_THROTTLE_STORE)
+class TaskListConditionalGetTests(TestCase):
+    def setUp(self):
+        self.user = make_user("etag_user")
+        self.first = make_task(self.user)
+        self.second = make_task(self.user)
+        self.client = api_client(self.user)
+        self.url = reverse("task-list")
+
+    def test_unchanged_list_is_not_modified(self):
+        response = self.client.get(self.url)
+        self.assertNotIn("Last-Modified", response)
+        again = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(again.status_code, 304)
+
+    def test_update_changes_the_etag(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.first.status = "in_progress"
+        self.first.save()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_deleting_an_older_task_changes_the_etag(self):
+        response = self.client.get(self.url)
+        self.first.delete()
+        again = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual(again.json()["count"], 1)
+
+    def test_if_modified_since_alone_does_not_return_a_stale_list(self):
+        self.client.get(self.url)
+        self.first.delete()
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE="Fri, 01 Jan 2100 00:00:00 GMT")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["count"], 1)
+
+
+@override_settings(THROTTLE_STORE=TEST_THROTTLE_STORE)
+class AdminScopeTests(TestCase):
+    def setUp(self):
+        self.admin = make_user("scope_admin", role="admin")
+        self.other_admin = make_user("other_admin", role="admin")
+        self.own_user = make_user("own_user", admin=self.admin)
+        self.other_user = make_user("other_user", admin=self.other_admin)
+        self.own_task = make_task(self.own_user, status="completed", completion_report="done", worked_hours=2)
+        self.other_task = make_task(self.other_user, status="completed", completion_report="done", worked_hours=3)
+        self.client = api_client(self.admin)
+
+    def test_bulk_create_only_assigns_to_own_users(self):
+        rows = [
+            {"title": "Mine", "description": "d", "assigned_to": self.own_user.username, "due_date": "2030-01-01"},
+            {"title": "Theirs", "description": "d", "assigned_to": self.other_user.username, "due_date": "2030-01-01"},
+        ]
+        response = self.client.post(reverse("task-bulk-create"), {"tasks": rows}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["created"], 1)
+        self.assertEqual([error["row"] for error in response.json()["errors"]], [2])
+        self.assertFalse(Task.objects.filter(title="Theirs").exists())
+
+    def test_export_only_contains_own_tasks(self):
+        response = self.client.get(reverse("task-export") + "?output=ndjson")
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row["id"] for row in rows], [self.own_task.id])
+
+    def test_deferred_export_is_scoped_to_the_requesting_admin(self):
+        with tempfile.TemporaryDirectory() as media_root, override_settings(MEDIA_ROOT=media_root):
+            result = export_tasks({}, self.admin.pkid, output="ndjson")
+            with default_storage.open(result["file"]) as exported:
+                rows = [json.loads(line) for line in exported.read().decode().splitlines()]
+        self.assertEqual([row["id"] for row in rows], [self.own_task.id])
+
+    def test_report_of_another_admins_task_is_not_found(self):
+        own = self.client.get(reverse("task-report-api", args=[self.own_task.pk]))
+        self.assertEqual(own.status_code, 200)
+        self.assertEqual(own.json()["completion_report"], "done")
+        other = self.client.get(reverse("task-report-api", args=[self.other_task.pk]))
+        self.assertEqual(other.status_code, 404)
+
+
+class TaskHistoryTests(TestCase):
+    def setUp(self):
+        self.user = make_user("history_user")
+        self.admin = make_user("history_admin", role="admin")
+        self.task = make_task(self.user)
+
+    def test_creation_records_the_initial_values(self):
+        created = task_timeline(self.task.pk).get()
+        self.assertEqual(created.changes["title"], [None, "Task"])
+        self.assertEqual(created.changes["due_date"], [None, "2030-01-01"])
+
+    def test_update_records_only_the_changed_fields(self):
+        with changes_by(self.admin):
+            self.task.status = "in_progress"
+            self.task.due_date = "2030-01-01"  # same date, assigned as a string
+            self.task.save()
+        latest = task_timeline(self.task.pk).first()
+        self.assertEqual(latest.changes, {"status": ["pending", "in_progress"]})
+        self.assertEqual(latest.changed_by, self.admin)
+
+    def test_save_without_changes_records_nothing(self):
+        Task.objects.get(pk=self.task.pk).save()
+        self.assertEqual(task_timeline(self.task.pk).count(), 1)
+
+    def test_update_fields_limits_the_diff(self):
+        self.task.title = "Renamed"
+        self.task.status = "in_progress"
+        self.task.save(update_fields=["status"])
+        self.assertEqual(task_timeline(self.task.pk).first().changes, {"status": ["pending", "in_progress"]})
+
+    def test_stale_instance_diffs_against_the_stored_row(self):
+        first, second = Task.objects.get(pk=self.task.pk), Task.objects.get(pk=self.task.pk)
+        first.status = "in_progress"
+        first.save()
+        second.title = "Renamed"
+        second.save()
+        self.assertEqual(task_timeline(self.task.pk).first().changes, {
+            "title": ["Task", "Renamed"],
+            "status": ["in_progress", "pending"],
+        })
+        # saving an instance again only records what changed since its own save
+        second.save()
+        self.assertEqual(task_timeline(self.task.pk).count(), 3)
+
+
+@override_settings(THROTTLE_STORE=TEST_THROTTLE_STORE)
+class TaskHistoryAttributionTests(TestCase):
+    def setUp(self):
+        self.admin = make_user("attribution_admin", role="admin")
+        self.user = make_user("attribution_user", admin=self.admin)
+        self.task = make_task(self.user)
+
+    def assert_latest_change(self, task, changes, by):
+        latest = task_timeline(task.pk).first()
+        self.assertEqual((latest.changes, latest.changed_by_id), (changes, by.pkid))
+
+    def test_sync_update(self):
+        response = api_client(self.user).patch(reverse("task-update", args=[self.task.pk]), {"status": "in_progress"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assert_latest_change(self.task, {"status": ["pending", "in_progress"]}, self.user)
+
+    async def test_async_update(self):
+        response = await AsyncClient().patch(
+            reverse("task-update-async", args=[self.task.pk]), {"status": "in_progress"}, content_type="application/json",
+            headers={"Authorization": f"Bearer {AccessToken.for_user(self.user)}"},
+        )
+        self.assertEqual(response.status_code, 200)
+        await sync_to_async(self.assert_latest_change)(self.task, {"status": ["pending", "in_progress"]}, self.user)
+
+    def test_batch_update(self):
+        other = make_task(self.user, title="Other")
+        response = api_client(self.user).post(reverse("task-batch-update"), [
+            {"id": self.task.pk, "status": "in_progress"},
+            {"id": other.pk, "status": "completed", "completion_report": "done", "worked_hours": "1.5"},
+        ], format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assert_latest_change(self.task, {"status": ["pending", "in_progress"]}, self.user)
+        self.assert_latest_change(other, {
+            "status": ["pending", "completed"], "completion_report": [None, "done"], "worked_hours": [None, "1.50"],
+        }, self.user)
+
+    def test_bulk_create(self):
+        response = api_client(self.admin).post(reverse("task-bulk-create"), {"tasks": [
+            {"title": "Bulk", "description": "d", "assigned_to": self.user.username, "due_date": "2030-01-01"},
+        ]}, format="json")
+        self.assertEqual(response.status_code, 201)
+        created = task_timeline(Task.objects.get(title="Bulk").pk).get()
+        self.assertEqual((created.action, created.changed_by_id), ("created", self.admin.pkid))
+
+    def test_writes_outside_a_request_are_unattributed(self):
+        self.task.status = "in_progress"
+        self.task.save()
+        self.assertIsNone(task_timeline(self.task.pk).first().changed_by_id)
+
+
+class OverdueScanTests(TestCase):
+    today = datetime.date(2030, 1, 10)
+
+    def setUp(self):
+        self.user = make_user("overdue_user")
+        self.overdue = make_task(self.user, due_date=datetime.date(2030, 1, 5))
+        self.due_soon = make_task(self.user, due_date=datetime.date(2030, 1, 11))
+        self.later = make_task(self.user, due_date=datetime.date(2030, 1, 20))
+        make_task(self.user, due_date=datetime.date(2030, 1, 1), status="completed")
+
+    def scan(self, today=None):
+        batches = []
+        result = scan_overdue_tasks(today=today or self.today, batch_size=1, on_flagged=batches.append)
+        return result, batches
+
+    def test_flags_overdue_and_due_soon_tasks(self):
+        result, batches = self.scan()
+        self.assertEqual(result, {"flagged": 2, "escalated": 0, "cleared": 0})
+        self.assertEqual(batches, [[self.overdue.pk], [self.due_soon.pk]])
+        self.assertEqual(OverdueFlag.objects.get(task=self.due_soon).level, OverdueFlag.Levels.DUE_SOON)
+
+    def test_rerun_only_touches_what_changed(self):
+        self.scan()
+        self.assertEqual(self.scan(), ({"flagged": 0, "escalated": 0, "cleared": 0}, []))
+
+        self.later.due_date = datetime.date(2030, 1, 9)
+        self.later.save()
+        result, batches = self.scan()
+        self.assertEqual(batches, [[self.later.pk]])
+        self.assertEqual(result["flagged"], 1)
+
+    def test_due_soon_escalates_and_completed_is_cleared(self):
+        self.scan()
+        self.overdue.status = "completed"
+        self.overdue.save()
+        result, batches = self.scan(today=datetime.date(2030, 1, 12))
+        self.assertEqual(result, {"flagged": 0, "escalated": 1, "cleared": 1})
+        self.assertEqual(batches, [[self.due_soon.pk]])
+        self.assertEqual(OverdueFlag.objects.get(task=self.due_soon).level, OverdueFlag.Levels.OVERDUE)
+
+
+# in-process events, so each test only sees what it published
+TEST_EVENT_BUS = {"BACKEND": "common.events.LocalEventBackend", "RETENTION": 300}
+
+
+def published_events():
+    return [event for event_id, event in event_hub.replay(0)]
+
+
+@override_settings(EVENT_BUS=TEST_EVENT_BUS, THROTTLE_STORE=TEST_THROTTLE_STORE)
+class TaskEventTests(TestCase):
+    def setUp(self):
+        # a fresh backend per test
+        event_hub._backend = None
+        self.addCleanup(setattr, event_hub, "_backend", None)
+        self.admin = make_user("events_admin", role="admin")
+        self.user = make_user("events_user", admin=self.admin)
+        self.outsider = make_user("events_outsider")
+        self.superadmin = make_user("events_root", role="superadmin")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task = make_task(self.user)
+
+    def visible_to(self, user, last_event_id=0):
+        return replay_task_events(last_event_id, visible_assignees(user))[1]
+
+    def test_visibility_by_role(self):
+        self.assertEqual(len(self.visible_to(self.user)), 1)
+        self.assertEqual(len(self.visible_to(self.admin)), 1)
+        self.assertEqual(len(self.visible_to(self.superadmin)), 1)
+        self.assertEqual(self.visible_to(self.outsider), [])
+
+    def test_admin_sees_a_task_moved_away_from_their_users(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.assigned_to = self.outsider
+            self.task.save()
+        moved = published_events()[-1]
+        self.assertEqual(moved["previous_assigned_to"], self.user.pkid)
+        self.assertEqual(len(self.visible_to(self.admin)), 2)
+        self.assertEqual(len(self.visible_to(self.outsider)), 1)
+
+    def test_no_op_save_publishes_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.get(pk=self.task.pk).save()
+        self.assertEqual(len(published_events()), 1)
+
+    def test_rolled_back_write_publishes_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.task.status = "completed"
+                self.task.save()
+                raise RuntimeError
+        self.assertEqual(callbacks, [])
+        self.assertEqual(len(published_events()), 1)
+
+    def test_replay_after_last_event_id(self):
+        [(first_id, event)] = event_hub.replay(0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.status = "in_progress"
+            self.task.save()
+        seen, chunks = replay_task_events(first_id, visible_assignees(self.user))
+        self.assertEqual(len(chunks), 1)
+        self.assertIn('"in_progress"', chunks[0])
+        self.assertGreater(seen, first_id)
+        self.assertEqual(replay_task_events(None, None), (0, []))
+
+    def test_replay_window(self):
+        with mock.patch("common.events.time.time", return_value=10**10):
+            event_hub.publish([{"type": "task.updated", "task": {"assigned_to": self.user.pkid}}])
+        # publishing RETENTION seconds later drops everything older from replay
+        self.assertEqual(len(event_hub.replay(0)), 1)
+
+    def test_wsgi_stream(self):
+        stream = iter_task_events(self.user, last_event_id=0)
+        self.assertTrue(next(stream).startswith("retry:"))
+        self.assertIn("task.created", next(stream))
+        with self.captureOnCommitCallbacks(execute=True):
+            make_task(self.outsider)
+            self.task.status = "completed"
+            self.task.save()
+        live = next(stream)
+        self.assertIn("task.updated", live)
+        self.assertIn('"completed"', live)
+        stream.close()
+        self.assertEqual(event_hub._subscribers, set())
+
+    def test_wsgi_view_streams_the_sync_generator(self):
+        token = AccessToken.for_user(self.user)
+        response = self.client.get(
+            reverse("task-events") + "?last_event_id=0", headers={"Authorization": f"Bearer {token}"},
+        )
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        chunks = iter(response.streaming_content)
+        self.assertTrue(next(chunks).startswith(b"retry:"))
+        self.assertIn(b"task.created", next(chunks))
+        response.close()
+
+    async def test_asgi_stream(self):
+        stream = stream_task_events(self.admin, last_event_id=0)
+        self.assertTrue((await anext(stream)).startswith("retry:"))
+        self.assertIn("task.created", await anext(stream))
+        pending = asyncio.ensure_future(anext(stream))
+        await asyncio.sleep(0)
+        await sync_to_async(self.publish_update)()
+        live = await asyncio.wait_for(pending, 5)
+        self.assertIn('"in_progress"', live)
+        await stream.aclose()
+
+    def publish_update(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.status = "in_progress"
+            self.task.save()
+
+
+@override_settings(THROTTLE_STORE=TEST_THROTTLE_STORE)
+class TaskBatchUpdateTests(TestCase):
+    def setUp(self):
+        self.user = make_user("batch_user")
+        self.tasks = [make_task(self.user) for _ in range(3)]
+        self.foreign = make_task(make_user("batch_other"))
+        self.client = api_client(self.user)
+        self.url = reverse("task-batch-update")
+
+    def post(self, updates):
+        return self.client.post(self.url, {"updates": updates}, format="json")
+
+    def test_invalid_items_are_reported_and_valid_ones_applied(self):
+        response = self.post([
+            {"id": self.tasks[0].id, "status": "in_progress"},
+            {"id": self.tasks[1].id, "status": "completed"},
+            {"id": self.tasks[2].id, "status": "completed", "completion_report": "done", "worked_hours": "2"},
+            {"status": "completed"},
+            "not an object",
+        ])
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual(results[0]["status"], "in_progress")
+        self.assertIn("non_field_errors", results[1]["errors"])
+        self.assertEqual(results[2]["worked_hours"], "2.00")
+        self.assertEqual(results[3], {"id": None, "errors": {"id": ["Task not found."]}})
+        self.assertEqual(results[4]["errors"], {"id": ["Task not found."]})
+        statuses = dict(Task.objects.filter(assigned_to=self.user).values_list("id", "status"))
+        self.assertEqual([statuses[task.id] for task in self.tasks], ["in_progress", "pending", "completed"])
+
+    def test_other_users_tasks_read_as_missing(self):
+        missing = self.post([{"id": 999999, "status": "in_progress"}]).json()["results"][0]
+        foreign = self.post([{"id": self.foreign.id, "status": "in_progress"}]).json()["results"][0]
+        self.assertEqual(foreign["errors"], missing["errors"])
+        self.foreign.refresh_from_db()
+        self.assertEqual(self.foreign.status, "pending")
+
+    def test_batch_size_limit(self):
+        updates = [{"id": self.tasks[0].id, "status": "in_progress"}] * 101
+        self.assertEqual(self.post(updates).status_code, 400)
+        self.assertEqual(self.post([]).status_code, 400)
+
+    def test_duplicate_ids_apply_the_first_update_only(self):
+        results = self.post([
+            {"id": self.tasks[0].id, "status": "in_progress"},
+            {"id": self.tasks[0].id, "status": "pending"},
+        ]).json()["results"]
+        self.assertEqual(results[1]["errors"], {"id": ["Task appears more than once in this batch."]})
+        self.tasks[0].refresh_from_db()
+        self.assertEqual(self.tasks[0].status, "in_progress")
+
+
+@override_settings(THROTTLE_STORE=TEST_THROTTLE_STORE)
+class TaskSearchTests(TestCase):
+    def setUp(self):
+        self.user = make_user("search_user")
+        self.client = api_client(self.user)
+        self.budget = make_task(self.user, title="Quarterly budget budget review", description="numbers")
+        self.minor = make_task(self.user, title="Team offsite", description="check the budget later")
+        self.report = make_task(self.user, title="Write report", description="review of the quarter")
+        make_task(make_user("search_other"), title="Budget of someone else")
+
+    def search(self, query):
+        response = self.client.get(reverse("task-search"), {"q": query})
+        self.assertEqual(response.status_code, 200, query)
+        return [task["id"] for task in response.json()["results"]]
+
+    def test_best_matches_first(self):
+        self.assertEqual(self.search("budget"), [self.budget.id, self.minor.id])
+
+    def test_phrase_and_prefix(self):
+        self.assertEqual(self.search('"budget review"'), [self.budget.id])
+        self.assertEqual(self.search('"review budget"'), [])
+        self.assertEqual(self.search("quarter*"), [self.budget.id, self.report.id])
+        self.assertEqual(self.search("quarter"), [self.report.id])
+
+    def test_malformed_queries_do_not_fail(self):
+        for query in ['"budget', 'budget"', '"', "AND", "OR budget", "NOT", "*", "(", ")", "NEAR(budget", "title:budget",
+                      "^budget", "-budget", "budget AND", '""', "'", ":", "{budget}"]:
+            self.search(query)
+        self.assertEqual(self.search('"budget'), [self.budget.id, self.minor.id])
+        self.assertEqual(self.search("*"), [])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.report.title = "Write memo"
+        self.report.save()
+        self.assertEqual(self.search("memo"), [self.report.id])
+        self.assertEqual(self.search("report"), [])
+        self.minor.delete()
+        self.assertEqual(self.search("budget"), [self.budget.id])
+        Task.objects.filter(pk=self.budget.pk).update(description="spreadsheet")
+        self.assertEqual(self.search("spreadsheet"), [self.budget.id])
+
+    def test_icontains_fallback_on_other_databases(self):
+        with mock.patch("tasks.search.connection", mock.Mock(vendor="mysql")):
+            self.assertEqual(sorted(self.search("budget")), sorted([self.budget.id, self.minor.id]))
+            self.assertEqual(self.search('"budget review"'), [self.budget.id])
+
+
+@override_settings(THROTTLE_STORE=TEST_THROTTLE_STORE)
+class TaskBulkCreateTests(TestCase):
+    def setUp(self):
+        self.admin = make_user("bulk_admin", role="admin")
+        self.user = make_user("bulk_user", admin=self.admin)
+        self.client = api_client(self.admin)
+        self.url = reverse("task-bulk-create")
+
+    def row(self, title, assigned_to=None, **extra):
+        return {"title": title, "description": "d", "assigned_to": assigned_to or self.user.username,
+                "due_date": "2030-01-01", **extra}
+
+    def test_csv_upload(self):
+        content = "\ufefftitle,description,assigned_to,due_date\nFirst,d,bulk_user,2030-01-01\nSecond,d,%s,2030-02-01\n" % self.user.pkid
+        upload = SimpleUploadedFile("tasks.csv", content.encode("utf-8"), content_type="text/csv")
+        response = self.client.post(self.url, {"file": upload}, format="multipart")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), {"created": 2, "errors": []})
+        self.assertEqual(
+            list(Task.objects.order_by("title").values_list("title", "assigned_to", "due_date", "status")),
+            [("First", self.user.pkid, datetime.date(2030, 1, 1), "pending"),
+             ("Second", self.user.pkid, datetime.date(2030, 2, 1), "pending")],
+        )
+
+    def test_json_upload(self):
+        for content in ([self.row("Listed")], {"tasks": [self.row("Wrapped")]}):
+            upload = SimpleUploadedFile("tasks.json", json.dumps(content).encode(), content_type="application/json")
+            self.assertEqual(parse_task_upload(upload), content if isinstance(content, list) else content["tasks"])
+
+    def test_unreadable_uploads(self):
+        uploads = {
+            "File is not valid JSON.": SimpleUploadedFile("tasks.json", b"[{", content_type="application/json"),
+            "JSON upload must be a list of tasks.": SimpleUploadedFile("tasks.json", b'{"rows": []}', content_type="application/json"),
+            "File must be UTF-8 encoded.": SimpleUploadedFile("tasks.csv", "title\nT\u00e2che".encode("latin-1"), content_type="text/csv"),
+        }
+        for message, upload in uploads.items():
+            response = self.client.post(self.url, {"file": upload}, format="multipart")
+            self.assertEqual((response.status_code, response.json()), (400, {"error": message}))
+
+    def test_empty_upload_is_rejected_with_a_message(self):
+        for body in ({"tasks": []}, []):
+            response = self.client.post(self.url, body, format="json")
+            self.assertEqual((response.status_code, response.json()), (400, {"error": "No tasks to create."}))
+        upload = SimpleUploadedFile("tasks.csv", b"title,description,assigned_to,due_date\n", content_type="text/csv")
+        response = self.client.post(self.url, {"file": upload}, format="multipart")
+        self.assertEqual((response.status_code, response.json()), (400, {"error": "No tasks to create."}))
+
+    def test_per_row_errors(self):
+        rows = [
+            self.row("Valid"),
+            self.row("", due_date="tomorrow"),
+            self.row("Nobody", assigned_to="nobody"),
+            "not a row",
+            self.row("Also valid"),
+        ]
+        response = self.client.post(self.url, {"tasks": rows}, format="json")
+        self.assertEqual(response.status_code, 201)
+        body = response.json()
+        self.assertEqual(body["created"], 2)
+        self.assertEqual([error["row"] for error in body["errors"]], [2, 3, 4])
+        self.assertEqual(set(body["errors"][0]["errors"]), {"title", "due_date"})
+        self.assertEqual(body["errors"][1]["errors"], {"assigned_to": ["User not found among your users."]})
+        self.assertEqual(body["errors"][2]["errors"], {"non_field_errors": ["Row must be an object."]})
+
+        response = self.client.post(self.url, {"tasks": [self.row("Nobody", assigned_to="nobody")]}, format="json")
+        self.assertEqual((response.status_code, response.json()["created"]), (400, 0))
+
+    def test_all_digit_usernames_win_over_pkids(self):
+        numbered = make_user(str(self.user.pkid), admin=self.admin)
+        response = self.client.post(self.url, {"tasks": [
+            self.row("By username", assigned_to=str(self.user.pkid)),
+            self.row("By pkid", assigned_to=str(numbered.pkid)),
+        ]}, format="json")
+        self.assertEqual(response.json(), {"created": 2, "errors": []})
+        self.assertEqual(Task.objects.get(title="By username").assigned_to_id, numbered.pkid)
+        self.assertEqual(Task.objects.get(title="By pkid").assigned_to_id, numbered.pkid)
+
+        other = make_user("bulk_other")
+        response = self.client.post(self.url, {"tasks": [self.row("Out of scope", assigned_to=str(other.pkid))]}, format="json")
+        self.assertEqual(response.json()["errors"][0]["errors"], {"assigned_to": ["User not found among your users."]})
+
+    def test_row_limit(self):
+        with mock.patch.object(bulk, "BULK_CREATE_MAX_ROWS", 2):
+            response = self.client.post(self.url, {"tasks": [self.row("T")] * 3}, format="json")
+        self.assertEqual((response.status_code, response.json()), (400, {"error": "A single upload can contain at most 2 tasks."}))
+
+    def test_insert_is_atomic(self):
+        create = Task.objects.bulk_create
+        calls = []
+
+        def fail_second_batch(tasks, *args, **kwargs):
+            calls.append(len(tasks))
+            if len(calls) == 2:
+                raise IntegrityError("second batch")
+            return create(tasks, *args, **kwargs)
+
+        with mock.patch.object(Task.objects, "bulk_create", side_effect=fail_second_batch), \
+                self.assertRaises(IntegrityError):
+            bulk_create_tasks([self.row(f"T{number}") for number in range(3)], batch_size=2)
+        self.assertEqual(calls, [2, 1])
+        self.assertFalse(Task.objects.exists())
+        with self.assertRaises(BulkUploadError):
+            bulk_create_tasks([])
@@ -1,6 +1,6 @@
 from django.urls import path
 from .views import UserTaskListAPIView, TaskStatusUpdateAPIView, TaskReportAPIView
-from . import views
+from . import views, async_views
 urlpatterns = [
     #< ----------------------------------superadmin-------------------------------------
     path('all_tasks_superuser/', views.task_list_view_superuser, name='task_list_superuser'),
@@ -8,9 +8,24 @@ urlpatterns = [
     #< ----------------------------------admin-------------------------------------
     path('tasks/', UserTaskListAPIView.as_view(), name='task-list'),
     path('tasks/<int:pk>/', TaskStatusUpdateAPIView.as_view(), name='task-update'),
+    path('tasks/search/', views.TaskSearchAPIView.as_view(), name='task-search'),
+    path('tasks/overdue/', views.OverdueTaskListAPIView.as_view(), name='task-overdue'),
+    path('tasks/worked-hours/', views.WorkedHoursAnalyticsAPIView.as_view(), name='task-worked-hours'),
+    path('tasks/batch-update/', views.TaskBatchStatusUpdateAPIView.as_view(), name='task-batch-update'),
     path('tasks/create/', views.create_task_view, name='create_task'),
+    path('tasks/bulk/', views.TaskBulkCreateAPIView.as_view(), name='task-bulk-create'),
+    path('tasks/upload/', views.bulk_upload_tasks_view, name='bulk_upload_tasks'),
+    path('tasks/export/', views.TaskExportAPIView.as_view(), name='task-export'),
     path('all_tasks/', views.task_list_view, name='task_list'),
     path('tasks/<int:id>/edit/', views.edit_task_view, name='edit_task'),
     path('tasks/<int:task_id>/report/', views.task_report_view, name='task_report'),
+    path('tasks/<int:pk>/completion-report/', TaskReportAPIView.as_view(), name='task-report-api'),
+    path('tasks/<int:pk>/history/', views.TaskHistoryAPIView.as_view(), name='task-history'),
+
+    #< ----------------------------------async (ASGI)-------------------------------------
+    path('async/tasks/', async_views.task_list_async_view, name='task-list-async'),
+    path('async/tasks/<int:pk>/', async_views.task_update_async_view, name='task-update-async'),
+    path('async/tasks/<int:pk>/completion-report/', async_views.task_report_async_view, name='task-report-api-async'),
+    path('async/tasks/events/', async_views.task_events_async_view, name='task-events'),
 
 ]
@@ -3,19 +3,57 @@ from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from .models import Task
-from .serializers import TaskSerializer, TaskStatusUpdateSerializer
+from .serializers import OverdueTaskSerializer, TaskChangeSerializer, TaskSerializer, TaskStatusUpdateSerializer
+from .pagination import TaskCursorPagination, TaskHistoryCursorPagination, TaskPageNumberPagination
+from .bulk import BulkUploadError, bulk_create_tasks, parse_task_upload
+from .export import filter_export_tasks, stream_csv, stream_ndjson
+from .search import search_tasks
+from .history import changes_by, task_timeline
+from .events import serves_asgi
+from .overdue import DUE_SOON_DAYS, open_tasks_due_by
+from dashboard.models import WorkedHours
+from dashboard.worked_hours import worked_hours_by_period, worked_hours_by_user, worked_hours_rollups
+from .conditional import ConditionalGetMixin, make_etag, task_list_validators
+from common.permissions import IsAdminRole
+from rest_framework.parsers import JSONParser, MultiPartParser
+from rest_framework.authentication import SessionAuthentication
+from common.cookie_auth import CookieAuthentication
 from django.contrib.auth.decorators import login_required
 from users.models import User
-from django.http import HttpResponseForbidden
+from users.hierarchy import scope_tasks, scope_users
+from django.http import HttpResponseForbidden, StreamingHttpResponse
+from django.core.paginator import Paginator
+from django.db import router, transaction
+from django.utils.decorators import method_decorator
+from common.db_router import replica_reads
+from jobs.registry import enqueue
+from django.urls import reverse
+from django.core.cache import cache
+from django.utils import timezone
+import datetime
 
 
 
 # superuser can view task report and working hours
-class TaskReportAPIView(APIView):
+@method_decorator(replica_reads, name='dispatch')
+class TaskReportAPIView(ConditionalGetMixin, APIView):
     # permission_classes = [permissions.IsAuthenticated]
+    def get_validators(self, request, pk):
+        if not request.user.is_superuser and not request.user.is_staff:
+            return None
+        tasks = scope_tasks(request.user, Task.objects.filter(pk=pk, status='completed'))
+        updated_at = tasks.values_list('updated_at', flat=True).first()
+        if updated_at is None:
+            return None
+        return make_etag('report', pk, updated_at), updated_at
+
     def get(self, request, pk):
+        return self.conditional_get(request, lambda: self.get_report(request, pk), pk)
+
+    def get_report(self, request, pk):
         try:
-            task = Task.objects.get(pk=pk)
+            # admins only reach the tasks of the users below them
+            task = scope_tasks(request.user, Task.objects.all()).get(pk=pk)
         except Task.DoesNotExist:
             return Response({'error': 'Task not found'}, status=status.HTTP_404_NOT_FOUND)
 
@@ -36,42 +74,306 @@ class TaskReportAPIView(APIView):
 @login_required
 def create_task_view(request):
     if request.method == 'POST' and request.user.role in ['admin', 'superadmin']:
-        Task.objects.create(
-            title=request.POST['title'],
-            description=request.POST['description'],
-            assigned_to_id=request.POST['assigned_to'],  
-            due_date=request.POST['due_date'],
-            status='pending'
-        )
+        if not scope_users(request.user).filter(pkid=request.POST['assigned_to']).exists():
+            return HttpResponseForbidden("You can only assign tasks to your own users.")
+        with changes_by(request.user):
+            Task.objects.create(
+                title=request.POST['title'],
+                description=request.POST['description'],
+                assigned_to_id=request.POST['assigned_to'],
+                due_date=request.POST['due_date'],
+                status='pending'
+            )
 
         return redirect('task_list')
     
-    users = User.objects.filter(role='user')
+    users = scope_users(request.user, User.objects.filter(role='user'))
     return render(request, 'adminside/tasks/task_page.html', {'users': users})
 
 
+# admin can export tasks with their reports as a CSV or NDJSON stream
+@method_decorator(replica_reads, name='dispatch')
+class TaskExportAPIView(APIView):
+    authentication_classes = [CookieAuthentication, SessionAuthentication]
+    permission_classes = [IsAdminRole]
+    outputs = {
+        'csv': (stream_csv, 'text/csv', 'csv'),
+        'ndjson': (stream_ndjson, 'application/x-ndjson', 'ndjson'),
+    }
+
+    def get(self, request):
+        output = request.query_params.get('output', 'csv')
+        if output not in self.outputs:
+            return Response({'error': 'output must be csv or ndjson'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            tasks = scope_tasks(request.user, filter_export_tasks(request.query_params))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if request.query_params.get('defer', '').lower() in ('1', 'true', 'yes'):
+            filters = {key: request.query_params[key] for key in ('status', 'assigned_to', 'due_from', 'due_to')
+                       if key in request.query_params}
+            job = enqueue('tasks.export', {'filters': filters, 'output': output, 'user_id': request.user.pkid}, created_by=request.user)
+            return Response(
+                {'job': job.pk, 'status': job.status, 'url': request.build_absolute_uri(reverse('job-detail', args=[job.pk]))},
+                status=status.HTTP_202_ACCEPTED,
+            )
+
+        # the rows are read while streaming, after the request's routing state is gone
+        tasks = tasks.using(router.db_for_read(Task))
+        stream, content_type, extension = self.outputs[output]
+        response = StreamingHttpResponse(stream(tasks), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="tasks.{extension}"'
+        return response
+
+
+# admin can create many tasks at once from a JSON body or a CSV/JSON file upload
+class TaskBulkCreateAPIView(APIView):
+    permission_classes = [IsAdminRole]
+    parser_classes = [JSONParser, MultiPartParser]
+
+    def post(self, request):
+        try:
+            if 'file' in request.FILES:
+                rows = parse_task_upload(request.FILES['file'])
+            else:
+                rows = request.data.get('tasks') if isinstance(request.data, dict) else request.data
+                if not isinstance(rows, list):
+                    raise BulkUploadError("Expected a list of tasks.")
+            with changes_by(request.user):
+                created, errors = bulk_create_tasks(rows, users=scope_users(request.user, User.objects.filter(role='user')))
+        except BulkUploadError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        response_status = status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST
+        return Response({'created': created, 'errors': errors}, status=response_status)
+
+
+# admin can upload a CSV/JSON file of tasks
+@login_required
+def bulk_upload_tasks_view(request):
+    if request.user.role not in ['admin', 'superadmin']:
+        return HttpResponseForbidden("You don't have permission to create tasks.")
+
+    context = {}
+    if request.method == 'POST' and 'file' in request.FILES:
+        try:
+            with changes_by(request.user):
+                context['created'], context['errors'] = bulk_create_tasks(
+                    parse_task_upload(request.FILES['file']),
+                    users=scope_users(request.user, User.objects.filter(role='user')),
+                )
+        except BulkUploadError as e:
+            context['error'] = str(e)
+
+    return render(request, 'adminside/tasks/bulk_upload.html', context)
+
+
+TASK_LIST_PAGE_SIZE = 20
+TASK_LIST_SORT_FIELDS = ['id', 'title', 'due_date', 'status', 'created_at']
+
+
+# paginated, sorted and filtered task page for the admin task tables
+def get_task_list_page(request, extra_fields=()):
+    tasks = (
+        Task.objects.select_related('assigned_to')
+        .only('id', 'title', 'due_date', 'status', 'created_at', 'assigned_to__email', *extra_fields)
+    )
+    # admins see the tasks of the users below them in the assigned_admin tree
+    tasks = scope_tasks(request.user, tasks)
+
+    status_filter = request.GET.get('status')
+    if status_filter in dict(Task.STATUS_CHOICES):
+        tasks = tasks.filter(status=status_filter)
+
+    assigned_to = request.GET.get('assigned_to')
+    if assigned_to and assigned_to.isdigit():
+        tasks = tasks.filter(assigned_to_id=assigned_to)
+
+    query = request.GET.get('q', '').strip()
+    if query:
+        tasks = search_tasks(tasks, query)
+
+    sort = request.GET.get('sort', '' if query else '-created_at')
+    if sort.lstrip('-') in TASK_LIST_SORT_FIELDS:
+        tasks = tasks.order_by(sort, '-id' if sort.startswith('-') else 'id')
+    elif query:
+        tasks = tasks.order_by('search_rank', 'id')
+    else:
+        sort = '-created_at'
+        tasks = tasks.order_by(sort, '-id')
+
+    paginator = Paginator(tasks, TASK_LIST_PAGE_SIZE)
+    page = paginator.get_page(request.GET.get('page'))
+    return {
+        'tasks': page,
+        'page_range': paginator.get_elided_page_range(page.number),
+        'status_choices': Task.STATUS_CHOICES,
+        'sort': sort,
+        'query': query,
+        'users': scope_users(request.user, User.objects.filter(role="user")).only('pkid', 'username', 'email'),
+        # under WSGI every open event stream would hold a worker thread, so the page does not open one
+        'live_events': serves_asgi(request),
+    }
+
+
 # admin can view all tasks
 @login_required
+@replica_reads
 def task_list_view(request):
-    tasks = Task.objects.all()
-    users = User.objects.filter(role="user")
-    return render(request, 'adminside/tasks/list_tasks.html', {'tasks': tasks, 'users' :users})
+    return render(request, 'adminside/tasks/list_tasks.html', get_task_list_page(request))
 
 
 # superuser can view all tasks
 @login_required
+@replica_reads
 def task_list_view_superuser(request):
-    tasks = Task.objects.all()
-    users = User.objects.filter(role="user")
-    return render(request, 'adminside/tasks/list_tasks_superuser.html', {'tasks': tasks, 'users' :users})
+    context = get_task_list_page(request, extra_fields=('worked_hours',))
+    return render(request, 'adminside/tasks/list_tasks_superuser.html', context)
 
-# asigned user can list their task 
-class UserTaskListAPIView(generics.ListAPIView):
+# ?pagination=cursor switches to keyset pagination, ?count=false skips the total count
+@method_decorator(replica_reads, name='dispatch')
+class UserTaskListAPIView(ConditionalGetMixin, generics.ListAPIView):
     serializer_class = TaskSerializer
     permission_classes = [permissions.IsAuthenticated]
+    filterset_fields = ['status']
+
+    @property
+    def pagination_class(self):
+        request = getattr(self, 'request', None)
+        if request is not None and request.query_params.get('pagination') == 'cursor':
+            return TaskCursorPagination
+        return TaskPageNumberPagination
 
     def get_queryset(self):
-        return Task.objects.filter(assigned_to=self.request.user)
+        return Task.objects.filter(assigned_to=self.request.user).order_by('due_date', 'id')
+
+    def get_validators(self, request):
+        return task_list_validators(request)
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_get(request, lambda: super(UserTaskListAPIView, self).list(request, *args, **kwargs))
+
+
+# asigned user can search their tasks, best matches first
+@method_decorator(replica_reads, name='dispatch')
+class TaskSearchAPIView(generics.ListAPIView):
+    serializer_class = TaskSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TaskPageNumberPagination
+    filterset_fields = ['status']
+
+    def get_queryset(self):
+        tasks = Task.objects.filter(assigned_to=self.request.user)
+        return search_tasks(tasks, self.request.query_params.get('q', '')).order_by('search_rank', 'id')
+
+
+OVERDUE_CACHE_SECONDS = 60
+OVERDUE_MAX_DAYS = 30
+
+
+# open tasks that are overdue or due within ?days= days, within the user's scope (see users.hierarchy)
+@method_decorator(replica_reads, name='dispatch')
+class OverdueTaskListAPIView(generics.ListAPIView):
+    serializer_class = OverdueTaskSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TaskCursorPagination
+
+    def get_queryset(self):
+        tasks = scope_tasks(self.request.user, open_tasks_due_by(self.today + datetime.timedelta(days=self.days)))
+        return tasks.only('id', 'title', 'assigned_to', 'due_date', 'status')
+
+    def get_serializer_context(self):
+        return {**super().get_serializer_context(), 'today': self.today}
+
+    def list(self, request, *args, **kwargs):
+        try:
+            self.days = int(request.query_params.get('days', DUE_SOON_DAYS))
+        except ValueError:
+            self.days = -1
+        if not 0 <= self.days <= OVERDUE_MAX_DAYS:
+            return Response({'error': f'days must be between 0 and {OVERDUE_MAX_DAYS}.'}, status=status.HTTP_400_BAD_REQUEST)
+        self.today = timezone.localdate()
+
+        # superadmins all see the same list, so they share cache entries
+        scope = 'all' if request.user.role == 'superadmin' else request.user.pk
+        key = 'tasks:overdue:' + make_etag(scope, self.today, request.get_full_path()).strip('"')
+        data = cache.get(key)
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            cache.set(key, data, OVERDUE_CACHE_SECONDS)
+        return Response(data)
+
+
+WORKED_HOURS_DEFAULT_PERIODS = 12
+WORKED_HOURS_MAX_DAYS = 731
+
+
+# worked hours and completed tasks per week or month, answered from the WorkedHours rollups
+@method_decorator(replica_reads, name='dispatch')
+class WorkedHoursAnalyticsAPIView(generics.GenericAPIView):
+    """
+    ?period=week|month, ?from= and ?to= (YYYY-MM-DD), ?group=period for one
+    row per week or month, or ?group=user for one row per user (paginated),
+    and ?user=<pkid> for a single user. Superadmins see everyone, admins the
+    users below them and users themselves.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TaskPageNumberPagination
+
+    def get(self, request):
+        params = request.query_params
+        period = params.get('period', WorkedHours.Periods.WEEK)
+        group = params.get('group', 'period')
+        if period not in WorkedHours.Periods.values or group not in ('period', 'user'):
+            return Response({'error': 'period must be week or month and group period or user.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        end = timezone.localdate()
+        step = datetime.timedelta(weeks=1) if period == WorkedHours.Periods.WEEK else datetime.timedelta(days=31)
+        try:
+            end = datetime.date.fromisoformat(params['to']) if 'to' in params else end
+            start = datetime.date.fromisoformat(params['from']) if 'from' in params else end - step * (WORKED_HOURS_DEFAULT_PERIODS - 1)
+        except ValueError:
+            return Response({'error': 'from and to must be dates (YYYY-MM-DD).'}, status=status.HTTP_400_BAD_REQUEST)
+        if not 0 <= (end - start).days <= WORKED_HOURS_MAX_DAYS:
+            return Response(
+                {'error': f'from must be before to and at most {WORKED_HOURS_MAX_DAYS} days earlier.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if request.user.role in ['admin', 'superadmin']:
+            users = None if request.user.role == 'superadmin' else scope_users(request.user)
+        else:
+            users = User.objects.filter(pkid=request.user.pkid)
+        if params.get('user', '').isdigit():
+            users = (users if users is not None else User.objects.all()).filter(pkid=int(params['user']))
+
+        rows = worked_hours_rollups(period, start, end, users)
+        if group == 'user':
+            page = self.paginate_queryset(worked_hours_by_user(rows))
+            return self.get_paginated_response([
+                {'user': row['user_id'], 'username': row['user__username'], 'hours': row['hours'], 'completed': row['completed']}
+                for row in page
+            ])
+        return Response({
+            'period': period,
+            'from': start,
+            'to': end,
+            'results': list(worked_hours_by_period(rows)),
+        })
+
+
+# who changed a task and what, newest first; users see their own tasks, admins those of their users
+@method_decorator(replica_reads, name='dispatch')
+class TaskHistoryAPIView(generics.ListAPIView):
+    serializer_class = TaskChangeSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TaskHistoryCursorPagination
+
+    def get_queryset(self):
+        task = get_object_or_404(scope_tasks(self.request.user, Task.objects.only('id')), pk=self.kwargs['pk'])
+        return task_timeline(task.pk)
 
 
 class TaskStatusUpdateAPIView(generics.UpdateAPIView):
@@ -83,30 +385,82 @@ class TaskStatusUpdateAPIView(generics.UpdateAPIView):
         return Task.objects.filter(assigned_to=self.request.user)
 
     def perform_update(self, serializer):
-        serializer.save()
+        with changes_by(self.request.user):
+            serializer.save()
         
+
+
+TASK_BATCH_UPDATE_MAX_ITEMS = 100
+
+
+# asigned user can update many of their tasks in one request
+class TaskBatchStatusUpdateAPIView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        items = request.data.get('updates') if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list) or not items:
+            return Response({'error': 'Expected a non-empty list of updates.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > TASK_BATCH_UPDATE_MAX_ITEMS:
+            return Response(
+                {'error': f'A batch can contain at most {TASK_BATCH_UPDATE_MAX_ITEMS} updates.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        ids = [self.get_item_id(item) for item in items]
+        results, updated = [], set()
+        with transaction.atomic(), changes_by(request.user):
+            tasks = Task.objects.select_for_update().filter(assigned_to=request.user, id__in=[i for i in ids if i is not None]).in_bulk()
+            for item, task_id in zip(items, ids):
+                task = tasks.get(task_id)
+                if task is None:
+                    # tasks of other users read as missing, so ids do not reveal what exists
+                    results.append({'id': task_id, 'errors': {'id': ['Task not found.']}})
+                    continue
+                if task_id in updated:
+                    results.append({'id': task_id, 'errors': {'id': ['Task appears more than once in this batch.']}})
+                    continue
+                updated.add(task_id)
+
+                serializer = TaskStatusUpdateSerializer(task, data=item, partial=True)
+                if serializer.is_valid():
+                    serializer.save()
+                    results.append({'id': task.id, **serializer.data})
+                else:
+                    results.append({'id': task.id, 'errors': serializer.errors})
+
+        return Response({'results': results})
+
+    @staticmethod
+    def get_item_id(item):
+        try:
+            return int(item['id'])
+        except (TypeError, KeyError, ValueError):
+            return None
         
 @login_required
 def edit_task_view(request, id):
-    task = get_object_or_404(Task, id=id) 
+    task = get_object_or_404(scope_tasks(request.user, Task.objects.all()), id=id) 
+    users = scope_users(request.user, User.objects.filter(role='user'))
 
     if request.method == 'POST':
         task.title = request.POST['title']
         task.description = request.POST['description']
-        task.assigned_to_id = get_object_or_404(User, pk=request.POST['assigned_to'])
+        task.assigned_to = get_object_or_404(users, pk=request.POST['assigned_to'])
         task.due_date = request.POST['due_date']
         task.status = request.POST['status']
-        task.save()
+        with changes_by(request.user):
+            task.save()
         return redirect('task_list') 
 
-    users = User.objects.filter(role='user')
     return render(request, 'adminside/tasks/edit_task.html', {'task': task, 'users': users})
 
 
 
 @login_required
+@replica_reads
 def task_report_view(request, task_id):
-    task = get_object_or_404(Task, id=task_id)
+    task = get_object_or_404(scope_tasks(request.user, Task.objects.all()), id=task_id)
 
     # Only superadmins or admins can view reports
     if request.user.role not in ['admin', 'superadmin']:
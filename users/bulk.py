@@ -0,0 +1,226 @@
+import csv
+import io
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+
+from .hash_worker import init_hash_worker
+from .hierarchy import add_users
+from .models import User
+from .serializers import BulkUserRowSerializer
+
+IMPORT_BATCH_SIZE = 500
+# web uploads hash every password inside the request, larger files go through the import_users command
+IMPORT_MAX_ROWS = 1000
+INLINE_HASH_LIMIT = 4  # fewer passwords than this are hashed in the calling process
+UNIQUE_FIELDS = ['username', 'email', 'mobile']
+
+
+class UserImportError(Exception):
+    pass
+
+
+def parse_user_upload(upload):
+    """
+    Read an uploaded CSV or JSON file into a list of row dicts.
+
+    CSV files need a header row with the columns username, name, email and
+    mobile, and optionally role, password and assigned_admin. JSON files hold
+    a list of objects with the same keys, or an object with that list under
+    "users".
+    """
+    try:
+        content = upload.read().decode('utf-8-sig')
+    except UnicodeDecodeError:
+        raise UserImportError("File must be UTF-8 encoded.")
+
+    if upload.name.lower().endswith('.json') or upload.content_type == 'application/json':
+        try:
+            rows = json.loads(content)
+        except ValueError:
+            raise UserImportError("File is not valid JSON.")
+        if isinstance(rows, dict):
+            rows = rows.get('users')
+        if not isinstance(rows, list):
+            raise UserImportError("JSON upload must be a list of users.")
+        return rows
+
+    return list(csv.DictReader(io.StringIO(content)))
+
+
+def find_taken(field, values):
+    """
+    Return the values of field that already belong to a user, with one
+    query per chunk of as many values as the database takes in one IN list.
+    """
+    values = list(values)
+    chunk_size = connection.ops.bulk_batch_size([field], values) or len(values)
+    taken = set()
+    for start in range(0, len(values), chunk_size):
+        chunk = values[start:start + chunk_size]
+        taken.update(User.objects.filter(**{f'{field}__in': chunk}).values_list(field, flat=True))
+    return taken
+
+
+def resolve_admins(values):
+    """
+    Map every assigned_admin value (an admin pkid or username) to an admin
+    pkid using a single query.
+    """
+    pkids = {int(value) for value in values if value.isdigit()}
+    usernames = {value for value in values if not value.isdigit()}
+    admins = {}
+    if not values:
+        return admins
+    for pkid, username in User.objects.filter(Q(pkid__in=pkids) | Q(username__in=usernames), role='admin').values_list('pkid', 'username'):
+        admins[str(pkid)] = pkid
+        admins[username] = pkid
+    return admins
+
+
+def hash_passwords(passwords, processes=1):
+    """
+    Hash passwords with the default hasher. With more than one process
+    (processes=None means one per CPU) they are spread over a pool so a slow
+    hasher like Argon2 uses every core instead of one; only the import_users
+    command does that, web requests hash in their own thread. Empty passwords
+    become unusable passwords without touching the pool.
+
+    The pool spawns fresh interpreters rather than forking: a fork of a
+    threaded process copies held locks and open database connections into
+    the children.
+    """
+    hashed = [hashers.make_password(None) for _ in passwords]
+    pending = [(index, password) for index, password in enumerate(passwords) if password]
+    processes = min(processes or os.cpu_count() or 1, len(pending))
+    if len(pending) < INLINE_HASH_LIMIT or processes < 2:
+        for index, password in pending:
+            hashed[index] = hashers.make_password(password)
+        return hashed
+
+    initargs = (settings.PASSWORD_HASHERS, getattr(settings, 'ARGON2', {}))
+    with ProcessPoolExecutor(
+        max_workers=processes, mp_context=multiprocessing.get_context('spawn'),
+        initializer=init_hash_worker, initargs=initargs,
+    ) as executor:
+        results = executor.map(
+            hashers.make_password,
+            [password for _, password in pending],
+            chunksize=max(1, len(pending) // (processes * 4)),
+        )
+        for (index, _), encoded in zip(pending, results):
+            hashed[index] = encoded
+    return hashed
+
+
+def validate_user_rows(rows):
+    """
+    Validate rows and check username, email and mobile against the database
+    and against earlier rows of the same import, with one set-based query per
+    field rather than one per row.
+
+    Returns (valid, errors) where valid is a list of (row number, validated
+    data) and errors the per-row errors, row numbers starting at 1.
+    """
+    valid, errors = [], []
+    for number, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            errors.append({'row': number, 'errors': {'non_field_errors': ["Row must be an object."]}})
+            continue
+
+        # empty CSV cells count as missing, so optional columns fall back to their defaults
+        serializer = BulkUserRowSerializer(data={key: value for key, value in row.items() if value not in ('', None)})
+        if not serializer.is_valid():
+            errors.append({'row': number, 'errors': serializer.errors})
+            continue
+
+        data = serializer.validated_data
+        data['email'] = User.objects.normalize_email(data['email'])
+        data['username'] = User.normalize_username(data['username'])
+        valid.append((number, data))
+
+    taken = {field: find_taken(field, {data[field] for _, data in valid}) for field in UNIQUE_FIELDS}
+    admins = resolve_admins({data['assigned_admin'] for _, data in valid if data.get('assigned_admin')})
+
+    accepted = []
+    for number, data in valid:
+        row_errors = {}
+        for field in UNIQUE_FIELDS:
+            if data[field] in taken[field]:
+                row_errors[field] = [f"A user with that {field} already exists."]
+        assigned_admin = data.pop('assigned_admin', '')
+        if assigned_admin:
+            data['assigned_admin_id'] = admins.get(assigned_admin)
+            if data['assigned_admin_id'] is None:
+                row_errors['assigned_admin'] = ["Admin not found."]
+
+        if row_errors:
+            errors.append({'row': number, 'errors': row_errors})
+            continue
+        # later rows of the same file may not reuse these values either
+        for field in UNIQUE_FIELDS:
+            taken[field].add(data[field])
+        accepted.append((number, data))
+    return accepted, errors
+
+
+def insert_users(numbered_users, batch_size):
+    """
+    Insert users with one bulk_create per batch, each batch in its own
+    transaction. When a batch hits a uniqueness conflict (a user created
+    since validation) it is retried row by row so only the conflicting rows
+    fail.
+    """
+    created, errors = 0, []
+    for start in range(0, len(numbered_users), batch_size):
+        batch = numbered_users[start:start + batch_size]
+        try:
+            with transaction.atomic():
+                users = User.objects.bulk_create([user for _, user in batch])
+                add_users(users)  # bulk_create sends no post_save
+            created += len(batch)
+            continue
+        except IntegrityError:
+            pass
+
+        for number, user in batch:
+            try:
+                with transaction.atomic():
+                    user.save(force_insert=True)
+                created += 1
+            except IntegrityError:
+                errors.append({'row': number, 'errors': {'non_field_errors': ["A user with these details already exists."]}})
+    return created, errors
+
+
+def import_users(rows, batch_size=IMPORT_BATCH_SIZE, processes=1, max_rows=IMPORT_MAX_ROWS):
+    """
+    Create users from rows in bulk: validate every row, check uniqueness for
+    the whole batch, hash the passwords (in a pool of processes when
+    processes is not 1, see hash_passwords) and bulk_create the users in
+    batches.
+
+    Returns the number of created users and a list of per-row errors, where
+    row numbers start at 1.
+    """
+    if max_rows is not None and len(rows) > max_rows:
+        raise UserImportError(f"A single import can contain at most {max_rows} users.")
+
+    accepted, errors = validate_user_rows(rows)
+    passwords = hash_passwords([data.pop('password', '') for _, data in accepted], processes)
+
+    users = [
+        (number, User(password=password, is_staff=False, is_superuser=False, **data))
+        for (number, data), password in zip(accepted, passwords)
+    ]
+    created, insert_errors = insert_users(users, batch_size)
+
+    errors.extend(insert_errors)
+    errors.sort(key=lambda error: error['row'])
+    return created, errors
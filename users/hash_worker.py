@@ -0,0 +1,17 @@
+import django
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import hashers
+
+# Kept free of model imports: spawned pool processes unpickle this module
+# before Django is set up.
+
+
+def init_hash_worker(password_hashers, argon2):
+    # spawned workers start without Django, forked ones may have cached the parent's hashers
+    if not apps.ready:
+        django.setup()
+    settings.PASSWORD_HASHERS = password_hashers
+    settings.ARGON2 = argon2
+    hashers.get_hashers.cache_clear()
+    hashers.get_hashers_by_algorithm.cache_clear()
@@ -0,0 +1,141 @@
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .models import User, UserHierarchy
+
+HIERARCHY_BATCH_SIZE = 500
+
+
+def ancestors_of(pkid):
+    """
+    {ancestor pkid: depth} for everyone above the user, nearest first.
+    """
+    return dict(UserHierarchy.objects.filter(descendant_id=pkid).order_by("depth").values_list("ancestor_id", "depth"))
+
+
+def subtree_of(pkid):
+    """
+    {pkid: depth} for the user (depth 0) and everyone below them.
+    """
+    subtree = {pkid: 0}
+    subtree.update(UserHierarchy.objects.filter(ancestor_id=pkid).values_list("descendant_id", "depth"))
+    return subtree
+
+
+def attach(pkid, admin_id):
+    """
+    Put the user, with everyone below them, under admin_id.
+    """
+    if admin_id is None:
+        return
+    subtree = subtree_of(pkid)
+    if admin_id in subtree:
+        raise ValidationError("An admin cannot be assigned to a user below them.")
+
+    above = {admin_id: 0, **ancestors_of(admin_id)}
+    UserHierarchy.objects.bulk_create(
+        [
+            UserHierarchy(ancestor_id=ancestor, descendant_id=descendant, depth=up + down + 1)
+            for ancestor, up in above.items()
+            for descendant, down in subtree.items()
+        ],
+        batch_size=HIERARCHY_BATCH_SIZE,
+    )
+
+
+def detach(pkid):
+    """
+    Cut the user, with everyone below them, loose from everyone above them.
+    """
+    above = list(UserHierarchy.objects.filter(descendant_id=pkid).values_list("ancestor_id", flat=True))
+    if above:
+        UserHierarchy.objects.filter(ancestor_id__in=above, descendant_id__in=list(subtree_of(pkid))).delete()
+
+
+def move(pkid, admin_id):
+    with transaction.atomic():
+        detach(pkid)
+        attach(pkid, admin_id)
+
+
+def add_users(users):
+    """
+    Add rows for newly created users, which have nobody below them yet, with
+    one query for their admins' ancestors and one bulk insert. For users
+    inserted with bulk_create, which sends no post_save.
+    """
+    admin_ids = {user.assigned_admin_id for user in users if user.assigned_admin_id is not None}
+    if not admin_ids:
+        return
+    above = {admin_id: {admin_id: 0} for admin_id in admin_ids}
+    for ancestor, descendant, depth in UserHierarchy.objects.filter(descendant_id__in=admin_ids).values_list(
+        "ancestor_id", "descendant_id", "depth"
+    ):
+        above[descendant][ancestor] = depth
+    UserHierarchy.objects.bulk_create(
+        [
+            UserHierarchy(ancestor_id=ancestor, descendant_id=user.pkid, depth=depth + 1)
+            for user in users
+            if user.assigned_admin_id is not None
+            for ancestor, depth in above[user.assigned_admin_id].items()
+        ],
+        batch_size=HIERARCHY_BATCH_SIZE,
+    )
+
+
+def rebuild_hierarchy():
+    """
+    Recompute the whole closure table from assigned_admin. Assignment cycles,
+    which the signal handlers refuse but queryset.update() can create, are
+    cut where they close. Returns the number of rows written.
+    """
+    parents = dict(User.objects.filter(assigned_admin__isnull=False).values_list("pkid", "assigned_admin_id"))
+    rows = []
+    for pkid, parent in parents.items():
+        seen, depth = {pkid}, 1
+        while parent is not None and parent not in seen:
+            rows.append(UserHierarchy(ancestor_id=parent, descendant_id=pkid, depth=depth))
+            seen.add(parent)
+            parent, depth = parents.get(parent), depth + 1
+
+    with transaction.atomic():
+        UserHierarchy.objects.all().delete()
+        UserHierarchy.objects.bulk_create(rows, batch_size=HIERARCHY_BATCH_SIZE)
+    return len(rows)
+
+
+def scope_user_ids(admin):
+    """
+    Subquery of the pkids of everyone below admin in the assigned_admin tree.
+    """
+    return UserHierarchy.objects.filter(ancestor=admin).values("descendant_id")
+
+
+def scope_users(user, users=None):
+    """
+    The users a staff member manages: everyone for a superadmin, the users
+    below them for an admin, nobody otherwise (anonymous users included).
+    """
+    users = User.objects.all() if users is None else users
+    if not user.is_authenticated:
+        return users.none()
+    if user.role == User.Roles.SUPERADMIN:
+        return users
+    if user.role == User.Roles.ADMIN:
+        return users.filter(pkid__in=scope_user_ids(user))
+    return users.none()
+
+
+def scope_tasks(user, tasks):
+    """
+    Narrow tasks to the ones user may see: all for a superadmin, those of
+    the users below them for an admin, their own for other users and none
+    for anonymous users.
+    """
+    if not user.is_authenticated:
+        return tasks.none()
+    if user.role == User.Roles.SUPERADMIN:
+        return tasks
+    if user.role == User.Roles.ADMIN:
+        return tasks.filter(assigned_to__in=scope_user_ids(user))
+    return tasks.filter(assigned_to=user)
@@ -0,0 +1,46 @@
+import json
+from pathlib import Path
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management.base import BaseCommand, CommandError
+
+from users.bulk import IMPORT_BATCH_SIZE, UserImportError, import_users, parse_user_upload
+
+
+class Command(BaseCommand):
+    help = (
+        "Create users in bulk from a CSV or JSON file, with set-based uniqueness checks, "
+        "passwords hashed in a process pool and chunked inserts. Invalid rows are reported and skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or JSON file of users.")
+        parser.add_argument("--processes", type=int, help="Password hashing processes (default: one per CPU).")
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE, help="Users per INSERT.")
+        parser.add_argument("--json", action="store_true", help="Print the result as JSON.")
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        try:
+            upload = SimpleUploadedFile(path.name, path.read_bytes())
+        except OSError as e:
+            raise CommandError(f"Cannot read {path}: {e}")
+
+        try:
+            created, errors = import_users(
+                parse_user_upload(upload),
+                batch_size=options["batch_size"],
+                processes=options["processes"],  # None: one per CPU
+                max_rows=None,
+            )
+        except UserImportError as e:
+            raise CommandError(str(e))
+
+        if options["json"]:
+            self.stdout.write(json.dumps({"created": created, "errors": errors}, indent=2))
+            return
+
+        for error in errors:
+            messages = "; ".join(f"{field}: {', '.join(map(str, items))}" for field, items in error["errors"].items())
+            self.stderr.write(f"row {error['row']}: {messages}")
+        self.stdout.write(self.style.SUCCESS(f"Created {created} users, {len(errors)} rows failed."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from users.hierarchy import rebuild_hierarchy
+
+
+class Command(BaseCommand):
+    help = "Recompute the admin scope closure table (UserHierarchy) from User.assigned_admin."
+
+    def handle(self, *args, **options):
+        rows = rebuild_hierarchy()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} user hierarchy rows."))
@@ -0,0 +1,42 @@
+# Generated by Django 5.2 on 2026-10-18 14:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def build_hierarchy(apps, schema_editor):
+    User = apps.get_model('users', 'User')
+    UserHierarchy = apps.get_model('users', 'UserHierarchy')
+    parents = dict(User.objects.filter(assigned_admin__isnull=False).values_list('pkid', 'assigned_admin_id'))
+    rows = []
+    for pkid, parent in parents.items():
+        seen, depth = {pkid}, 1
+        while parent is not None and parent not in seen:
+            rows.append(UserHierarchy(ancestor_id=parent, descendant_id=pkid, depth=depth))
+            seen.add(parent)
+            parent, depth = parents.get(parent), depth + 1
+    UserHierarchy.objects.bulk_create(rows, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserHierarchy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('depth', models.PositiveSmallIntegerField()),
+                ('ancestor', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('descendant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('ancestor', 'descendant'), name='unique_user_hierarchy')],
+            },
+        ),
+        migrations.RunPython(build_hierarchy, migrations.RunPython.noop),
+    ]
@@ -51,5 +51,38 @@ class User(AbstractUser):
         verbose_name_plural = _("Users")
         ordering = ["-date_joined"]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remember the loaded assigned_admin so the hierarchy hooks can tell whether it changed
+        instance._loaded_values = {
+            field: value for field, value in zip(field_names, values) if field == 'assigned_admin_id'
+        }
+        return instance
+
+    def __str__(self):
+        return self.email
+
+
+class UserHierarchy(models.Model):
+    """
+    Closure table of the assigned_admin tree: one row for every admin and
+    every user below them, however deep, with depth 1 for a direct
+    assignment. An admin's scope is then a single indexed lookup instead of
+    a recursive walk. Kept up to date by the signal handlers in
+    users.signals; rebuild it with the rebuild_user_hierarchy command after
+    changing assigned_admin with queryset.update().
+    """
+
+    ancestor = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+", db_index=False)
+    descendant = models.ForeignKey(User, on_delete=models.CASCADE, related_name="+")
+    depth = models.PositiveSmallIntegerField()
+
+    class Meta:
+        constraints = [
+            # also the index behind the ancestor -> descendants scope lookup
+            models.UniqueConstraint(fields=["ancestor", "descendant"], name="unique_user_hierarchy"),
+        ]
+
     def __str__(self):
-        return self.email
\ No newline at end of file
+        return f"{self.ancestor_id} > {self.descendant_id} ({self.depth})"
@@ -2,6 +2,8 @@ from django.contrib.auth import get_user_model
 from djoser.serializers import UserCreateSerializer, UserSerializer
 from rest_framework import serializers
 
+from users.models import UsernameValidator
+
 User = get_user_model()
 
 
@@ -15,3 +17,13 @@ class CustomUserSerializer(UserSerializer):
     class Meta(UserSerializer.Meta):
         model = User
         fields = ["id", "username", "name", "mobile","role", "email"]
+
+
+class BulkUserRowSerializer(serializers.Serializer):
+    username = serializers.CharField(max_length=60, validators=[UsernameValidator()])
+    name = serializers.CharField(max_length=120)
+    email = serializers.EmailField()
+    mobile = serializers.CharField(max_length=15)
+    role = serializers.ChoiceField(choices=[User.Roles.USER, User.Roles.ADMIN], default=User.Roles.USER)
+    password = serializers.CharField(required=False, allow_blank=True, help_text="Left empty, the user gets an unusable password.")
+    assigned_admin = serializers.CharField(required=False, allow_blank=True, help_text="Admin pkid or username, for users.")
@@ -0,0 +1,45 @@
+from django.core.exceptions import ValidationError
+from django.db.models.signals import post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .hierarchy import attach, detach, move, subtree_of
+from .models import User
+
+
+@receiver(pre_save, sender=User)
+def remember_assigned_admin(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._previous_admin_id = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and 'assigned_admin' not in update_fields and 'assigned_admin_id' not in update_fields:
+        instance._previous_admin_id = instance.assigned_admin_id
+        return
+
+    loaded = getattr(instance, '_loaded_values', {})
+    if 'assigned_admin_id' in loaded:
+        instance._previous_admin_id = loaded['assigned_admin_id']
+    else:
+        instance._previous_admin_id = User.objects.filter(pk=instance.pk).values_list('assigned_admin_id', flat=True).first()
+
+    # refuse cycles before the row is written
+    if instance.assigned_admin_id != instance._previous_admin_id and instance.assigned_admin_id in subtree_of(instance.pk):
+        raise ValidationError("An admin cannot be assigned to a user below them.")
+
+
+# keep the UserHierarchy closure table in step with assigned_admin
+@receiver(post_save, sender=User)
+def update_user_hierarchy(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        attach(instance.pk, instance.assigned_admin_id)
+    elif instance.assigned_admin_id != instance._previous_admin_id:
+        move(instance.pk, instance.assigned_admin_id)
+    # a second save of the same instance diffs against what this one wrote
+    instance._loaded_values = {**getattr(instance, '_loaded_values', {}), 'assigned_admin_id': instance.assigned_admin_id}
+
+
+# the users below a deleted admin lose their assigned_admin through SET_NULL, which sends no signals
+@receiver(pre_delete, sender=User)
+def detach_deleted_user(sender, instance, **kwargs):
+    detach(instance.pk)
@@ -1,3 +1,231 @@
-from django.test import TestCase
+import io
+import json
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.hashers import check_password
+from django.contrib.auth.models import AnonymousUser
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from tasks.tests import TEST_THROTTLE_STORE, api_client, make_user
+from . import bulk
+from .bulk import UserImportError, hash_passwords, import_users, validate_user_rows
+from .hierarchy import ancestors_of, rebuild_hierarchy, scope_users, subtree_of
+from .models import User
+
+
+def user_row(username, **extra):
+    return {"username": username, "name": username, "email": f"{username}@example.com", "mobile": f"9{len(username):02d}{username[-8:]}", **extra}
+
+
+class UserImportTests(TestCase):
+    def test_creates_valid_rows_and_reports_invalid_ones(self):
+        created, errors = import_users([user_row("alice"), {"username": "bob"}, "not a row"])
+        self.assertEqual(created, 1)
+        self.assertEqual([error["row"] for error in errors], [2, 3])
+        self.assertIn("email", errors[0]["errors"])
+        self.assertTrue(User.objects.filter(username="alice").exists())
+
+    def test_rejects_values_already_in_the_database(self):
+        make_user("taken")
+        created, errors = import_users([user_row("fresh", email="taken@example.com")])
+        self.assertEqual(created, 0)
+        self.assertEqual(errors, [{"row": 1, "errors": {"email": ["A user with that email already exists."]}}])
+
+    def test_rejects_later_duplicates_within_the_file(self):
+        rows = [user_row("first"), user_row("second", mobile=user_row("first")["mobile"]), user_row("first", email="other@example.com")]
+        created, errors = import_users(rows)
+        self.assertEqual(created, 1)
+        self.assertEqual(errors[0], {"row": 2, "errors": {"mobile": ["A user with that mobile already exists."]}})
+        self.assertEqual(errors[1]["row"], 3)
+        self.assertIn("username", errors[1]["errors"])
+
+    def test_resolves_assigned_admin_by_username_or_pkid(self):
+        admin = make_user("boss", role="admin")
+        rows = [user_row("byname", assigned_admin="boss"), user_row("bypkid", assigned_admin=str(admin.pkid)), user_row("nobody", assigned_admin="ghost")]
+        created, errors = import_users(rows)
+        self.assertEqual(created, 2)
+        self.assertEqual(set(User.objects.filter(assigned_admin=admin).values_list("username", flat=True)), {"byname", "bypkid"})
+        self.assertEqual(errors, [{"row": 3, "errors": {"assigned_admin": ["Admin not found."]}}])
+
+    def test_row_limit(self):
+        with self.assertRaises(UserImportError):
+            import_users([user_row("a"), user_row("b")], max_rows=1)
+
+    def test_uniqueness_is_checked_with_one_query_per_field(self):
+        make_user("taken")
+        rows = [user_row(f"user{number}") for number in range(50)] + [user_row("taken"), user_row("x", assigned_admin="boss")]
+        with self.assertNumQueries(4):  # username, email, mobile, admins
+            accepted, errors = validate_user_rows(rows)
+        self.assertEqual(len(accepted), 50)
+        self.assertEqual([error["row"] for error in errors], [51, 52])
+        self.assertEqual(set(errors[0]["errors"]), {"username", "email"})
+
+    def test_normalized_values_count_as_duplicates(self):
+        make_user("taken")
+        created, errors = import_users([user_row("fresh", email="taken@EXAMPLE.COM"), user_row("other", email="Other@Example.com"),
+                                        user_row("third", email="Other@example.COM")])
+        self.assertEqual(created, 1)
+        self.assertEqual([(error["row"], list(error["errors"])) for error in errors], [(1, ["email"]), (3, ["email"])])
+
+    def test_conflicts_found_at_insert_time_are_reported_by_row(self):
+        make_user("late")
+        rows = [user_row("early"), user_row("late", email="late2@example.com"), user_row("after")]
+        # as if the user was created by someone else between validation and the insert
+        with mock.patch.object(bulk, "find_taken", return_value=set()):
+            created, errors = import_users(rows)
+        self.assertEqual(created, 2)
+        self.assertEqual(errors, [{"row": 2, "errors": {"non_field_errors": ["A user with these details already exists."]}}])
+        self.assertEqual(User.objects.get(username="late").email, "late@example.com")
+        self.assertEqual(User.objects.filter(username__in=["early", "after"]).count(), 2)
+
+
+@override_settings(THROTTLE_STORE=TEST_THROTTLE_STORE)
+class UserImportViewTests(TestCase):
+    def setUp(self):
+        self.superadmin = make_user("import_root", role="superadmin")
+        rows = [user_row(f"web{number}", password=f"secret-{number}") for number in range(6)]
+        self.rows = rows
+
+    def test_api_hashes_inline_without_a_process_pool(self):
+        with mock.patch.object(bulk, "ProcessPoolExecutor") as pool:
+            response = api_client(self.superadmin).post(reverse("user-import"), {"users": self.rows}, format="json")
+        pool.assert_not_called()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json(), {"created": 6, "errors": []})
+        self.assertTrue(User.objects.get(username="web3").check_password("secret-3"))
+
+    def test_upload_page_hashes_inline_without_a_process_pool(self):
+        self.client.force_login(self.superadmin)
+        upload = SimpleUploadedFile("users.json", json.dumps(self.rows).encode(), content_type="application/json")
+        with mock.patch.object(bulk, "ProcessPoolExecutor") as pool:
+            response = self.client.post(reverse("import_users"), {"file": upload})
+        pool.assert_not_called()
+        self.assertEqual(response.context["created"], 6)
+
+    def test_web_uploads_are_limited(self):
+        rows = self.rows + [user_row(f"more{number}") for number in range(bulk.IMPORT_MAX_ROWS)]
+        response = api_client(self.superadmin).post(reverse("user-import"), {"users": rows}, format="json")
+        self.assertEqual((response.status_code, response.json()), (400, {"error": "A single import can contain at most 1000 users."}))
+        self.assertFalse(User.objects.filter(username__startswith="web").exists())
+
+    def test_command_hashes_in_a_pool(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".json") as upload, \
+                mock.patch.object(bulk, "hash_passwords", wraps=hash_passwords) as hashed:
+            json.dump(self.rows, upload)
+            upload.flush()
+            call_command("import_users", upload.name, "--processes", "2", stdout=io.StringIO(), stderr=io.StringIO())
+        self.assertEqual(hashed.call_args.args[1], 2)
+        self.assertEqual(User.objects.filter(username__startswith="web").count(), 6)
+
+
+class HashPasswordsTests(TestCase):
+    def test_pool_hashes_match_and_empty_passwords_are_unusable(self):
+        passwords = ["one", "", "two", "three", "four", "five"]
+        hashed = hash_passwords(passwords, processes=2)
+        for password, encoded in zip(passwords, hashed):
+            if password:
+                self.assertTrue(check_password(password, encoded))
+            else:
+                self.assertFalse(check_password("", encoded))
+
+
+class UserHierarchyTests(TestCase):
+    def setUp(self):
+        self.top = make_user("top", role="admin")
+        self.middle = make_user("middle", role="admin", admin=self.top)
+        self.user = make_user("leaf", admin=self.middle)
+
+    def test_attach_links_every_ancestor(self):
+        self.assertEqual(ancestors_of(self.user.pkid), {self.middle.pkid: 1, self.top.pkid: 2})
+        self.assertEqual(subtree_of(self.top.pkid), {self.top.pkid: 0, self.middle.pkid: 1, self.user.pkid: 2})
+
+    def test_move_takes_the_subtree_along(self):
+        other = make_user("other", role="admin")
+        self.middle.assigned_admin = other
+        self.middle.save()
+        self.assertEqual(ancestors_of(self.user.pkid), {self.middle.pkid: 1, other.pkid: 2})
+        self.assertEqual(subtree_of(self.top.pkid), {self.top.pkid: 0})
+
+    def test_detach_when_unassigned_or_deleted(self):
+        self.middle.assigned_admin = None
+        self.middle.save()
+        self.assertEqual(ancestors_of(self.user.pkid), {self.middle.pkid: 1})
+        self.middle.delete()
+        self.assertEqual(ancestors_of(self.user.pkid), {})
+
+    def test_refuses_cycles(self):
+        self.top.assigned_admin = self.middle
+        with self.assertRaises(ValidationError):
+            self.top.save()
+
+    def test_second_save_of_the_same_instance_diffs_against_the_first(self):
+        other = make_user("other", role="admin")
+        user = User.objects.get(pk=self.user.pk)
+        user.assigned_admin = other
+        user.save()
+        # back to the admin the instance was loaded with
+        user.assigned_admin = self.middle
+        user.save()
+        self.assertEqual(ancestors_of(self.user.pkid), {self.middle.pkid: 1, self.top.pkid: 2})
+        self.assertEqual(subtree_of(other.pkid), {other.pkid: 0})
+
+    def test_reassigning_a_nested_admin_moves_their_users(self):
+        other = make_user("other", role="admin")
+        below = make_user("below", role="admin", admin=other)
+        middle = User.objects.get(pk=self.middle.pk)
+        middle.assigned_admin = below
+        middle.save()
+        self.assertEqual(ancestors_of(self.user.pkid), {self.middle.pkid: 1, below.pkid: 2, other.pkid: 3})
+        self.assertEqual(subtree_of(self.top.pkid), {self.top.pkid: 0})
+
+    def test_deleting_a_nested_admin_detaches_their_users(self):
+        self.middle.delete()
+        self.assertEqual(subtree_of(self.top.pkid), {self.top.pkid: 0})
+        self.assertEqual(ancestors_of(self.user.pkid), {})
+
+    def test_rebuild_matches_the_signal_maintained_rows(self):
+        before = ancestors_of(self.user.pkid)
+        rebuild_hierarchy()
+        self.assertEqual(ancestors_of(self.user.pkid), before)
+
+    def test_scope_users(self):
+        self.assertEqual(set(scope_users(self.top)), {self.middle, self.user})
+        self.assertEqual(set(scope_users(self.middle)), {self.user})
+        self.assertFalse(scope_users(self.user).exists())
+        self.assertFalse(scope_users(AnonymousUser()).exists())
+
+
+class AssignAdminViewTests(TestCase):
+    def setUp(self):
+        self.superadmin = make_user("root", role="superadmin", is_superuser=True)
+        self.top = make_user("top", role="admin")
+        self.middle = make_user("middle", role="admin", admin=self.top)
+        self.client.force_login(self.superadmin)
+
+    def assign(self, user, value):
+        return self.client.post(
+            reverse("assign_admin", args=[user.id]), {"assigned_admin": value}, HTTP_ACCEPT="application/json",
+        )
+
+    def test_assigns_and_clears(self):
+        user = make_user("leaf")
+        self.assertEqual(self.assign(user, "middle").status_code, 200)
+        self.assertEqual(ancestors_of(user.pkid), {self.middle.pkid: 1, self.top.pkid: 2})
+        self.assertEqual(self.assign(user, "").status_code, 200)
+        self.assertEqual(ancestors_of(user.pkid), {})
+
+    def test_cycle_is_a_bad_request(self):
+        response = self.assign(self.top, str(self.middle.pkid))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("below", response.json()["error"])
+        self.top.refresh_from_db()
+        self.assertIsNone(self.top.assigned_admin)
+        self.assertEqual(ancestors_of(self.middle.pkid), {self.top.pkid: 1})
+
+    def test_unknown_admin_is_a_bad_request(self):
+        self.assertEqual(self.assign(self.middle, "ghost").status_code, 400)
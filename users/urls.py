@@ -4,6 +4,7 @@ from .views import (
     CustomTokenObtainPairView,
     CustomTokenRefreshView,
     LogoutAPIView,
+    UserImportAPIView,
 )
 
 
@@ -12,4 +13,5 @@ urlpatterns = [
     path("login/", CustomTokenObtainPairView.as_view()),
     path("refresh/", CustomTokenRefreshView.as_view()),
     path("logout/", LogoutAPIView.as_view()),
+    path("users-import/", UserImportAPIView.as_view(), name="user-import"),
 ]
@@ -3,11 +3,15 @@ from typing import Optional
 from django.conf import settings
 from djoser.social.views import ProviderAuthView
 from rest_framework import status
+from rest_framework.parsers import JSONParser, MultiPartParser
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
+from common.permissions import IsSuperAdminRole
+from .bulk import UserImportError, import_users, parse_user_upload
+
 logger = logging.getLogger(__name__)
 
 
@@ -112,3 +116,28 @@ class LogoutAPIView(APIView):
         response.delete_cookie("refresh")
         response.delete_cookie("logged_in")
         return response
+
+
+class UserImportAPIView(APIView):
+    """
+    API view for a superadmin to create many users at once from a JSON body
+    or a CSV/JSON file upload. Valid rows are created, the others come back
+    as per-row errors.
+    """
+    permission_classes = [IsSuperAdminRole]
+    parser_classes = [JSONParser, MultiPartParser]
+
+    def post(self, request: Request, *args, **kwargs) -> Response:
+        try:
+            if "file" in request.FILES:
+                rows = parse_user_upload(request.FILES["file"])
+            else:
+                rows = request.data.get("users") if isinstance(request.data, dict) else request.data
+                if not isinstance(rows, list):
+                    raise UserImportError("Expected a list of users.")
+            created, errors = import_users(rows)
+        except UserImportError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        response_status = status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST
+        return Response({"created": created, "errors": errors}, status=response_status)